@@ -16,13 +16,18 @@ from pytorch_lightning.utilities import DistributedType
 from torch import Tensor, nn
 from torch.optim import Adam, Optimizer
 from torch.utils.data import DataLoader
-from torch.utils.data.dataset import IterableDataset
 from pytorch_lightning.loggers import TensorBoardLogger
 import csv
 
 from pytorch_lightning.callbacks import Callback
 
 from TetrisWrapperPot import TetrisWrapper
+from gym_simplifiedtetris.training import (
+    Experience,
+    PrioritizedReplayBuffer,
+    ReplayBuffer,
+    ReplayDataset,
+)
 import numpy as np
 
 from bayes_opt import BayesianOptimization
@@ -66,78 +71,14 @@ class DQN(nn.Module):
 # In[3]:
 
 
-# Named tuple for storing experience steps gathered in training
-Experience = namedtuple(
-    "Experience",
-    field_names=["state", "action", "reward", "done", "new_state"],
-)
-
-class ReplayBuffer:
-    """Replay Buffer for storing past experiences allowing the agent to learn from them.
-
-    Args:
-        capacity: size of the buffer
-    """
-
-    def __init__(self, capacity: int) -> None:
-        self.buffer = deque(maxlen=capacity)
-
-    def __len__(self) -> None:
-        return len(self.buffer)
-
-    def append(self, experience: Experience) -> None:
-        """Add experience to the buffer.
-
-        Args:
-            experience: tuple (state, action, reward, done, new_state)
-        """
-        self.buffer.append(experience)
-
-    def sample(self, batch_size: int) -> Tuple:
-        indices = np.random.choice(len(self.buffer), batch_size, replace=False)
-        states, actions, rewards, dones, next_states = zip(*(self.buffer[idx] for idx in indices))
-
-        return (
-            np.array(states),
-            np.array(actions),
-            np.array(rewards, dtype=np.float32),
-            np.array(dones, dtype=np.bool),
-            np.array(next_states),
-        )
-
-
 # In[4]:
 
 
-class RLDataset(IterableDataset):
-    """Iterable Dataset containing the ExperienceBuffer which will be updated with new experiences during training.
-
-    Args:
-        buffer: replay buffer
-        sample_size: number of experiences to sample at a time
-    """
-
-    def __init__(self, buffer: ReplayBuffer, sample_size) -> None:
-        self.buffer = buffer
-        self.sample_size = sample_size
-
-    def __iter__(self):
-        states, actions, rewards, dones, new_states = self.buffer.sample(self.sample_size)
-        for i in range(len(dones)):
-            yield states[i], actions[i], rewards[i], dones[i], new_states[i]
-
-
 # In[5]:
 from pathlib import Path
 
 
-def pickFileName():
-    
-    Path("log/trainingvals/").mkdir(parents=True, exist_ok=True)
-    
-    files = os.listdir('log/trainingvals/')
-    
-    return '{}.csv'.format(len(files)+1)
+from gym_simplifiedtetris.training import allocate_run
 
 
 import random
@@ -216,7 +157,10 @@ class DQNLightning(LightningModule):
         eps_end,
         sample_size,
         depth,
-        writer
+        writer,
+        prioritized=False,
+        priority_alpha=0.6,
+        priority_beta=0.4,
     ) -> None:
 
         self.writer = writer
@@ -236,7 +180,20 @@ class DQNLightning(LightningModule):
         self.target_net = DQN(obs_size, n_actions, depth)
 
 
-        self.buffer = ReplayBuffer(self.hparams.replay_size)
+        if self.hparams.prioritized:
+            self.buffer = PrioritizedReplayBuffer(
+                self.hparams.replay_size,
+                obs_size,
+                alpha=self.hparams.priority_alpha,
+                beta=self.hparams.priority_beta,
+                num_cells=self.env._height_ * self.env._width_,
+            )
+        else:
+            self.buffer = ReplayBuffer(
+                self.hparams.replay_size,
+                obs_size,
+                num_cells=self.env._height_ * self.env._width_,
+            )
         self.agent = Agent(self.env, self.buffer)
         self.epoch_rewards = []
         self.avg_reward = 0
@@ -278,7 +235,7 @@ class DQNLightning(LightningModule):
         Returns:
             loss
         """
-        states, actions, rewards, dones, next_states = batch
+        states, actions, rewards, dones, next_states = batch[:5]
 
         state_action_values = self.net(states).gather(1, actions.unsqueeze(-1)).squeeze(-1)
 
@@ -289,7 +246,15 @@ class DQNLightning(LightningModule):
 
         expected_state_action_values = next_state_values * self.hparams.gamma + rewards
 
-        return nn.MSELoss()(state_action_values, expected_state_action_values)
+        if not self.hparams.prioritized:
+            return nn.MSELoss()(state_action_values, expected_state_action_values)
+
+        # Weight the squared TD errors to correct for prioritized sampling.
+        indices, weights = batch[5:]
+        td_errors = expected_state_action_values - state_action_values
+        self.buffer.update_priorities(indices.cpu().numpy(), td_errors.detach().cpu().numpy())
+
+        return torch.mean(weights * td_errors ** 2)
 
     def training_step(self, batch: Tuple[Tensor, Tensor], nb_batch) -> OrderedDict:
 
@@ -329,11 +294,19 @@ class DQNLightning(LightningModule):
         return [optimizer]
 
     def __dataloader(self) -> DataLoader:
-        """Initialize the Replay Buffer dataset used for retrieving experiences."""
-        dataset = RLDataset(self.buffer, self.hparams.sample_size)
+        """Initialize the Replay Buffer dataset used for retrieving experiences.
+
+        The dataset yields ready-made batches, so the DataLoader does not collate them.
+        """
+        dataset = ReplayDataset(
+            self.buffer,
+            self.hparams.batch_size,
+            self.hparams.sample_size // self.hparams.batch_size,
+            pin_memory=torch.cuda.is_available(),
+        )
         dataloader = DataLoader(
             dataset=dataset,
-            batch_size=self.hparams.batch_size,
+            batch_size=None,
         )
         return dataloader
 
@@ -371,7 +344,7 @@ sample_size = 16352
 depth = 2
 lr = 5e-4
 
-f = open('log/trainingvals/{}'.format(pickFileName()), 'w+')
+f = open(allocate_run('log/trainingvals/', '{}.csv')[1], 'w+')
 writer = csv.writer(f)
 
 model = DQNLightning(
@@ -4,11 +4,7 @@ import csv
 import os
 import numpy as np
 
-def pickFileName():
-
-    files = os.listdir('log/')
-
-    return len(files)+1
+from gym_simplifiedtetris.training import allocate_run
 
 class TetrisWrapper(Tetris):
 
@@ -19,7 +15,7 @@ class TetrisWrapper(Tetris):
         self.maxh = -1
         self.score_types = [0]*4
 
-        f = open('log/score_count{}.txt'.format(pickFileName()), 'w+')
+        f = open(allocate_run('log/', 'score_count{}.txt')[1], 'w+')
         self.writer = csv.writer(f)
 
     def reset(self):
@@ -3,11 +3,7 @@ from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
 import csv
 import os
 
-def pickFileName():
-
-    files = os.listdir('log/')
-
-    return len(files)+1
+from gym_simplifiedtetris.training import allocate_run
 
 class TetrisWrapper(Tetris):
 
@@ -16,7 +12,7 @@ class TetrisWrapper(Tetris):
         self.n = 1
         self.score_types = [0]*4
 
-        f = open('log/score_count{}.txt'.format(pickFileName()), 'w+')
+        f = open(allocate_run('log/', 'score_count{}.txt')[1], 'w+')
         self.writer = csv.writer(f)
 
     def reset(self):
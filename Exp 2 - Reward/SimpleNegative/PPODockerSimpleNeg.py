@@ -21,6 +21,7 @@ from torch.distributions import Categorical
 import gym 
 from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
 import numpy as np
+from gym_simplifiedtetris.training.advantages import compute_gae, compute_returns
 
 from pytorch_lightning.callbacks import Callback
 import multiprocessing
@@ -173,33 +174,6 @@ class PPOLightning(LightningModule):
         loss = (val - val_new).pow(2).mean()
         return loss
         
-    def compute_gae(self, rewards, values, next_val):
-        
-
-        rs = rewards
-        vals = values + [next_val]
-        
-        x = []
-        for i in range(len(rs)-1):
-            x.append(rs[i]+self.hparams.gamma*vals[i+1] - vals[i])
-    
-        a = self.compute_reward(x, self.hparams.gamma * self.hparams.lamb)
-
-        return a
-    
-    def compute_reward(self,rewards, gamma):
-        
-        rs = []
-        sum_rs = 0
-
-        for r in reversed(rewards):
-            sum_rs = (sum_rs * gamma) + r
-            rs.append(sum_rs)
-
-
-        return list(reversed(rs))
-
-    
     def make_batch(self):
         for i in range(self.hparams.epoch_steps):
 
@@ -232,8 +206,14 @@ class PPOLightning(LightningModule):
                 
                 #compute batch discounted rewards
                 self.ep_rewards.append(next_val)
-                self.batch_vals += self.compute_reward(self.ep_rewards,self.hparams.gamma)[:-1]
-                self.batch_advs += self.compute_gae(self.ep_rewards,self.ep_vals, next_val)
+                # the last reward is the bootstrapped value
+                ep_rewards = np.array(self.ep_rewards[:-1], dtype=np.float32)[:, None]
+                ep_vals = np.array(self.ep_vals, dtype=np.float32)[:, None]
+                ep_dones = np.zeros(ep_rewards.shape, dtype=bool)
+                next_vals = np.array([next_val], dtype=np.float32)
+                ep_advs, _ = compute_gae(ep_rewards, ep_vals, ep_dones, next_vals, self.hparams.gamma, self.hparams.lamb)
+                self.batch_vals += compute_returns(ep_rewards, ep_dones, next_vals, self.hparams.gamma)[:, 0].tolist()
+                self.batch_advs += ep_advs[:, 0].tolist()
                 
                 self.epoch_rewards.append(sum(self.ep_rewards))
                 #print("Total for Ep :",sum(self.ep_rewards))
@@ -321,18 +301,12 @@ from pathlib import Path
 import csv
 import os
 
-def pickFileName():
-
-    Path("/log/trainingvalsPPO/").mkdir(parents=True, exist_ok=True)
-
-    files = os.listdir('/log/trainingvalsPPO/')
-
-    return '{}.csv'.format(len(files)+1)
+from gym_simplifiedtetris.training import allocate_run
 
 num_epochs=25000
 
 
-f = open('/log/trainingvalsPPO/{}'.format(pickFileName()), 'w+')
+f = open(allocate_run('/log/trainingvalsPPO/', '{}.csv')[1], 'w+')
 writer = csv.writer(f)
 
 model = PPOLightning(
@@ -3,11 +3,7 @@ from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
 import csv
 
 
-def pickFileName():
-
-    files = os.listdir('/log/')
-
-    return len(files)+1
+from gym_simplifiedtetris.training import allocate_run
 
 class TetrisWrapper(Tetris):
 
@@ -15,7 +11,7 @@ class TetrisWrapper(Tetris):
         super().__init__(**kwargs)
         self.n = 1
 
-        f = open('/log/score_count{}.txt'.format(pickFileName()), 'w+')
+        f = open(allocate_run('/log/', 'score_count{}.txt')[1], 'w+')
         self.writer = csv.writer(f)
 
     def reset(self):
@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+# Not yet migrated to the trainer, which has no recurrent policy, so this
+# script is still run on its own.
+
 # In[34]:
 
 
@@ -21,6 +24,7 @@ from torch.distributions import Categorical
 import gym 
 from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
 import numpy as np
+from gym_simplifiedtetris.training import RecurrentRolloutBuffer
 
 from pytorch_lightning.callbacks import Callback
 import multiprocessing
@@ -29,67 +33,75 @@ from bayes_opt import BayesianOptimization
 from bayes_opt.logger import JSONLogger
 from bayes_opt.event import Events
 
-from collections import deque
-
 # In[35]:
 
 
-class CriticNet(nn.Module):
-    def __init__(self, obs_size, hidden_size = 100):
+class RecurrentActorCriticNet(nn.Module):
+    #the actor and critic share one LSTM, whose state (h, c) is carried from step to step
+    def __init__(self, obs_size, n_actions, lstm_size = 64, hidden_size = 64):
         super().__init__()
         print(obs_size)
-        self.lstm = nn.Sequential(nn.LSTM(input_size=obs_size, hidden_size=4, batch_first=True))
+        self.lstm_size = lstm_size
+        self.lstm = nn.LSTMCell(input_size=obs_size, hidden_size=lstm_size)
+
+        self.actor = nn.Sequential(
+            nn.Linear(lstm_size, hidden_size),
+            nn.ReLU(),
+            nn.Linear(hidden_size, n_actions)
+            )
 
         self.critic = nn.Sequential(
-            nn.Linear(16, hidden_size),
+            nn.Linear(lstm_size, hidden_size),
             nn.ReLU(),
             nn.Linear(hidden_size, 1)
         )
-        
-    def forward(self, x):
-        timesteps = self.lstm(x)
-        timesteps = timesteps[0].contiguous()
-        timesteps = timesteps.view(timesteps.shape[0],-1)
-        value = self.critic(timesteps)
-        return value
-
-class ActorNet(nn.Module):
-    def __init__(self, obs_size, n_actions, depth, hidden_size = 64):
-        super().__init__()
 
-        print(obs_size)
-        self.lstm = nn.Sequential(nn.LSTM(input_size=obs_size, hidden_size=4, batch_first=True))
+    def initial_state(self, batch_size):
+        zeros = torch.zeros(batch_size, self.lstm_size)
+        return zeros, zeros.clone()
 
-        self.actor = nn.Sequential(
-            nn.Linear(16, hidden_size),
-            nn.ReLU(),
-            nn.Linear(hidden_size, n_actions)
-            )
-
-    def forward(self, x):
-        timesteps = self.lstm(x)
-        timesteps = timesteps[0].contiguous()
-        timesteps = timesteps.view(timesteps.shape[0],-1)
-        logits = self.actor(timesteps)
+    def heads(self, features):
+        logits = self.actor(features)
         logits = torch.nan_to_num(logits)
         dist = Categorical(logits=logits)
+        value = self.critic(features).view(-1)
+        return dist, value
+
+    def forward(self, x, lstm_state):
+        #one step: x is (batch, obs_size)
+        h, c = self.lstm(x, lstm_state)
+        dist, value = self.heads(h)
         action = dist.sample()
 
-        return dist, action
+        return dist, action, value, (h, c)
+
+    def forward_sequence(self, x, dones, lstm_state):
+        #truncated BPTT over (batch, seq_len, obs_size) chunks, starting from the stored lstm state
+        #the state is zeroed after any step that ended an episode
+        h, c = lstm_state
+        not_dones = 1 - dones.float()
+        features = []
+        for t in range(x.shape[1]):
+            if t > 0:
+                h = h * not_dones[:, t - 1, None]
+                c = c * not_dones[:, t - 1, None]
+            h, c = self.lstm(x[:, t], (h, c))
+            features.append(h)
+
+        features = torch.stack(features, dim=1).view(-1, self.lstm_size)
+        return self.heads(features)
 
 
 class ActorCritic():
-    def __init__(self, critic, actor):
-        self.critic = critic
-        self.actor = actor 
+    def __init__(self, net):
+        self.net = net
     
     @torch.no_grad()
-    def __call__(self, state: torch.Tensor):
-        dist, action = self.actor(state)
+    def __call__(self, state: torch.Tensor, lstm_state):
+        dist, action, val, lstm_state = self.net(state, lstm_state)
         probs = dist.log_prob(action)
-        val = self.critic(state)
 
-        return dist, action, probs, val
+        return dist, action, probs, val, lstm_state
 
 
 # In[36]:
@@ -116,7 +128,9 @@ class PPOLightning(LightningModule):
         epoch_steps,
         gamma,
         depth,
-        writer
+        writer,
+        seq_len=8,
+        value_coef=0.5,
     ):
         self.writer = writer
         writer = -1
@@ -131,150 +145,81 @@ class PPOLightning(LightningModule):
         n_actions = self.env.action_space.n
         print("actions",n_actions)
 
-        self.state = deque(maxlen=4)
+        self.net = RecurrentActorCriticNet(obs_size,n_actions)
+        self.agent = ActorCritic(self.net)
 
-        self.state.append(torch.Tensor(np.ones(obs_size)))
-        self.state.append(torch.Tensor(np.ones(obs_size)))
-        self.state.append(torch.Tensor(np.ones(obs_size)))
-        self.state.append(torch.Tensor(self.env.reset()))
+        #one obs is stored per step, with the lstm state at the start of every seq_len steps
+        epoch_steps = self.hparams.epoch_steps - self.hparams.epoch_steps % seq_len
+        self.buffer = RecurrentRolloutBuffer(epoch_steps, 1, obs_size, self.net.lstm_size, seq_len)
 
-        
-        self.batch_states = []
-        self.batch_actions = []
-        self.batch_probs = []
-        self.batch_advs = []
-        self.batch_vals = []
-        self.ep_rewards = []
+        self.state = torch.Tensor(self.env.reset())
+        self.lstm_state = self.net.initial_state(1)
+
+        self.ep_reward = 0
         self.ep_rewards_all = []
-        self.ep_vals = []
         self.epoch_rewards = []
         self.avg_reward = 0
         self.avg_ep_reward = 0
         self.last_ep_logged = 0
-        
-        self.critic = CriticNet(obs_size)
-        self.actor = ActorNet(obs_size,n_actions,self.hparams.depth)
-        
-        self.agent = ActorCritic(self.critic, self.actor)
     
-    def forward(self, x):
-        dist, action = self.actor(x)
-        val = self.critic(x)
+    def forward(self, x, lstm_state):
+        dist, action, val, lstm_state = self.net(x, lstm_state)
         
-        return dist, action, val
+        return dist, action, val, lstm_state
         
-    def act_loss(self,state,action,prob_old,adv):
-        dist, _ = self.actor(state)
-        prob = dist.log_prob(action)
-        ratio = torch.exp(prob - prob_old)
+    def loss(self,state,action,prob_old,val,adv,done,h,c):
+        dist, val_new = self.net.forward_sequence(state, done, (h, c))
+
+        prob = dist.log_prob(action.view(-1))
+        ratio = torch.exp(prob - prob_old.view(-1))
         #PPO update
+        adv = adv.view(-1)
         clip = torch.clamp(ratio, 1 - self.hparams.clip_eps, 1 + self.hparams.clip_eps) * adv
         #negative gradient descent - gradient ascent
-        loss = -(torch.min(ratio * adv, clip)).mean()
-        return loss
-    
-    def crit_loss(self,state,val):
-        val_new = self.critic(state)
+        act_loss = -(torch.min(ratio * adv, clip)).mean()
         #MSE
-        loss = (val - val_new).pow(2).mean()
+        crit_loss = (val.view(-1) - val_new).pow(2).mean()
+
+        loss = act_loss + self.hparams.value_coef*crit_loss
         return loss
         
-    def compute_gae(self, rewards, values, next_val):
-        
+    def make_batch(self):
+        self.buffer.reset()
 
-        rs = rewards
-        vals = values + [next_val]
-        
-        x = []
-        for i in range(len(rs)-1):
-            x.append(rs[i]+self.hparams.gamma*vals[i+1] - vals[i])
-    
-        a = self.compute_reward(x, self.hparams.gamma * self.hparams.lamb)
+        while not self.buffer.is_full:
+            #one step of the lstm, carrying (h, c) instead of re-running a stack of past obs
+            _, action, probs, val, next_lstm_state = self.agent(self.state[None], self.lstm_state)
+            next_state, reward, done, _ = self.env.step(action.item())
+            self.ep_step += 1
 
-        return a
-    
-    def compute_reward(self,rewards, gamma):
-        
-        rs = []
-        sum_rs = 0
+            self.buffer.add(self.state[None], action, probs, [reward], [done], val, self.lstm_state)
+            self.ep_reward += reward
 
-        for r in reversed(rewards):
-            sum_rs = (sum_rs * gamma) + r
-            rs.append(sum_rs)
+            self.state = torch.Tensor(next_state)
+            self.lstm_state = next_lstm_state
 
+            if done:
+                self.epoch_rewards.append(self.ep_reward)
+                self.ep_rewards_all.append(self.ep_reward)
+                self.ep_reward = 0
+                self.ep_step = 0
+                self.state = torch.Tensor(self.env.reset())
+                self.lstm_state = self.net.initial_state(1)
 
-        return list(reversed(rs))
+        #bootstrap value, the unfinished episode carries on into the next epoch
+        _,_,_,next_val,_ = self.agent(self.state[None], self.lstm_state)
+        self.buffer.compute_returns_and_advantages(next_val, self.hparams.gamma, self.hparams.lamb)
 
-    
-    def make_batch(self):
-        for i in range(self.hparams.epoch_steps):
-            _, action, probs, val = self.agent(torch.stack(list(self.state))[None,...])
-            next_state, reward, done, _ = self.env.step(action.item())
-            self.ep_step += 1
-            
-            self.batch_states.append(torch.stack(list(self.state)))
-            self.batch_actions.append(action)
-            self.batch_probs.append(probs)
-            self.ep_rewards.append(reward)
-            self.ep_vals.append(val.item())
-
-            self.state.append(torch.Tensor(next_state))
-            
-            end = i == (self.hparams.epoch_steps -1)
-
-            if done or end:
-                
-                if end and not done:
-                    #if epoch ends before terminal state, bootstrap value
-                    with torch.no_grad():
-                        #print("epoch ended early")
-                        _,_,_,val = self.agent(torch.stack(list(self.state))[None,...])
-                        next_val = val.item()
-                else:
-                    next_val = 0
-                
-                #compute batch discounted rewards
-                self.ep_rewards.append(next_val)
-                self.batch_vals += self.compute_reward(self.ep_rewards,self.hparams.gamma)[:-1]
-                self.batch_advs += self.compute_gae(self.ep_rewards,self.ep_vals, next_val)
-                
-                self.epoch_rewards.append(sum(self.ep_rewards))
-                #print("Total for Ep :",sum(self.ep_rewards))
-                self.ep_rewards_all.append(sum(self.ep_rewards))
-                self.ep_rewards.clear()
-                self.ep_vals.clear()
-                self.ep_step = 0
+        #logs
+        if self.epoch_rewards:
+            self.avg_ep_reward = sum(self.epoch_rewards)/len(self.epoch_rewards)
+        self.epoch_rewards.clear()
 
-                env = self.env.reset()
-                self.state.append(torch.Tensor(np.zeros(len(env))))
-                self.state.append(torch.Tensor(np.zeros(len(env))))
-                self.state.append(torch.Tensor(np.zeros(len(env))))
-                self.state.append(torch.Tensor(env))
-                
-            if end:
-                self.avg_ep_reward = sum(self.epoch_rewards)/len(self.epoch_rewards)
-
-                data = zip(self.batch_states,
-                            self.batch_actions,
-                            self.batch_probs,
-                            self.batch_vals,
-                            self.batch_advs)
-
-                for (s, a, p, v, ad) in data:
-                    yield s, a, p, v, ad
-                    
-                #logs
-                self.epoch_rewards.clear()
-                
-                self.batch_states.clear()
-                self.batch_actions.clear()
-                self.batch_probs.clear()
-                self.batch_vals.clear()
-                self.batch_advs.clear()
+        yield from self.buffer.get_minibatches(self.hparams.batch_size)
     
-    def training_step(self, batch, batch_idx, optimizer_idx):
+    def training_step(self, batch, batch_idx):
         
-        state,action,prob_old,val,adv = batch
+        state,action,prob_old,val,adv,done,h,c = batch
         # normalize adv
         adv = (adv - adv.mean())/adv.std()
         
@@ -285,32 +230,22 @@ class PPOLightning(LightningModule):
         self.log("avg_ep_reward", self.avg_ep_reward, prog_bar=True, on_step=False, on_epoch=True, logger=True)
         self.log("epoch_reward", sum(self.epoch_rewards), prog_bar=True, on_step=True, on_epoch=True, logger=True)
 
-        
-        if optimizer_idx == 0:
-            loss = self.act_loss(state, action, prob_old, adv)
-            self.log('act_loss', loss, on_step=False, on_epoch=True, prog_bar=True,logger=True)
-
-            self.writer.writerow([self.global_step, self.avg_ep_reward, loss.unsqueeze(0).item()])
-
-            return loss
+        loss = self.loss(state, action, prob_old, val, adv, done, h, c)
+        self.log('loss', loss, on_step=False, on_epoch=True, prog_bar=True,logger=True)
 
-        elif optimizer_idx == 1:
-            loss = self.crit_loss(state,val)
-            self.log('crit_loss', loss, on_step=False, on_epoch=True, prog_bar=True,logger=True)
+        self.writer.writerow([self.global_step, self.avg_ep_reward, loss.unsqueeze(0).item()])
 
-            self.writer.writerow([self.global_step, self.avg_ep_reward, loss.unsqueeze(0).item()])
-
-            return loss
+        return loss
 
     
-    def configure_optimizers(self) -> List[Optimizer]:
-        a_opt = optim.Adam(self.actor.parameters(), lr=self.hparams.alr)
-        c_opt = optim.Adam(self.critic.parameters(), lr=self.hparams.clr)
-        return a_opt,c_opt
+    def configure_optimizers(self) -> Optimizer:
+        opt = optim.Adam(self.net.parameters(), lr=self.hparams.alr)
+        return opt
     
     def __dataloader(self):
         dataset = RLDataSet(self.make_batch)
-        dataloader = DataLoader(dataset=dataset, batch_size=self.hparams.batch_size)
+        #the dataset yields ready-made minibatches of sequences, so the DataLoader does not collate them
+        dataloader = DataLoader(dataset=dataset, batch_size=None)
         return dataloader
     
     def train_dataloader(self):
@@ -334,18 +269,12 @@ from pathlib import Path
 import csv
 import os
 
-def pickFileName():
-
-    Path("log/trainingvalsPPO/").mkdir(parents=True, exist_ok=True)
-
-    files = os.listdir('log/trainingvalsPPO/')
-
-    return '{}.csv'.format(len(files)+1)
+from gym_simplifiedtetris.training import allocate_run
 
 num_epochs=25000
 
 
-f = open('log/trainingvalsPPO/{}'.format(pickFileName()), 'w+')
+f = open(allocate_run('log/trainingvalsPPO/', '{}.csv')[1], 'w+')
 writer = csv.writer(f)
 
 model = PPOLightning(
@@ -377,22 +306,16 @@ totals = []
 
 env = Tetris(grid_dims=(10, 10), piece_size=4)
 
-state = deque(maxlen=4)
-
 with torch.no_grad():
     for i in range(10):
         done = 0
         total = 0
         step = 0
-        reset = env.reset()
-        state.append(torch.Tensor(np.zeros(len(reset))))
-        state.append(torch.Tensor(np.zeros(len(reset))))
-        state.append(torch.Tensor(np.zeros(len(reset))))
-        state.append(torch.Tensor(reset))
+        state = env.reset()
+        lstm_state = model.net.initial_state(1)
         while not done:
-            _,action,_ = model(torch.flatten(torch.stack(list(state))))
-            next_state, reward, done, _ = env.step(action.item())
-            state.append(torch.Tensor(next_state))
+            _,action,_,lstm_state = model(torch.Tensor(state)[None], lstm_state)
+            state, reward, done, _ = env.step(action.item())
             total += reward    #   print("stepped",action.item(),done)
             step +=1
         totals.append(total)
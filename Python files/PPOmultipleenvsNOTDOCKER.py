@@ -21,6 +21,7 @@ from torch.distributions import Categorical
 import gym 
 from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
 import numpy as np
+from gym_simplifiedtetris.training import RolloutAgent, RolloutBuffer
 
 from pytorch_lightning.callbacks import Callback
 import multiprocessing
@@ -122,12 +123,7 @@ class PPOLightning(LightningModule):
 
         print("hparams:",self.hparams)
 
-        self.procs = int(multiprocessing.cpu_count()/2)
-        
-        self.states = [[] for _ in range(self.procs)]
-        for i,state in enumerate(self.envs.reset()):
-            self.states[i] = torch.Tensor(state)
-
+        self.procs = self.envs.num_envs
 
         print("Running",self.procs,"Environments")
         self.ep_step = 0
@@ -137,13 +133,8 @@ class PPOLightning(LightningModule):
         self.env = 0
         print("actions",n_actions)
         
-        self.batch_states = [[] for _ in range(self.procs)]
-        self.batch_actions = [[] for _ in range(self.procs)]
-        self.batch_probs = [[] for _ in range(self.procs)]
-        self.batch_advs = [[] for _ in range(self.procs)]
-        self.batch_vals = [[] for _ in range(self.procs)]
-        self.ep_rewards = [[] for _ in range(self.procs)]
-        self.ep_vals = [[] for _ in range(self.procs)]
+        steps = int(self.hparams.batch_size * round(self.hparams.epoch_steps/self.procs/self.hparams.batch_size))
+        self.buffer = RolloutBuffer(steps, self.procs, obs_size)
         self.epoch_rewards = []
         self.avg_reward = 0
         self.avg_ep_reward = 0
@@ -152,6 +143,7 @@ class PPOLightning(LightningModule):
         self.actor = ActorNet(obs_size,n_actions,self.hparams.depth)
         
         self.agent = ActorCritic(self.critic, self.actor)
+        self.rollout_agent = RolloutAgent(self.envs, self.buffer)
     
     def forward(self, x):
         
@@ -176,104 +168,21 @@ class PPOLightning(LightningModule):
         loss = (val - val_new).pow(2).mean()
         return loss
         
-    def compute_gae(self, rewards, values, next_val):
-        
-
-        rs = rewards
-        vals = values + [next_val]
-        
-        x = []
-        for i in range(len(rs)-1):
-            x.append(rs[i]+self.hparams.gamma*vals[i+1] - vals[i])
-    
-        a = self.compute_reward(x, self.hparams.gamma * self.hparams.lamb)
-
-        return a
-    
-    def compute_reward(self,rewards, gamma):
-        
-        rs = []
-        sum_rs = 0
-
-        for r in reversed(rewards):
-            sum_rs = (sum_rs * gamma) + r
-            rs.append(sum_rs)
+    def make_batch(self):
+        #the states of all the envs are stacked and run through one actor-critic forward per step
+        #env reset is not needed, the VecEnv automates it. episodes still running carry on into the next epoch
+        ep_rewards, _ = self.rollout_agent.collect_rollout(self.agent, self.hparams.gamma, self.hparams.lamb)
 
+        for ep_reward in ep_rewards:
+            print("REWARD :",ep_reward)
+        self.epoch_rewards += ep_rewards
 
-        return list(reversed(rs))
+        #logs
+        if self.epoch_rewards:
+            self.avg_ep_reward = sum(self.epoch_rewards)/len(self.epoch_rewards)
+        self.epoch_rewards.clear()
 
-    
-    def make_batch(self):
-
-        steps = int(self.hparams.batch_size * round(self.hparams.epoch_steps/self.procs/self.hparams.batch_size))
-        for j in range(steps):
-            #print("step",i)
-
-            _, actions, probs, vals = self.agent(torch.stack(self.states, dim=0))
-
-            for i,state in enumerate(self.states):               
-                self.batch_states[i].append(state)
-                self.batch_actions[i].append(actions[i])
-                self.batch_probs[i].append(probs[i])
-                self.ep_vals[i].append(vals[i].item())
-            
-            self.envs.step_async(actions.numpy().ravel())
-            next_states, rewards, dones, _ = self.envs.step_wait()
-            #print("STEPPED ",i,steps)
-                
-            for i, (next_state,reward) in enumerate(zip(next_states,rewards)):
-                self.ep_rewards[i].append(reward)
-                self.states[i] = torch.Tensor(next_state)
-
-            
-            end = j == (steps -1)
-
-            for i, done in enumerate(dones):
-                if done or end:
-                    
-                    if end and not done:
-                        #if epoch ends before terminal state, bootstrap value
-                        with torch.no_grad():
-                            #print("epoch ended early")
-                            _,_,_,val = self.agent(self.states[i])
-                            next_val = val.item()
-                    else:
-                        next_val = 0
-                    
-                    #compute batch discounted rewards
-                    self.ep_rewards[i].append(next_val)
-                    self.batch_vals[i] += self.compute_reward(self.ep_rewards[i],self.hparams.gamma)[:-1]
-                    self.batch_advs[i] += self.compute_gae(self.ep_rewards[i],self.ep_vals[i], next_val)
-                    
-                    self.epoch_rewards.append(sum(self.ep_rewards[i]))
-                    print("REWARD :",sum(self.ep_rewards[i]))
-
-                    self.ep_rewards[i].clear()
-                    self.ep_vals[i].clear()
-
-                    #env reset is not needed, SubProcVecEnv automates it. next_state is starting state
-                
-            if end:
-                for i in range(self.procs):
-                    data = zip(self.batch_states[i],
-                                self.batch_actions[i],
-                                self.batch_probs[i],
-                                self.batch_vals[i],
-                                self.batch_advs[i])
-
-                    for (s, a, p, v, ad) in data:
-                        yield s, a, p, v, ad
-                    
-                #logs
-                    
-                    self.batch_states[i].clear()
-                    self.batch_actions[i].clear()
-                    self.batch_probs[i].clear()
-                    self.batch_vals[i].clear()
-                    self.batch_advs[i].clear()
-
-                self.avg_ep_reward = sum(self.epoch_rewards)/len(self.epoch_rewards)
-                self.epoch_rewards.clear()
+        yield from self.buffer.get_minibatches(self.hparams.batch_size)
     
     def training_step(self, batch, batch_idx, optimizer_idx):
         
@@ -309,7 +218,8 @@ class PPOLightning(LightningModule):
     
     def __dataloader(self):
         dataset = RLDataSet(self.make_batch)
-        dataloader = DataLoader(dataset=dataset, batch_size=self.hparams.batch_size)
+        #the dataset yields ready-made minibatches, so the DataLoader does not collate them
+        dataloader = DataLoader(dataset=dataset, batch_size=None)
         return dataloader
     
     def train_dataloader(self):
@@ -331,17 +241,11 @@ from pathlib import Path
 import csv
 import os
 
-def pickFileName():
-
-    Path("log/trainingvalsPPO/").mkdir(parents=True, exist_ok=True)
-
-    files = os.listdir('log/trainingvalsPPO/')
-
-    return '{}.csv'.format(len(files)+1)
+from gym_simplifiedtetris.training import allocate_run
 
-def make_env():
+def make_env(seed):
     def thunk():
-        env = Tetris(grid_dims=(10, 10), piece_size=2)
+        env = Tetris(grid_dims=(10, 10), piece_size=2, seed=seed)
         return env
     return thunk
 
@@ -352,14 +256,16 @@ def train_model(alr, clr, batch_size, clip_eps, lamb, epoch_steps, depth):
     epoch_steps = int(epoch_steps)
     depth = int(depth)
 
-    f = open('log/trainingvalsPPO/{}'.format(pickFileName()), 'w+')
+    f = open(allocate_run('log/trainingvalsPPO/', '{}.csv')[1], 'w+')
     writer = csv.writer(f)
 
     procs = int(multiprocessing.cpu_count()/2)
     print("Total Core Count :",multiprocessing.cpu_count())
     
     
-    envs = [make_env() for _ in range(procs)]
+    #each env gets its own seed, so that the envs play different games
+    base_seed = np.random.randint(2**31 - procs)
+    envs = [make_env(base_seed + idx) for idx in range(procs)]
     envs = DummyVecEnv(envs)
 
     model = PPOLightning(
@@ -1,11 +1,12 @@
 import gym 
 from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
-from stable_baselines3.common.vec_env.subproc_vec_env import SubprocVecEnv
+from gym_simplifiedtetris.training import SharedMemoryVecEnv
 import multiprocessing
+import numpy as np
 
-def make_env():
+def make_env(seed):
     def thunk():
-        env = Tetris(grid_dims=(10, 10), piece_size=2)
+        env = Tetris(grid_dims=(10, 10), piece_size=2, seed=seed)
         return env
     return thunk
 
@@ -14,8 +15,10 @@ if __name__ == '__main__':
     print("Total Core Count :",multiprocessing.cpu_count())
     
     
-    envs = [make_env() for _ in range(procs)]
-    envs = SubprocVecEnv(envs)
+    #each env gets its own seed, so that the envs play different games
+    base_seed = np.random.randint(2**31 - procs)
+    envs = [make_env(base_seed + idx) for idx in range(procs)]
+    envs = SharedMemoryVecEnv(envs)
     states = envs.reset()
     print(states.shape)
     exit()
\ No newline at end of file
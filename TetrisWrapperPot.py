@@ -1,15 +1,9 @@
 import gym
 from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
-import csv
+from gym_simplifiedtetris.training import MetricsSink, allocate_run
 import os
 import numpy as np
 
-def pickFileName():
-
-    files = os.listdir('log/')
-
-    return len(files)+1
-
 class TetrisWrapper(Tetris):
 
     def __init__(self, **kwargs):
@@ -19,8 +13,8 @@ class TetrisWrapper(Tetris):
         self.maxh = -1
         self.score_types = [0]*4
 
-        self.f = open('log/score_count{}.txt'.format(pickFileName()), 'w+')
-        self.writer = csv.writer(self.f)
+        #the line counts are written in batches from a background thread
+        self.metrics = MetricsSink(allocate_run('log/', 'score_count{}.csv')[1], ['lines_1', 'lines_2', 'lines_3', 'lines_4'])
 
     def reset(self):
         state = Tetris.reset(self)
@@ -62,8 +56,12 @@ class TetrisWrapper(Tetris):
             self.minh = curr
 
     def epoch_lines(self):
-         self.writer.writerow(self.score_types)
+         self.metrics.log(**{'lines_{}'.format(i + 1): count for i, count in enumerate(self.score_types)})
          self.score_types = [0]*4
-         self.f.flush()
+
+    def close(self):
+         #write the line counts not yet written before closing
+         self.metrics.close()
+         Tetris.close(self)
 
 
@@ -1,14 +1,8 @@
 import gym
 from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
-import csv
+from gym_simplifiedtetris.training import MetricsSink, allocate_run
 import os
 
-def pickFileName():
-
-    files = os.listdir('log/')
-
-    return len(files)+1
-
 class TetrisWrapper(Tetris):
 
     def __init__(self, **kwargs):
@@ -16,8 +10,8 @@ class TetrisWrapper(Tetris):
         self.n = 1
         self.score_types = [0]*4
 
-        f = open('log/score_count{}.txt'.format(pickFileName()), 'w+')
-        self.writer = csv.writer(f)
+        #the line counts are written in batches from a background thread
+        self.metrics = MetricsSink(allocate_run('log/', 'score_count{}.csv')[1], ['lines_1', 'lines_2', 'lines_3', 'lines_4'])
 
     def reset(self):
         state = Tetris.reset(self)
@@ -47,7 +41,12 @@ class TetrisWrapper(Tetris):
         return obs, shaped_reward, done, info
 
     def epoch_lines(self):
-         self.writer.writerow(self.score_types)
+         self.metrics.log(**{'lines_{}'.format(i + 1): count for i, count in enumerate(self.score_types)})
          self.score_types = [0]*4
 
+    def close(self):
+         #write the line counts not yet written before closing
+         self.metrics.close()
+         Tetris.close(self)
+
 
@@ -1,7 +1,8 @@
 """Initialise the agents module."""
 
+from gym_simplifiedtetris.agents.beam_search import BeamSearchAgent
 from gym_simplifiedtetris.agents.heuristic import HeuristicAgent
 from gym_simplifiedtetris.agents.q_learning import QLearningAgent
 from gym_simplifiedtetris.agents.uniform import UniformAgent
 
-__all__ = ["HeuristicAgent", "QLearningAgent", "UniformAgent"]
+__all__ = ["BeamSearchAgent", "HeuristicAgent", "QLearningAgent", "UniformAgent"]
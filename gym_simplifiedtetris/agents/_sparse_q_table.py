@@ -0,0 +1,195 @@
+"""
+A sparse Q-table class.
+"""
+
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+
+class _SparseQTable(object):
+    """
+    A Q-table that only stores the Q-values of the states that have been
+    updated. Each obs is packed into a key made of the grid's bits, packed
+    eight to a byte, followed by the piece ids. The keys map to rows of an
+    array of Q-values, which grows as more states are visited. Unvisited
+    states have Q-values of zero.
+
+    :param num_cells: the number of grid cells at the start of each obs.
+    :param num_actions: the number of actions available in each state.
+    :param max_states: the maximum number of states stored; once full, the least recently used state is evicted. No limit if None.
+    :param initial_capacity: the number of rows allocated initially.
+    """
+
+    def __init__(
+        self,
+        *,
+        num_cells: int,
+        num_actions: int,
+        max_states: Optional[int] = None,
+        initial_capacity: Optional[int] = 1024,
+    ) -> None:
+        assert max_states is None or max_states >= 1, "max_states should be positive."
+
+        self._num_cells = num_cells
+        self._num_actions = num_actions
+        self._max_states = max_states
+
+        self._rows = OrderedDict()
+        self._q_values = np.zeros((initial_capacity, num_actions), dtype="double")
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, obs: np.array) -> bool:
+        return self._encode(obs) in self._rows
+
+    def get(self, obs: np.array, /) -> np.array:
+        """
+        Return the Q-values of the state, without storing it if unvisited.
+
+        :param obs: the observation.
+        :return: the Q-values of every action.
+        """
+        key = self._encode(obs)
+        row = self._rows.get(key)
+
+        if row is None:
+
+            return np.zeros((self._num_actions), dtype="double")
+
+        self._rows.move_to_end(key)
+
+        return self._q_values[row]
+
+    def update(self, obs: np.array, action: int, delta: float, /) -> None:
+        """
+        Add delta to the Q-value of the state-action pair, storing the state
+        if unvisited.
+
+        :param obs: the observation.
+        :param action: the action.
+        :param delta: the amount to add to the Q-value.
+        """
+        row = self._get_row(self._encode(obs))
+        self._q_values[row, action] += delta
+
+    def get_batch(self, obs: np.ndarray, /) -> np.ndarray:
+        """
+        Return the Q-values of a batch of states, without storing those that
+        are unvisited, and mark the stored states as the most recently used.
+
+        :param obs: the observations, with shape (batch_size, obs_size).
+        :return: the Q-values, with shape (batch_size, num_actions).
+        """
+        keys = self._encode_batch(obs)
+        rows = np.array([self._rows.get(key, -1) for key in keys], dtype="int")
+
+        for key, row in zip(keys, rows):
+            if row != -1:
+                self._rows.move_to_end(key)
+
+        q_values = self._q_values[rows]
+        q_values[rows == -1] = 0
+
+        return q_values
+
+    def update_batch(
+        self, obs: np.ndarray, actions: np.array, deltas: np.array, /
+    ) -> None:
+        """
+        Add the deltas to the Q-values of a batch of state-action pairs,
+        storing the unvisited states. Deltas for the same pair are summed.
+        The states are used in the order of their last occurrence in the
+        batch; if there are more than max_states of them, the deltas of the
+        least recently used are dropped, as they would be evicted by the
+        others if updated one at a time.
+
+        :param obs: the observations, with shape (batch_size, obs_size).
+        :param actions: the actions.
+        :param deltas: the amounts to add to the Q-values.
+        """
+        keys = self._encode_batch(obs)
+        last_idxs = {key: idx for idx, key in enumerate(keys)}
+        unique_keys = sorted(last_idxs, key=last_idxs.get)
+
+        if self._max_states is not None:
+            unique_keys = unique_keys[-self._max_states :]
+
+        # Mark the stored states of the batch as used before allocating rows
+        # for the rest, so that only states outside the batch are evicted.
+        for key in unique_keys:
+            if key in self._rows:
+                self._rows.move_to_end(key)
+
+        rows = {key: self._get_row(key) for key in unique_keys}
+        kept = np.array([key in rows for key in keys], dtype="bool")
+        np.add.at(
+            self._q_values,
+            ([rows[key] for key in keys if key in rows], np.asarray(actions)[kept]),
+            np.asarray(deltas)[kept],
+        )
+
+    def _encode(self, obs: np.array, /) -> bytes:
+        """
+        Pack the obs into a key.
+
+        :param obs: the observation.
+        :return: the key.
+        """
+        grid_bytes = np.packbits(obs[: self._num_cells].astype("bool")).tobytes()
+
+        return grid_bytes + obs[self._num_cells :].astype("uint8").tobytes()
+
+    def _encode_batch(self, obs: np.ndarray, /) -> List[bytes]:
+        """
+        Pack a batch of obs into keys.
+
+        :param obs: the observations, with shape (batch_size, obs_size).
+        :return: the keys.
+        """
+        packed_obs = np.concatenate(
+            [
+                np.packbits(obs[:, : self._num_cells].astype("bool"), axis=1),
+                obs[:, self._num_cells :].astype("uint8"),
+            ],
+            axis=1,
+        )
+        key_size = packed_obs.shape[1]
+        packed_bytes = packed_obs.tobytes()
+
+        return [
+            packed_bytes[start : start + key_size]
+            for start in range(0, len(packed_bytes), key_size)
+        ]
+
+    def _get_row(self, key: bytes, /) -> int:
+        """
+        Return the row holding the Q-values of the key, allocating a new row
+        if the key is not stored, and mark the key as the most recently used.
+
+        :param key: the packed obs.
+        :return: the row's index.
+        """
+        row = self._rows.get(key)
+
+        if row is not None:
+            self._rows.move_to_end(key)
+
+            return row
+
+        if self._max_states is not None and len(self._rows) == self._max_states:
+            _, row = self._rows.popitem(last=False)
+            self._q_values[row] = 0
+        else:
+            row = len(self._rows)
+
+            if row == len(self._q_values):
+                self._q_values = np.concatenate(
+                    [self._q_values, np.zeros_like(self._q_values)]
+                )
+
+        self._rows[key] = row
+
+        return row
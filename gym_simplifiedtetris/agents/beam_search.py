@@ -0,0 +1,200 @@
+"""
+A beam search agent class.
+"""
+
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+class BeamSearchAgent(object):
+    """
+    An agent that looks several pieces ahead, rating each placement with the
+    Dellacherie heuristic, and selects the first action of the best sequence of
+    placements found. Only the beam_width best sequences are extended at each
+    ply. When the piece at a ply is not known, the sequences are rated by
+    averaging the best rating over every piece, and the search stops there.
+    The search can be restricted to the canonical actions, skipping actions
+    that produce the same placement as another.
+
+    :param depth: the number of plies to search, including the current piece.
+    :param beam_width: the number of sequences extended at each ply.
+    :param node_budget: the maximum number of placements rated per move.
+    :param time_budget: the maximum number of seconds spent searching per move.
+    :param canonical_actions: whether to only search the canonical actions.
+    """
+
+    def __init__(
+        self,
+        *,
+        depth: Optional[int] = 2,
+        beam_width: Optional[int] = 8,
+        node_budget: Optional[int] = None,
+        time_budget: Optional[float] = None,
+        canonical_actions: Optional[bool] = False,
+    ) -> None:
+        assert depth >= 1, "depth should be at least 1."
+        assert beam_width >= 1, "beam_width should be at least 1."
+
+        self.depth = depth
+        self.beam_width = beam_width
+        self.node_budget = node_budget
+        self.time_budget = time_budget
+        self.canonical_actions = canonical_actions
+
+    def predict(self, engine, next_piece_ids: Optional[Sequence[int]] = None, /) -> int:
+        """
+        Return the first action of the best sequence of placements found.
+        Separate ties using the same priority rating as the heuristic agent.
+
+        :param engine: the engine of the env that the agent is playing.
+        :param next_piece_ids: the ids of the pieces that follow the current piece; defaults to the engine's preview queue.
+        :return: the action chosen by the agent.
+        """
+        start_time = time.perf_counter()
+
+        if next_piece_ids is None:
+            next_piece_ids = engine._next_piece_ids
+
+        piece_ids = [engine._piece._idx] + list(next_piece_ids)
+
+        afterstates, ratings = self._rate(engine, engine._grid[None], piece_ids[0])
+        values = ratings[0]
+        num_actions = values.size
+        num_rated = num_actions
+        num_piece_actions = {
+            idx: engine._get_action_table(idx, self.canonical_actions)[
+                "x_coords"
+            ].shape[0]
+            for idx in range(engine._num_pieces)
+        }
+
+        beam = self._select_beam(values)
+        grids = afterstates[0][beam]
+        scores = values[beam]
+        roots = beam
+
+        for ply in range(1, self.depth):
+            if self.time_budget is not None and (
+                time.perf_counter() - start_time >= self.time_budget
+            ):
+                break
+
+            is_known = ply < len(piece_ids)
+            candidate_ids = (
+                [piece_ids[ply]] if is_known else list(range(engine._num_pieces))
+            )
+
+            num_children = sum(num_piece_actions[idx] for idx in candidate_ids)
+
+            # Shrink the beam so that the node budget is not exceeded.
+            if self.node_budget is not None:
+                max_nodes = (self.node_budget - num_rated) // num_children
+                keep = np.argsort(-scores, kind="stable")[: max(max_nodes, 0)]
+                grids, scores, roots = grids[keep], scores[keep], roots[keep]
+
+            if not roots.size:
+                break
+
+            num_rated += roots.size * num_children
+
+            if is_known:
+                afterstates, ratings = self._rate(engine, grids, candidate_ids[0])
+                child_scores = scores[:, None] + ratings
+                ply_values = self._get_root_values(
+                    num_actions, np.repeat(roots, num_children), child_scores.flatten()
+                )
+
+                beam = self._select_beam(child_scores.flatten())
+                grids = afterstates.reshape(-1, *engine._grid.shape)[beam]
+                scores = child_scores.flatten()[beam]
+                roots = roots[beam // num_children]
+            else:
+                best_ratings = np.stack(
+                    [
+                        self._rate(engine, grids, piece_id)[1].max(axis=1)
+                        for piece_id in candidate_ids
+                    ]
+                )
+                ply_values = self._get_root_values(
+                    num_actions, roots, scores + best_ratings.mean(axis=0)
+                )
+
+            # Keep the shallower values if every sequence ends the game.
+            if np.any(np.isfinite(ply_values)):
+                values = ply_values
+
+            if not is_known:
+                break
+
+        if not np.any(np.isfinite(values)):
+            # Every placement ends the game.
+            values = np.zeros((num_actions), dtype="double")
+
+        max_indices = np.argwhere(values == np.amax(values)).flatten()
+
+        if self.canonical_actions:
+            # Map the canonical actions back to every env action producing
+            # the same placements, so that ties are separated as without.
+            canonical_indices = engine._get_action_table(piece_ids[0])[
+                "canonical_indices"
+            ]
+            max_indices = np.flatnonzero(np.isin(canonical_indices, max_indices))
+
+        if len(max_indices) == 1:
+
+            return max_indices[0]
+
+        return np.argmax(engine._get_priorities(max_indices))
+
+    def _rate(self, engine, grids: np.ndarray, piece_id: int, /):
+        """
+        Drop the piece provided onto each of the grids using every action and
+        rate the placements. Placements that end the game are rated -inf.
+
+        :param engine: the engine used to simulate the placements.
+        :param grids: the grids, with shape (num_grids, width, height).
+        :param piece_id: the id of the piece to drop.
+        :return: the afterstates and the ratings, with shape (num_grids, num_actions).
+        """
+        afterstates, feature_values, is_terminal = engine._get_afterstates(
+            grids, piece_id, self.canonical_actions
+        )
+        ratings = feature_values @ engine.DELLACHERIE_WEIGHTS
+        ratings[is_terminal] = -np.inf
+
+        return afterstates, ratings
+
+    def _select_beam(self, scores: np.array, /) -> np.array:
+        """
+        Return the indices of the best beam_width scores, ignoring placements
+        that end the game.
+
+        :param scores: the scores of the sequences.
+        :return: the indices of the sequences to extend.
+        """
+        indices = np.flatnonzero(np.isfinite(scores))
+
+        if indices.size > self.beam_width:
+            best = np.argpartition(-scores[indices], self.beam_width - 1)
+            indices = indices[best[: self.beam_width]]
+
+        return indices
+
+    @staticmethod
+    def _get_root_values(
+        num_actions: int, roots: np.array, scores: np.array, /
+    ) -> np.array:
+        """
+        Return the best score reached from each of the first actions.
+
+        :param num_actions: the number of actions available.
+        :param roots: the first action of each sequence.
+        :param scores: the score of each sequence.
+        :return: the best score for each action; -inf if none of its sequences were extended.
+        """
+        values = np.full((num_actions), -np.inf, dtype="double")
+        np.maximum.at(values, roots, scores)
+
+        return values
@@ -6,6 +6,8 @@ from typing import Optional, Sequence
 
 import numpy as np
 
+from gym_simplifiedtetris.agents._sparse_q_table import _SparseQTable
+
 
 class QLearningAgent(object):
     """
@@ -17,6 +19,8 @@ class QLearningAgent(object):
     :param alpha: the learning rate parameter.
     :param gamma: the discount rate parameter.
     :param epsilon: the exploration rate of the epsilon-greedy policy.
+    :param sparse: whether to only store the Q-values of visited states, which is needed for all but the smallest grids.
+    :param max_states: the maximum number of states stored by a sparse Q-table; no limit if None.
     """
 
     def __init__(
@@ -28,16 +32,26 @@ class QLearningAgent(object):
         alpha: Optional[float] = 0.2,
         gamma: Optional[float] = 0.99,
         epsilon: Optional[float] = 1.0,
+        sparse: Optional[bool] = False,
+        max_states: Optional[int] = None,
     ):
 
         self.epsilon = epsilon
         self.alpha = alpha
         self.gamma = gamma
 
-        q_table_dims = [2 for _ in range(grid_dims[0] * grid_dims[1])]
-        q_table_dims += [num_pieces] + [num_actions]
-        self._q_table = np.zeros((q_table_dims), dtype="double")
+        if sparse:
+            self._q_table = _SparseQTable(
+                num_cells=grid_dims[0] * grid_dims[1],
+                num_actions=num_actions,
+                max_states=max_states,
+            )
+        else:
+            q_table_dims = [2 for _ in range(grid_dims[0] * grid_dims[1])]
+            q_table_dims += [num_pieces] + [num_actions]
+            self._q_table = np.zeros((q_table_dims), dtype="double")
 
+        self._sparse = sparse
         self._num_actions = num_actions
 
     def predict(self, obs: np.array, /) -> int:
@@ -52,7 +66,21 @@ class QLearningAgent(object):
             return np.random.choice(self._num_actions)
 
         # Choose greedily from the set of all actions.
-        return np.argmax(self._q_table[tuple(obs)])
+        return np.argmax(self._get_q_values(obs))
+
+    def predict_batch(self, obs: np.ndarray, /) -> np.array:
+        """
+        Return an action for each of a batch of observations whilst following
+        an epsilon-greedy policy.
+
+        :param obs: the observations, with shape (batch_size, obs_size).
+        :return: the actions chosen by the Q-learning agent.
+        """
+        actions = np.argmax(self._get_batch_q_values(obs), axis=1)
+        explore = np.random.rand(len(obs)) <= self.epsilon
+        actions[explore] = np.random.choice(self._num_actions, size=explore.sum())
+
+        return actions
 
     def learn(
         self, reward: float, obs: np.array, next_obs: np.array, action: int
@@ -65,10 +93,69 @@ class QLearningAgent(object):
         :param next_obs: the next observation given to the agent by the env having taken action.
         :param action: the action taken that generated next_obs.
         """
-        current_obs_action = tuple(list(obs) + [action])
-        max_q_value = np.max(self._q_table[tuple(next_obs)])
+        max_q_value = np.max(self._get_q_values(next_obs))
+        td_error = reward + self.gamma * max_q_value - self._get_q_values(obs)[action]
 
         # Update the Q-table using the stored Q-value.
-        self._q_table[current_obs_action] += self.alpha * (
-            reward + self.gamma * max_q_value - self._q_table[current_obs_action]
-        )
+        if self._sparse:
+            self._q_table.update(obs, action, self.alpha * td_error)
+        else:
+            self._q_table[tuple(obs) + (action,)] += self.alpha * td_error
+
+    def learn_batch(
+        self,
+        rewards: np.array,
+        obs: np.ndarray,
+        next_obs: np.ndarray,
+        actions: np.array,
+        dones: np.array,
+    ) -> None:
+        """
+        Update the Q-learning agent's Q-table using a batch of transitions,
+        such as those from a vectorised env. The updates are computed from
+        the Q-values before any of them are applied, and are then scattered
+        into the Q-table at once. Terminal transitions are not bootstrapped.
+
+        :param rewards: the rewards given to the agent by the envs after taking actions.
+        :param obs: the old observations, with shape (batch_size, obs_size).
+        :param next_obs: the next observations, with shape (batch_size, obs_size).
+        :param actions: the actions taken that generated next_obs.
+        :param dones: whether each transition ended the game.
+        """
+        actions = np.asarray(actions, dtype="int")
+        max_q_values = np.max(self._get_batch_q_values(next_obs), axis=1)
+        q_values = self._get_batch_q_values(obs)[np.arange(len(actions)), actions]
+        td_errors = (
+            rewards + self.gamma * max_q_values * ~np.asarray(dones, dtype="bool")
+        ) - q_values
+
+        if self._sparse:
+            self._q_table.update_batch(obs, actions, self.alpha * td_errors)
+        else:
+            np.add.at(self._q_table, tuple(obs.T) + (actions,), self.alpha * td_errors)
+
+    def _get_q_values(self, obs: np.array, /) -> np.array:
+        """
+        Return the Q-values of every action in the state.
+
+        :param obs: a NumPy array containing the observation.
+        :return: the Q-values.
+        """
+        if self._sparse:
+
+            return self._q_table.get(obs)
+
+        return self._q_table[tuple(obs)]
+
+    def _get_batch_q_values(self, obs: np.ndarray, /) -> np.ndarray:
+        """
+        Return the Q-values of every action in each of a batch of states.
+
+        :param obs: the observations, with shape (batch_size, obs_size).
+        :return: the Q-values, with shape (batch_size, num_actions).
+        """
+        if self._sparse:
+
+            return self._q_table.get_batch(obs)
+
+        return self._q_table[tuple(obs.T)]
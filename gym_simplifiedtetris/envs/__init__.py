@@ -14,6 +14,10 @@ from gym_simplifiedtetris.envs.reward_shaping import (
     SimplifiedTetrisBinaryShapedEnv,
     SimplifiedTetrisPartBinaryShapedEnv,
 )
+from gym_simplifiedtetris.envs.preview import (
+    SimplifiedTetrisBinaryPreviewEnv,
+    SimplifiedTetrisPartBinaryPreviewEnv,
+)
 
 
 # Affect 'from envs import *'.
@@ -23,4 +27,6 @@ __all__ = [
     "SimplifiedTetrisBinaryShapedEnv",
     "SimplifiedTetrisPartBinaryEnv",
     "SimplifiedTetrisPartBinaryShapedEnv",
+    "SimplifiedTetrisBinaryPreviewEnv",
+    "SimplifiedTetrisPartBinaryPreviewEnv",
 ]
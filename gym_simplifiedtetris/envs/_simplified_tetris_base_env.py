@@ -16,7 +16,9 @@ class _SimplifiedTetrisBaseEnv(gym.Env):
 
     :param grid_dims: the grid dimensions.
     :param piece_size: the size of every piece.
-    :param seed: the rng seed.
+    :param seed: the rng seed; the env is seeded randomly if None.
+    :param num_preview: the number of upcoming piece ids kept by the engine.
+    :param mask_actions: whether to add the action mask of the next state to the info returned by step.
     """
 
     metadata = {"render.modes": ["human", "rgb_array"]}
@@ -33,7 +35,13 @@ class _SimplifiedTetrisBaseEnv(gym.Env):
         raise NotImplementedError()
 
     def __init__(
-        self, *, grid_dims: Sequence[int], piece_size: int, seed: Optional[int] = 8191
+        self,
+        *,
+        grid_dims: Sequence[int],
+        piece_size: int,
+        seed: Optional[int] = None,
+        num_preview: Optional[int] = 0,
+        mask_actions: Optional[bool] = False,
     ) -> None:
 
         if not isinstance(grid_dims, (list, tuple, np.array)) or len(grid_dims) != 2:
@@ -55,8 +63,12 @@ class _SimplifiedTetrisBaseEnv(gym.Env):
             [7, 4],
         ], f"Grid dimensions must be one of (20, 10), (10, 10), (8, 6), or (7, 4)."
 
+        assert num_preview >= 0, "num_preview should be non-negative."
+
         self._height_, self._width_ = grid_dims
         self._piece_size_ = piece_size
+        self._num_preview_ = num_preview
+        self._mask_actions_ = mask_actions
 
         self._num_actions_, self._num_pieces_ = {
             1: (grid_dims[1], 1),
@@ -72,6 +84,8 @@ class _SimplifiedTetrisBaseEnv(gym.Env):
             piece_size=piece_size,
             num_pieces=self._num_pieces_,
             num_actions=self._num_actions_,
+            num_preview=num_preview,
+            np_random=self._np_random,
         )
 
     def __str__(self) -> str:
@@ -130,8 +144,22 @@ class _SimplifiedTetrisBaseEnv(gym.Env):
 
         info["num_rows_cleared"] = num_rows_cleared
 
+        if self._mask_actions_:
+            info["action_mask"] = self.action_masks()
+
         return self._get_obs(), reward, False, info
 
+    def action_masks(self) -> np.array:
+        """
+        Return which actions are worth taking in the current state. Actions
+        that duplicate the placement of a lower action, or that end the game,
+        are masked out, unless every placement ends the game. Policies can
+        restrict their choice to the actions that are True.
+
+        :return: a boolean mask over the actions.
+        """
+        return self._engine._get_action_mask()
+
     def render(self, mode: Optional[str] = "human", /) -> np.ndarray:
         """
         Render the env.
@@ -145,14 +173,17 @@ class _SimplifiedTetrisBaseEnv(gym.Env):
         """Close the open windows."""
         return self._engine._close()
 
-    def _seed(self, seed: Optional[int] = 8191, /) -> None:
+    def _seed(self, seed: Optional[int] = None, /) -> None:
         """
         Seed the env.
 
-        :param seed: an optional seed to seed the rng with.
+        :param seed: an optional seed to seed the rng with; a random seed is used if None.
         """
         self._np_random, _ = seeding.np_random(seed)
 
+        if hasattr(self, "_engine"):
+            self._engine._seed_piece_generator(self._np_random)
+
     def _get_reward(self) -> Tuple[float, int]:
         """
         Return the reward.
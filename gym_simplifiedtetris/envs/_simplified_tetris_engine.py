@@ -1,5 +1,5 @@
-import random
 import time
+from collections import deque
 from copy import deepcopy
 from typing import Dict, List, Optional, Sequence, Tuple
 
@@ -30,6 +30,7 @@ class _SimplifiedTetrisEngine(object):
     Game dynamics related methods:
     > _rotate_piece
     > _get_translation_rotation
+    > _seed_piece_generator
     > _generate_id_randomly
     > _initialise_pieces
     > _reset
@@ -53,13 +54,30 @@ class _SimplifiedTetrisEngine(object):
     > _get_holes
     > _get_cumulative_wells
 
+    Search agent related methods:
+    > _compute_action_table
+    > _get_canonical_action_table
+    > _get_action_table
+    > _get_landing_rows
+    > _get_afterstates
+    > _get_action_mask
+    > _get_batch_dellacherie_features
+
     :param grid_dims: the grid dimensions (height and width).
     :param piece_size: the size of the pieces in use.
     :param num_pieces: the number of pieces in use.
     :param num_actions: the number of available actions in each state.
+    :param num_preview: the number of upcoming piece ids kept in the preview queue.
+    :param np_random: the rng used to generate the piece ids.
     """
 
     CELL_SIZE = 50
+    PIECE_ID_CHUNK_SIZE = 256
+
+    # Whether the engine's game dynamics run in a compiled kernel that
+    # releases the GIL, so that several engines can be stepped in parallel
+    # from threads. The pure Python engine holds the GIL throughout.
+    RELEASES_GIL = False
 
     BLOCK_COLOURS = {
         0: _Colours.WHITE.value,
@@ -72,6 +90,8 @@ class _SimplifiedTetrisEngine(object):
         7: _Colours.RED.value,
     }
 
+    DELLACHERIE_WEIGHTS = np.array([-1, 1, -1, -1, -4, -1], dtype="double")
+
     @staticmethod
     def _close() -> None:
         """Close the open windows."""
@@ -110,12 +130,22 @@ class _SimplifiedTetrisEngine(object):
         piece_size: int,
         num_pieces: int,
         num_actions: int,
+        num_preview: Optional[int] = 0,
+        np_random: Optional[np.random.RandomState] = None,
     ) -> None:
 
         self._height, self._width = grid_dims
         self._piece_size = piece_size
         self._num_pieces = num_pieces
         self._num_actions = num_actions
+        self._num_preview = num_preview
+
+        self._np_random = (
+            np_random if np_random is not None else np.random.default_rng()
+        )
+        self._piece_id_chunk = np.array([], dtype="int")
+        self._piece_id_chunk_idx = 0
+        self._next_piece_ids = deque()
 
         self._grid = np.zeros((grid_dims[1], grid_dims[0]), dtype="bool")
         self._colour_grid = np.zeros((grid_dims[1], grid_dims[0]), dtype="int")
@@ -134,13 +164,33 @@ class _SimplifiedTetrisEngine(object):
         self._get_all_available_actions()
         self._reset()
 
+    def _seed_piece_generator(self, np_random: np.random.RandomState, /) -> None:
+        """
+        Replace the rng used to generate the piece ids, discarding any ids
+        already drawn from the old rng.
+
+        :param np_random: the new rng.
+        """
+        self._np_random = np_random
+        self._piece_id_chunk = np.array([], dtype="int")
+        self._piece_id_chunk_idx = 0
+
     def _generate_id_randomly(self) -> int:
         """
-        Randomly generate an id.
+        Randomly generate an id. The ids are drawn from the rng in chunks.
 
         :return: a randomly generated ID.
         """
-        return random.randint(0, self._num_pieces - 1)
+        if self._piece_id_chunk_idx == len(self._piece_id_chunk):
+            self._piece_id_chunk = self._np_random.choice(
+                self._num_pieces, size=self.PIECE_ID_CHUNK_SIZE
+            )
+            self._piece_id_chunk_idx = 0
+
+        idx = self._piece_id_chunk[self._piece_id_chunk_idx]
+        self._piece_id_chunk_idx += 1
+
+        return int(idx)
 
     def _initialise_pieces(self) -> None:
         """Create a dictionary containing the pieces."""
@@ -149,10 +199,11 @@ class _SimplifiedTetrisEngine(object):
             self._pieces[idx] = _Piece(self._piece_size, idx)
 
     def _reset(self) -> None:
-        """Reset the score, grid, piece coords, piece id and anchor."""
+        """Reset the score, grid, piece coords, piece id, preview queue and anchor."""
         self._score = 0
         self._grid = np.zeros_like(self._grid, dtype="bool")
         self._colour_grid = np.zeros_like(self._colour_grid, dtype="int")
+        self._next_piece_ids.clear()
         self._update_coords_and_anchor()
 
     def _render(self, mode: Optional[str] = "human", /) -> np.ndarray:
@@ -301,8 +352,14 @@ class _SimplifiedTetrisEngine(object):
         self._img = np.concatenate((img_array, self._img), axis=1)
 
     def _update_coords_and_anchor(self) -> None:
-        """Update the current piece, and reset the anchor."""
-        self._piece = self._pieces[self._generate_id_randomly()]
+        """
+        Take the current piece from the front of the preview queue, top up the
+        queue, and reset the anchor.
+        """
+        while len(self._next_piece_ids) <= self._num_preview:
+            self._next_piece_ids.append(self._generate_id_randomly())
+
+        self._piece = self._pieces[self._next_piece_ids.popleft()]
         self._anchor = [self._width / 2 - 1, self._piece_size - 1]
 
     def _is_illegal(self) -> bool:
@@ -431,6 +488,13 @@ class _SimplifiedTetrisEngine(object):
             self._piece = piece
             self._all_available_actions[idx] = self._compute_available_actions()
 
+        self._action_tables = {
+            idx: self._compute_action_table(idx) for idx in self._pieces.keys()
+        }
+        self._canonical_action_tables = {
+            idx: self._get_canonical_action_table(idx) for idx in self._pieces.keys()
+        }
+
     def _compute_available_actions(self) -> Dict[int, Tuple[int, int]]:
         """
         Compute the actions available with the current piece.
@@ -472,7 +536,7 @@ class _SimplifiedTetrisEngine(object):
 
         :return: a list of the Dellacherie feature values.
         """
-        weights = np.array([-1, 1, -1, -1, -4, -1], dtype="double")
+        weights = self.DELLACHERIE_WEIGHTS
         ratings = np.empty((self._num_actions), dtype="double")
 
         for action, (translation, rotation) in self._all_available_actions[
@@ -666,3 +730,241 @@ class _SimplifiedTetrisEngine(object):
         :return: the translation and rotation associated with the action provided.
         """
         return self._all_available_actions[self._piece._idx][action]
+
+    def _compute_action_table(self, idx: int, /) -> Dict[str, np.ndarray]:
+        """
+        Compute the block coordinates for every action available with the
+        piece provided, so that all placements can be simulated at once
+        without moving the current piece.
+
+        :param idx: the piece's id.
+        :return: the blocks' x coords, the blocks' y offsets from the anchor, the landing height offsets, whether each action is the first to produce its placement and the canonical action producing the same placement, indexed by action.
+        """
+        piece = self._pieces[idx]
+        actions = self._all_available_actions[idx]
+
+        x_coords = np.empty((len(actions), self._piece_size), dtype="int")
+        y_offsets = np.empty((len(actions), self._piece_size), dtype="int")
+        landing_offsets = np.empty((len(actions)), dtype="double")
+        is_distinct = np.zeros((len(actions)), dtype="bool")
+        canonical_indices = np.empty((len(actions)), dtype="int")
+        placements = {}
+
+        for action, (translation, rotation) in actions.items():
+            coords = np.array(piece._all_coords[rotation], dtype="int")
+            x_coords[action] = coords[:, 0] + translation
+            y_offsets[action] = coords[:, 1]
+            landing_offsets[action] = 0.5 * (
+                piece._min_y_coord[rotation] + piece._max_y_coord[rotation]
+            )
+
+            # Rotations of symmetric pieces can cover the same cells, up to a
+            # vertical shift, and so drop to the same placement.
+            placement = frozenset(
+                zip(x_coords[action], y_offsets[action] - y_offsets[action].min())
+            )
+            is_distinct[action] = placement not in placements
+            canonical_indices[action] = placements.setdefault(
+                placement, len(placements)
+            )
+
+        return {
+            "x_coords": x_coords,
+            "y_offsets": y_offsets,
+            "landing_offsets": landing_offsets,
+            "is_distinct": is_distinct,
+            "canonical_indices": canonical_indices,
+        }
+
+    def _get_canonical_action_table(self, idx: int, /) -> Dict[str, np.ndarray]:
+        """
+        Restrict the action table of the piece provided to its canonical
+        actions, the first action to produce each distinct placement. The
+        canonical actions are indexed from zero, and mapped back to the raw
+        actions by raw_actions.
+
+        :param idx: the piece's id.
+        :return: the action table's entries for the canonical actions, and the raw action of each canonical action.
+        """
+        table = self._action_tables[idx]
+        raw_actions = np.flatnonzero(table["is_distinct"])
+
+        canonical_table = {key: values[raw_actions] for key, values in table.items()}
+        canonical_table["raw_actions"] = raw_actions
+
+        return canonical_table
+
+    def _get_landing_rows(
+        self,
+        grids: np.ndarray,
+        piece_idx: int,
+        canonical: Optional[bool] = False,
+        /,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find where the piece provided lands on each of the grids provided,
+        using every available action. The pieces are dropped from the same
+        anchor as in the env's step method.
+
+        :param grids: the grids, with shape (num_grids, width, height).
+        :param piece_idx: the id of the piece to drop.
+        :param canonical: whether to only use the canonical actions.
+        :return: the landing anchors' y coords, with shape (num_grids, num_actions), and the blocks' rows, with shape (num_grids, num_actions, piece_size).
+        """
+        table = self._get_action_table(piece_idx, canonical)
+        x_coords, y_offsets = table["x_coords"], table["y_offsets"]
+        num_grids = grids.shape[0]
+        rows = np.arange(self._height + 1)
+
+        # Find the first full cell at or below each cell, treating the floor
+        # as a full row.
+        floored_grids = np.ones(
+            (num_grids, self._width, self._height + 1), dtype="bool"
+        )
+        floored_grids[:, :, :-1] = grids
+        first_full_rows = np.where(floored_grids, rows, self._height)
+        first_full_rows = np.minimum.accumulate(first_full_rows[:, :, ::-1], axis=2)
+        first_full_rows = first_full_rows[:, :, ::-1]
+
+        # Each block stops the drop at the first full cell below its starting
+        # position. Blocks above the grid are ignored, as in _is_illegal.
+        start_rows = np.clip(self._piece_size - 1 + y_offsets, 0, self._height)
+        stopping_anchors = first_full_rows[:, x_coords, start_rows] - y_offsets
+        anchors = stopping_anchors.min(axis=2) - 1
+        block_rows = np.maximum(anchors[:, :, None] + y_offsets, 0)
+
+        return anchors, block_rows
+
+    def _get_afterstates(
+        self,
+        grids: np.ndarray,
+        piece_idx: int,
+        canonical: Optional[bool] = False,
+        /,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Hard drop the piece provided using every available action on each of
+        the grids provided, then clear any full rows. The pieces are dropped
+        from the same anchor as in the env's step method, so the afterstates
+        match those that the env would produce.
+
+        :param grids: the grids, with shape (num_grids, width, height).
+        :param piece_idx: the id of the piece to drop.
+        :param canonical: whether to only use the canonical actions, which are indexed as in the canonical action table.
+        :return: the afterstates, with shape (num_grids, num_actions, width, height), their Dellacherie feature values, with shape (num_grids, num_actions, 6), and whether each placement ends the game.
+        """
+        table = self._get_action_table(piece_idx, canonical)
+        x_coords = table["x_coords"]
+        num_grids, num_actions = grids.shape[0], x_coords.shape[0]
+        grid_idx = np.arange(num_grids)[:, None, None]
+        action_idx = np.arange(num_actions)[None, :, None]
+        rows = np.arange(self._height + 1)
+
+        anchors, block_rows = self._get_landing_rows(grids, piece_idx, canonical)
+
+        afterstates = np.repeat(grids[:, None], num_actions, axis=1)
+        afterstates[grid_idx, action_idx, x_coords, block_rows] = True
+        is_terminal = np.any(afterstates[:, :, :, : self._piece_size], axis=(2, 3))
+
+        full_rows = afterstates.all(axis=2)
+        num_rows_cleared = full_rows.sum(axis=2)
+        eliminated_num_blocks = np.take_along_axis(full_rows, block_rows, axis=2).sum(
+            axis=2
+        )
+
+        # Move the full rows to the top, keeping the order of the remaining
+        # rows, then empty them.
+        cleared = np.nonzero(num_rows_cleared)
+        if cleared[0].size:
+            order = np.argsort(~full_rows[cleared], axis=1, kind="stable")
+            shifted = np.take_along_axis(
+                afterstates[cleared], order[:, None, :], axis=2
+            )
+            shifted &= (rows[None, :-1] >= num_rows_cleared[cleared][:, None])[
+                :, None, :
+            ]
+            afterstates[cleared] = shifted
+
+        feature_values = np.empty((num_grids, num_actions, 6), dtype="double")
+        feature_values[:, :, 0] = (
+            self._height - anchors - table["landing_offsets"][None, :]
+        )
+        feature_values[:, :, 1] = num_rows_cleared * eliminated_num_blocks
+        feature_values[:, :, 2:] = self._get_batch_dellacherie_features(
+            afterstates.reshape(-1, self._width, self._height)
+        ).reshape(num_grids, num_actions, 4)
+
+        return afterstates, feature_values, is_terminal
+
+    def _get_action_table(
+        self, piece_idx: int, canonical: Optional[bool] = False, /
+    ) -> Dict[str, np.ndarray]:
+        """
+        Return the action table of the piece provided.
+
+        :param piece_idx: the piece's id.
+        :param canonical: whether to return the table of the canonical actions.
+        :return: the action table.
+        """
+        if canonical:
+
+            return self._canonical_action_tables[piece_idx]
+
+        return self._action_tables[piece_idx]
+
+    def _get_action_mask(self) -> np.array:
+        """
+        Return which actions are worth taking with the current piece: those
+        that are the first to produce their placement and that do not end the
+        game. Only the landing rows are computed, not the afterstates. If
+        every placement ends the game, the distinct actions are all allowed.
+
+        :return: a boolean mask over the actions.
+        """
+        is_distinct = self._action_tables[self._piece._idx]["is_distinct"]
+        _, block_rows = self._get_landing_rows(self._grid[None], self._piece._idx)
+
+        # The game ends when a block lands in the top 'piece_size' rows.
+        mask = is_distinct & np.all(block_rows[0] >= self._piece_size, axis=1)
+
+        if not np.any(mask):
+
+            return is_distinct.copy()
+
+        return mask
+
+    def _get_batch_dellacherie_features(self, grids: np.ndarray, /) -> np.ndarray:
+        """
+        Get the row transitions, column transitions, holes and cumulative
+        wells of each of the grids provided, which are the Dellacherie
+        features that only depend on the grid.
+
+        :param grids: the grids, with shape (num_grids, width, height).
+        :return: the feature values, with shape (num_grids, 4).
+        """
+        feature_values = np.empty((grids.shape[0], 4), dtype="double")
+
+        # Add a full column either side and a full row to the bottom.
+        padded_grids = np.ones(
+            (grids.shape[0], self._width + 2, self._height + 1), dtype="bool"
+        )
+        padded_grids[:, 1:-1, :-1] = grids
+        num_full_above = grids.cumsum(axis=2)
+
+        feature_values[:, 0] = np.count_nonzero(
+            padded_grids[:, 1:, :-1] != padded_grids[:, :-1, :-1], axis=(1, 2)
+        )
+        feature_values[:, 1] = np.count_nonzero(
+            padded_grids[:, 1:-1, 1:] != padded_grids[:, 1:-1, :-1], axis=(1, 2)
+        )
+        feature_values[:, 2] = np.count_nonzero(num_full_above * ~grids, axis=(1, 2))
+
+        # A well's depth increases with each well block in the column, so the
+        # column contributes 1 + 2 + ... + depth.
+        well_blocks = (
+            (num_full_above == 0) & padded_grids[:, :-2, :-1] & padded_grids[:, 2:, :-1]
+        )
+        depths = well_blocks.sum(axis=2)
+        feature_values[:, 3] = (depths * (depths + 1) // 2).sum(axis=1)
+
+        return feature_values
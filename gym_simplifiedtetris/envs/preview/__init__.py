@@ -0,0 +1,14 @@
+"""Initialise the preview package."""
+
+from .simplified_tetris_binary_preview_env import (
+    SimplifiedTetrisBinaryPreviewEnv,
+)
+from .simplified_tetris_part_binary_preview_env import (
+    SimplifiedTetrisPartBinaryPreviewEnv,
+)
+from ._next_piece_preview import _NextPiecePreview
+
+__all__ = [
+    "SimplifiedTetrisBinaryPreviewEnv",
+    "SimplifiedTetrisPartBinaryPreviewEnv",
+]
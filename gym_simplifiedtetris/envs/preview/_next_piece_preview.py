@@ -0,0 +1,44 @@
+"""Contains a next piece preview class."""
+
+from typing import Optional
+
+import numpy as np
+from gym import spaces
+
+
+class _NextPiecePreview(object):
+    """
+    A next piece preview object, which appends the ids of the upcoming pieces
+    in the engine's preview queue to the obs.
+
+    :param num_preview: the number of upcoming piece ids in the obs.
+    """
+
+    def __init__(self, *, num_preview: Optional[int] = 1, **kwargs):
+        super().__init__(num_preview=num_preview, **kwargs)
+
+    @property
+    def observation_space(self) -> spaces.Box:
+        """
+        Extend the superclass property.
+
+        :return: a Box obs space.
+        """
+        obs_space = super().observation_space
+
+        return spaces.Box(
+            low=np.append(obs_space.low, np.zeros(self._num_preview_)),
+            high=np.append(
+                obs_space.high, np.full(self._num_preview_, self._num_pieces_ - 1)
+            ),
+            dtype=np.int,
+        )
+
+    def _get_obs(self) -> np.array:
+        """
+        Extend the superclass method and return the obs, plus the ids of the
+        upcoming pieces.
+
+        :return: the current obs.
+        """
+        return np.append(super()._get_obs(), self._engine._next_piece_ids)
@@ -0,0 +1,26 @@
+"""Contains a simplified Tetris env with a binary obs space and a next piece preview."""
+
+from gym_simplifiedtetris.register import register_env
+from gym_simplifiedtetris.envs.simplified_tetris_binary_env import (
+    SimplifiedTetrisBinaryEnv,
+)
+from ._next_piece_preview import _NextPiecePreview
+
+
+class SimplifiedTetrisBinaryPreviewEnv(_NextPiecePreview, SimplifiedTetrisBinaryEnv):
+    """
+    A simplified Tetris environment, where the observation space is the grid's
+    binary representation plus the current piece's id and the ids of the next
+    num_preview pieces.
+
+    :param grid_dims: the grid's dimensions.
+    :param piece_size: the size of the pieces in use.
+    :param seed: the rng seed; the env is seeded randomly if None.
+    :param num_preview: the number of upcoming piece ids in the obs.
+    """
+
+
+register_env(
+    incomplete_id="simplifiedtetris-binary-preview",
+    entry_point="gym_simplifiedtetris.envs:SimplifiedTetrisBinaryPreviewEnv",
+)
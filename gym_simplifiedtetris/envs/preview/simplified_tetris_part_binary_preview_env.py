@@ -0,0 +1,28 @@
+"""Contains a simplified Tetris env with a part-binary obs space and a next piece preview."""
+
+from gym_simplifiedtetris.register import register_env
+from gym_simplifiedtetris.envs.simplified_tetris_part_binary_env import (
+    SimplifiedTetrisPartBinaryEnv,
+)
+from ._next_piece_preview import _NextPiecePreview
+
+
+class SimplifiedTetrisPartBinaryPreviewEnv(
+    _NextPiecePreview, SimplifiedTetrisPartBinaryEnv
+):
+    """
+    A simplified Tetris env, where the obs space is the grid's part binary
+    representation plus the current piece's id and the ids of the next
+    num_preview pieces.
+
+    :param grid_dims: the grid's dimensions.
+    :param piece_size: the size of the pieces in use.
+    :param seed: the rng seed; the env is seeded randomly if None.
+    :param num_preview: the number of upcoming piece ids in the obs.
+    """
+
+
+register_env(
+    incomplete_id="simplifiedtetris-partbinary-preview",
+    entry_point="gym_simplifiedtetris.envs:SimplifiedTetrisPartBinaryPreviewEnv",
+)
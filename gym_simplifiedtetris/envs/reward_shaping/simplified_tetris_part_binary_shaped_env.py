@@ -17,7 +17,7 @@ class SimplifiedTetrisPartBinaryShapedEnv(
 
     :param grid_dims: the grid's dimensions.
     :param piece_size: the size of the pieces in use.
-    :param seed: the rng seed.
+    :param seed: the rng seed; the env is seeded randomly if None.
     """
 
     def __init__(self, **kwargs):
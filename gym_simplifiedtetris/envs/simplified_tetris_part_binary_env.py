@@ -17,7 +17,7 @@ class SimplifiedTetrisPartBinaryEnv(_SimplifiedTetrisBaseEnv):
 
     :param grid_dims: the grid dimensions.
     :param piece_size: the size of every piece.
-    :param seed: the rng seed.
+    :param seed: the rng seed; the env is seeded randomly if None.
     """
 
     @property
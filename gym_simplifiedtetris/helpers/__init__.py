@@ -1,6 +1,17 @@
 """Initialise the helpers package."""
 
 from gym_simplifiedtetris.helpers.eval_agent import eval_agent
-from gym_simplifiedtetris.helpers.train_q_learning import train_q_learning
+from gym_simplifiedtetris.helpers.eval_agent_parallel import eval_agent_parallel
+from gym_simplifiedtetris.helpers.search_hyperparameters import search_hyperparameters
+from gym_simplifiedtetris.helpers.train_q_learning import (
+    train_q_learning,
+    train_q_learning_batch,
+)
 
-__all__ = ["eval_agent", "train_q_learning"]
+__all__ = [
+    "eval_agent",
+    "eval_agent_parallel",
+    "search_hyperparameters",
+    "train_q_learning",
+    "train_q_learning_batch",
+]
@@ -29,6 +29,7 @@ def eval_agent(
 
         obs = env.reset()
         done = False
+        ep_return = 0
 
         while not done:
 
@@ -38,7 +39,9 @@ def eval_agent(
             action = agent.predict(obs)
 
             obs, _, done, info = env.step(action)
-            ep_returns[episode_id] += info["num_rows_cleared"]
+            ep_return += info["num_rows_cleared"]
+
+        ep_returns[episode_id] = ep_return
 
     env.close()
 
@@ -0,0 +1,162 @@
+"""Contains a function that evaluates an agent over several processes."""
+
+import multiprocessing
+import os
+from multiprocessing.util import Finalize
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Tuple, Type
+
+import gym
+import numpy as np
+from tqdm import tqdm
+
+from gym_simplifiedtetris.agents import BeamSearchAgent, HeuristicAgent, UniformAgent
+
+# Each worker process builds its env and receives the agent once, when the
+# pool starts, rather than with every episode.
+_worker_agent = None
+_worker_env = None
+_worker_max_steps = None
+
+
+def eval_agent_parallel(
+    agent: Any,
+    env_cls: Type[gym.Env],
+    env_kwargs: Dict[str, Any],
+    num_episodes: int,
+    num_workers: Optional[int] = None,
+    seed: Optional[int] = 8191,
+    confidence: Optional[float] = 0.95,
+    max_steps: Optional[int] = None,
+) -> Tuple[float, float, Tuple[float, float]]:
+    """
+    Evaluate the agent's performance on the game of Tetris using a pool of
+    processes, and return the mean score, the standard deviation and a
+    confidence interval for the mean. Every episode is played using its own
+    seed, so the scores do not depend on the number of workers.
+
+    :param agent: the agent to evaluate; it must be picklable, since it is pickled and sent to each worker once.
+    :param env_cls: the class of the env to evaluate the agent on.
+    :param env_kwargs: the keyword arguments used to create each worker's env.
+    :param num_episodes: the number of games to evaluate the agent.
+    :param num_workers: the number of processes; defaults to the number of CPUs.
+    :param seed: the seed used to generate each episode's seed.
+    :param confidence: the confidence level of the interval.
+    :param max_steps: the maximum number of steps per game; no limit if None.
+    :return: the mean and sample std score obtained from letting the agent play num_episodes games, and the confidence interval for the mean, which is unbounded if num_episodes is 1.
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count()
+
+    episode_seeds = np.random.default_rng(seed).integers(2**31 - 1, size=num_episodes)
+    ep_returns = np.zeros(num_episodes, dtype=int)
+    chunksize = max(1, num_episodes // (num_workers * 16))
+
+    with multiprocessing.Pool(
+        num_workers,
+        initializer=_init_worker,
+        initargs=(agent, env_cls, env_kwargs, max_steps),
+    ) as pool:
+
+        for episode_id, ep_return in tqdm(
+            pool.imap_unordered(_play_episode, enumerate(episode_seeds), chunksize),
+            total=num_episodes,
+            desc="No. of episodes completed",
+        ):
+            ep_returns[episode_id] = ep_return
+
+        # Let the workers exit by themselves, rather than be terminated when
+        # the pool is, so that they close their envs.
+        pool.close()
+        pool.join()
+
+    mean_score = np.mean(ep_returns)
+
+    if num_episodes > 1:
+        std_score = np.std(ep_returns, ddof=1)
+        z_score = NormalDist().inv_cdf(0.5 + confidence / 2)
+        half_width = z_score * std_score / np.sqrt(num_episodes)
+    else:
+        # The spread of the scores cannot be estimated from a single game.
+        std_score = 0.0
+        half_width = np.inf
+
+    confidence_interval = (mean_score - half_width, mean_score + half_width)
+
+    print(
+        f"""\nScore obtained from averaging over {num_episodes} games:\nMean = {mean_score:.1f}\nStandard deviation = {std_score:.1f}\n{100 * confidence:.0f}% confidence interval = ({confidence_interval[0]:.1f}, {confidence_interval[1]:.1f})"""
+    )
+
+    return mean_score, std_score, confidence_interval
+
+
+def _init_worker(
+    agent: Any,
+    env_cls: Type[gym.Env],
+    env_kwargs: Dict[str, Any],
+    max_steps: Optional[int],
+) -> None:
+    """
+    Store the agent and create the env used by this worker, to be closed
+    when the worker exits.
+
+    :param agent: the agent to evaluate.
+    :param env_cls: the class of the env to evaluate the agent on.
+    :param env_kwargs: the keyword arguments used to create the env.
+    :param max_steps: the maximum number of steps per game.
+    """
+    global _worker_agent, _worker_env, _worker_max_steps
+
+    _worker_agent = agent
+    _worker_env = env_cls(**env_kwargs)
+    _worker_max_steps = max_steps
+
+    Finalize(_worker_env, _worker_env.close, exitpriority=0)
+
+
+def _play_episode(episode: Tuple[int, int], /) -> Tuple[int, int]:
+    """
+    Play one game with the worker's agent and env, seeding both the env and
+    NumPy's global rng, which the agents use to explore.
+
+    :param episode: the episode's id and seed.
+    :return: the episode's id and score.
+    """
+    episode_id, episode_seed = episode
+
+    _worker_env._seed(int(episode_seed))
+    np.random.seed(episode_seed)
+
+    obs = _worker_env.reset()
+    done = False
+    ep_return = 0
+    num_steps = 0
+
+    while not done and (_worker_max_steps is None or num_steps < _worker_max_steps):
+        action = _get_action(_worker_agent, _worker_env, obs)
+        obs, _, done, info = _worker_env.step(action)
+        ep_return += info["num_rows_cleared"]
+        num_steps += 1
+
+    return episode_id, ep_return
+
+
+def _get_action(agent: Any, env: gym.Env, obs: np.array, /) -> int:
+    """
+    Return the action chosen by the agent, giving it the input it expects.
+
+    :param agent: the agent being evaluated.
+    :param env: the env that the agent is playing.
+    :param obs: the current obs.
+    :return: the action chosen by the agent.
+    """
+    if isinstance(agent, HeuristicAgent):
+        return agent.predict(env._engine._get_dellacherie_scores())
+
+    if isinstance(agent, BeamSearchAgent):
+        return agent.predict(env._engine)
+
+    if isinstance(agent, UniformAgent):
+        return agent.predict()
+
+    return agent.predict(obs)
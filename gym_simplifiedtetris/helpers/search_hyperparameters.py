@@ -0,0 +1,278 @@
+"""Contains a function that searches for hyperparameters over several processes."""
+
+import json
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from multiprocessing.managers import BaseManager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+from bayes_opt import BayesianOptimization, UtilityFunction
+
+from gym_simplifiedtetris.training import ASHAScheduler
+
+
+class _SearchManager(BaseManager):
+    """Serves the scheduler shared by the trials from its own process."""
+
+
+_SearchManager.register("ASHAScheduler", ASHAScheduler)
+
+
+def search_hyperparameters(
+    objective: Callable[..., float],
+    pbounds: Dict[str, Tuple[float, float]],
+    num_trials: int,
+    num_workers: Optional[int] = None,
+    init_points: Optional[int] = None,
+    min_resource: Optional[float] = 1,
+    reduction_factor: Optional[int] = 3,
+    max_resource: Optional[float] = None,
+    log_path: Optional[str] = None,
+    seed: Optional[int] = 1,
+    kappa: Optional[float] = 2.576,
+) -> Dict[str, Any]:
+    """
+    Search for the hyperparameters that maximise the objective, running
+    several trials at once in a pool of processes, each pinned to its own
+    subset of the CPUs. The first trials sample the hyperparameters
+    uniformly; later ones are suggested by Bayesian optimisation, given the
+    scores of the trials that have finished. The objective is called with a
+    report function, followed by the hyperparameters as keyword arguments,
+    and returns the trial's score. It should call report(resource, score)
+    periodically, such as after every epoch, and stop early when report
+    returns False; the trials are stopped by asynchronous successive halving
+    (ASHA). The objective must be picklable.
+
+    Every finished trial is appended as a line of JSON to the log, with its
+    hyperparameters, score, reports and whether it was stopped early. The
+    scores of trials stopped early are also given to the optimiser.
+
+    :param objective: the function that trains and scores one set of hyperparameters.
+    :param pbounds: the lower and upper bound of each hyperparameter.
+    :param num_trials: the number of trials to run.
+    :param num_workers: the number of processes; defaults to the number of CPUs.
+    :param init_points: the number of trials whose hyperparameters are sampled uniformly; defaults to num_workers.
+    :param min_resource: the resource of the lowest rung.
+    :param reduction_factor: the factor by which the resource grows from one rung to the next.
+    :param max_resource: the resource at which trials end, above the highest rung; no limit if None.
+    :param log_path: the path of the JSON lines log; nothing is logged if None.
+    :param seed: the seed used to sample the hyperparameters.
+    :param kappa: the exploration parameter of the upper confidence bound.
+    :return: the best score and its hyperparameters.
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count()
+
+    if init_points is None:
+        init_points = num_workers
+
+    optimizer = BayesianOptimization(
+        f=None, pbounds=pbounds, random_state=seed, verbose=0
+    )
+    utility = UtilityFunction(kind="ucb", kappa=kappa, xi=0.0)
+    rng = np.random.default_rng(seed)
+    best = {"target": None, "params": None}
+
+    with _SearchManager() as manager:
+        scheduler = manager.ASHAScheduler(min_resource, reduction_factor, max_resource)
+        core_sets = multiprocessing.Queue()
+
+        for cores in _get_core_sets(num_workers):
+            core_sets.put(cores)
+
+        with ProcessPoolExecutor(
+            num_workers, initializer=_init_worker, initargs=(core_sets,)
+        ) as executor:
+            running = {}
+            num_submitted = 0
+
+            while running or num_submitted < num_trials:
+                while len(running) < num_workers and num_submitted < num_trials:
+                    if num_submitted < init_points:
+                        params = _sample_params(pbounds, rng)
+                    else:
+                        params = _suggest_params(
+                            optimizer, utility, list(running.values()), pbounds, rng
+                        )
+
+                    future = executor.submit(
+                        _run_trial, objective, scheduler, num_submitted, params
+                    )
+                    running[future] = (num_submitted, params)
+                    num_submitted += 1
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    trial_id, params = running.pop(future)
+                    target = float(future.result())
+
+                    _register(optimizer, params, target)
+
+                    if best["target"] is None or target > best["target"]:
+                        best = {"target": target, "params": params}
+
+                    if log_path is not None:
+                        _log_trial(
+                            log_path,
+                            trial_id,
+                            params,
+                            target,
+                            scheduler.get_reports(trial_id),
+                            scheduler.is_stopped(trial_id),
+                        )
+
+    return best
+
+
+def _get_core_sets(num_workers: int, /) -> List[List[int]]:
+    """
+    Split the CPUs available to this process into one subset per worker.
+
+    :param num_workers: the number of workers.
+    :return: the CPUs of each worker.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count()))
+
+    return [
+        core_set.tolist()
+        for core_set in np.array_split(cores, min(num_workers, len(cores)))
+    ] * -(-num_workers // len(cores))
+
+
+def _init_worker(core_sets: Any, /) -> None:
+    """
+    Pin the worker to its subset of the CPUs, and limit torch to as many
+    threads.
+
+    :param core_sets: the queue holding the CPUs of each worker.
+    """
+    cores = core_sets.get()
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    torch.set_num_threads(len(cores))
+
+
+def _run_trial(
+    objective: Callable[..., float],
+    scheduler: Any,
+    trial_id: int,
+    params: Dict[str, float],
+    /,
+) -> float:
+    """
+    Run one trial, letting it report to the scheduler.
+
+    :param objective: the function that trains and scores the hyperparameters.
+    :param scheduler: the proxy of the shared scheduler.
+    :param trial_id: the trial's id.
+    :param params: the hyperparameters.
+    :return: the trial's score.
+    """
+    return objective(partial(scheduler.report, trial_id), **params)
+
+
+def _sample_params(
+    pbounds: Dict[str, Tuple[float, float]], rng: np.random.Generator, /
+) -> Dict[str, float]:
+    """
+    Sample the hyperparameters uniformly within their bounds.
+
+    :param pbounds: the lower and upper bound of each hyperparameter.
+    :param rng: the rng.
+    :return: the hyperparameters.
+    """
+    return {name: float(rng.uniform(*bounds)) for name, bounds in pbounds.items()}
+
+
+def _suggest_params(
+    optimizer: BayesianOptimization,
+    utility: UtilityFunction,
+    pending: List[Tuple[int, Dict[str, float]]],
+    pbounds: Dict[str, Tuple[float, float]],
+    rng: np.random.Generator,
+    /,
+) -> Dict[str, float]:
+    """
+    Return the hyperparameters suggested by the optimiser, or uniformly
+    sampled ones if no trial has finished yet or the suggestion is already
+    being tried, since the running trials are unknown to the optimiser.
+
+    :param optimizer: the optimiser.
+    :param utility: the acquisition function.
+    :param pending: the ids and hyperparameters of the running trials.
+    :param pbounds: the lower and upper bound of each hyperparameter.
+    :param rng: the rng.
+    :return: the hyperparameters.
+    """
+    if not optimizer.res:
+
+        return _sample_params(pbounds, rng)
+
+    params = optimizer.suggest(utility)
+
+    if any(params == pending_params for _, pending_params in pending):
+
+        return _sample_params(pbounds, rng)
+
+    return params
+
+
+def _register(
+    optimizer: BayesianOptimization, params: Dict[str, float], target: float, /
+) -> None:
+    """
+    Give a trial's score to the optimiser, unless the same hyperparameters
+    have already been scored.
+
+    :param optimizer: the optimiser.
+    :param params: the hyperparameters.
+    :param target: the score.
+    """
+    # Duplicates are checked for here, as bayes_opt raises KeyError for them
+    # in older versions and NotUniqueError in newer ones.
+    if optimizer.space.params_to_array(params) in optimizer.space:
+
+        return
+
+    optimizer.register(params=params, target=target)
+
+
+def _log_trial(
+    log_path: str,
+    trial_id: int,
+    params: Dict[str, float],
+    target: float,
+    reports: List[Tuple[float, float]],
+    stopped_early: bool,
+    /,
+) -> None:
+    """
+    Append a finished trial to the JSON lines log.
+
+    :param log_path: the path of the log.
+    :param trial_id: the trial's id.
+    :param params: the hyperparameters.
+    :param target: the score.
+    :param reports: the resources and scores reported by the trial.
+    :param stopped_early: whether the trial was stopped early.
+    """
+    record = {
+        "trial_id": trial_id,
+        "params": params,
+        "target": target,
+        "reports": reports,
+        "stopped_early": stopped_early,
+    }
+
+    with open(log_path, "a") as file:
+        file.write(json.dumps(record) + "\n")
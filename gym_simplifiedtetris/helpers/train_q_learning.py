@@ -1,6 +1,6 @@
-"""Contains a function that trains a Q-learning agent."""
+"""Contains functions that train a Q-learning agent."""
 
-from typing import Optional
+from typing import Any, Optional
 
 import gym
 import numpy as np
@@ -56,3 +56,42 @@ def train_q_learning(
     agent.epsilon = 0
 
     return agent
+
+
+def train_q_learning_batch(
+    vec_env: Any,
+    agent: QLearningAgent,
+    num_eval_timesteps: Optional[int] = 1,
+) -> QLearningAgent:
+    """
+    Train a Q-learning agent on a vectorised Tetris env and return the trained
+    Q-learning agent. The vectorised env should follow Stable Baselines3's
+    VecEnv interface, resetting each env automatically when its game ends.
+
+    :param vec_env: the vectorised env.
+    :param agent: the Q-learning agent.
+    :param num_eval_timesteps: the total number of timesteps, summed over the envs.
+    :return: the trained Q-learning agent.
+    """
+    num_iterations = max(1, num_eval_timesteps // vec_env.num_envs)
+
+    obs = vec_env.reset()
+
+    for _ in tqdm(range(num_iterations), desc="No. of vectorised steps completed"):
+
+        actions = agent.predict_batch(obs)
+
+        next_obs, rewards, dones, _ = vec_env.step(actions)
+
+        agent.learn_batch(
+            rewards=rewards, obs=obs, next_obs=next_obs, actions=actions, dones=dones
+        )
+
+        # Anneal epsilon so that it is zero by the end of training.
+        agent.epsilon -= 1 / num_iterations
+
+        obs = next_obs
+
+    agent.epsilon = 0
+
+    return agent
@@ -0,0 +1,48 @@
+"""
+Initialise the trainers package. The Lightning modules and the command line
+entry point are imported from their own modules, so that the configs, envs
+and networks can be used without Lightning.
+"""
+
+from gym_simplifiedtetris.trainers.config import TrainerConfig, load_config
+from gym_simplifiedtetris.trainers.env_fns import (
+    get_num_cells,
+    make_env,
+    make_env_fns,
+    make_vec_env,
+)
+from gym_simplifiedtetris.trainers.history_wrapper import HistoryWrapper
+from gym_simplifiedtetris.trainers.line_reward_wrapper import LineRewardWrapper
+from gym_simplifiedtetris.trainers.networks import (
+    ActorNet,
+    CriticNet,
+    QNetwork,
+    SharedActorCriticNet,
+)
+from gym_simplifiedtetris.trainers.policies import (
+    ActorCritic,
+    EpsilonGreedyPolicy,
+    SharedActorCritic,
+    make_actor_critic,
+    make_epsilon_greedy_policy,
+)
+
+__all__ = [
+    "ActorCritic",
+    "ActorNet",
+    "CriticNet",
+    "EpsilonGreedyPolicy",
+    "get_num_cells",
+    "HistoryWrapper",
+    "LineRewardWrapper",
+    "load_config",
+    "make_actor_critic",
+    "make_env",
+    "make_env_fns",
+    "make_epsilon_greedy_policy",
+    "make_vec_env",
+    "QNetwork",
+    "SharedActorCritic",
+    "SharedActorCriticNet",
+    "TrainerConfig",
+]
@@ -0,0 +1,6 @@
+"""Run the trainer from the command line."""
+
+from gym_simplifiedtetris.trainers.train import main
+
+if __name__ == "__main__":
+    main()
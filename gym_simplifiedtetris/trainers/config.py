@@ -0,0 +1,142 @@
+"""
+The configuration of a training run, and functions that load it.
+"""
+
+import json
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+ALGOS = ["dqn", "ppo"]
+METRICS_FORMATS = ["csv", "parquet"]
+NETWORKS = ["mlp", "cnn"]
+OBS_TYPES = ["binary", "part_binary"]
+REWARDS = ["lines", "negative", "score", "score_neg", "shaped"]
+VEC_ENVS = ["shared_memory", "thread_pool"]
+
+
+@dataclass
+class TrainerConfig(object):
+    """
+    Selects the algorithm, network, env, reward, history length and
+    parallelism of a training run. The algorithm's hyperparameters, including
+    the depth and width of its networks, are passed to its Lightning module as
+    keyword arguments; those omitted keep the module's defaults.
+
+    The recurrent policy of PPOLSTM.py and the bootstrapped heads of
+    BootDQN.py are not yet supported, so those scripts are still run on their
+    own.
+
+    :param algo: the algorithm, 'dqn' or 'ppo'.
+    :param network: the network of the algorithm, 'mlp' or 'cnn'.
+    :param obs_type: the obs space, 'binary' or 'part_binary'.
+    :param grid_dims: the grid's dimensions.
+    :param piece_size: the size of the pieces in use.
+    :param reward: the reward function; see REWARDS.
+    :param history_len: the number of obs stacked to form each state.
+    :param num_envs: the number of envs stepped together, by the learner or by each actor.
+    :param vec_env: the vectorised env used by the learner, 'shared_memory' or 'thread_pool'.
+    :param num_actors: the number of actor processes; the learner steps the envs itself if zero.
+    :param mask_actions: whether to restrict the actions to those allowed by the envs' action masks.
+    :param seed: the seed of the envs; each env is seeded randomly if None.
+    :param num_epochs: the number of training epochs.
+    :param num_eval_games: the number of games played by the trained agent.
+    :param log_dir: the directory of the logs.
+    :param metrics_format: the format of the training metrics file, 'csv' or 'parquet'.
+    :param metrics_interval: the number of seconds between writes of the training metrics.
+    :param accelerator: the accelerator passed to the Lightning trainer.
+    :param hparams: the hyperparameters of the algorithm.
+    """
+
+    algo: str = "dqn"
+    network: str = "mlp"
+    obs_type: str = "binary"
+    grid_dims: Tuple[int, int] = (10, 10)
+    piece_size: int = 2
+    reward: str = "lines"
+    history_len: int = 1
+    num_envs: int = 1
+    vec_env: str = "shared_memory"
+    num_actors: int = 0
+    mask_actions: bool = False
+    seed: Optional[int] = None
+    num_epochs: int = 10
+    num_eval_games: int = 10
+    log_dir: str = "log/"
+    metrics_format: str = "csv"
+    metrics_interval: float = 10.0
+    accelerator: str = "cpu"
+    hparams: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.grid_dims = tuple(self.grid_dims)
+
+        assert self.algo in ALGOS, f"algo should be one of {ALGOS}."
+        assert self.network in NETWORKS, f"network should be one of {NETWORKS}."
+        assert self.obs_type in OBS_TYPES, f"obs_type should be one of {OBS_TYPES}."
+        assert self.reward in REWARDS, f"reward should be one of {REWARDS}."
+        assert self.vec_env in VEC_ENVS, f"vec_env should be one of {VEC_ENVS}."
+        assert (
+            self.metrics_format in METRICS_FORMATS
+        ), f"metrics_format should be one of {METRICS_FORMATS}."
+        assert self.history_len >= 1, "history_len should be positive."
+        assert self.num_envs >= 1, "num_envs should be positive."
+        assert self.num_actors >= 0, "num_actors should not be negative."
+
+
+def load_config(
+    path: Optional[str] = None, overrides: Optional[Sequence[str]] = ()
+) -> TrainerConfig:
+    """
+    Load a config from a JSON file, then apply the overrides given. Each
+    override has the form 'name=value', where the value is parsed as JSON
+    if possible and kept as a string otherwise; hyperparameters are named
+    'hparams.name'.
+
+    :param path: the path of the JSON file; the defaults are used if None.
+    :param overrides: the overrides.
+    :return: the config.
+    """
+    values = {}
+
+    if path is not None:
+        with open(path) as file:
+            values = json.load(file)
+
+    names = {config_field.name for config_field in fields(TrainerConfig)}
+    unknown = set(values) - names
+    assert not unknown, f"Unknown config fields: {sorted(unknown)}."
+
+    config = TrainerConfig(**values)
+
+    for override in overrides:
+        config = _apply_override(config, override)
+
+    return config
+
+
+def _apply_override(config: TrainerConfig, override: str, /) -> TrainerConfig:
+    """
+    Return a copy of the config with one override applied.
+
+    :param config: the config.
+    :param override: the override, of the form 'name=value'.
+    :return: the new config.
+    """
+    assert "=" in override, f"Override '{override}' should have the form name=value."
+
+    name, value = override.split("=", 1)
+
+    try:
+        value = json.loads(value)
+    except json.JSONDecodeError:
+        pass
+
+    if name.startswith("hparams."):
+
+        return replace(config, hparams={**config.hparams, name[8:]: value})
+
+    assert name in {
+        config_field.name for config_field in fields(TrainerConfig)
+    }, f"Unknown config field: {name}."
+
+    return replace(config, **{name: value})
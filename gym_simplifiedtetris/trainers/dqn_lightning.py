@@ -0,0 +1,398 @@
+"""
+A Lightning module that trains a DQN agent.
+"""
+
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import gym
+import numpy as np
+import torch
+from pytorch_lightning import LightningModule
+from torch import Tensor, nn
+from torch.optim import Adam, Optimizer
+from torch.utils.data import DataLoader
+
+from gym_simplifiedtetris.trainers.env_fns import make_vec_env
+from gym_simplifiedtetris.trainers.networks import QNetwork
+from gym_simplifiedtetris.trainers.policies import make_epsilon_greedy_policy
+from gym_simplifiedtetris.training import (
+    ActorLearner,
+    Experience,
+    HistoryReplayBuffer,
+    MetricsSink,
+    PrioritizedHistoryReplayBuffer,
+    PrioritizedReplayBuffer,
+    ReplayBuffer,
+    ReplayDataset,
+    Rollout,
+    VecEnvAgent,
+)
+
+
+class DQNLightning(LightningModule):
+    """
+    Trains a Q-network with experience replay and a target network. The
+    learner steps its own vectorised env, keeping env_steps_per_update env
+    steps per gradient update, or, if num_actors is positive, replays the
+    rollouts of actor processes that explore with synced copies of the
+    network. If the states stack the last history_len obs, each obs is only
+    stored once, in a history replay buffer that rebuilds the stacks when
+    sampling, with one stream of experiences per env.
+
+    :param env_fns: the functions that create the envs, stepped by the learner or by each actor.
+    :param vec_env: the vectorised env used by the learner, 'shared_memory' or 'thread_pool'.
+    :param num_cells: the number of binary grid cells at the start of each obs, packed in the replay buffer; the obs are not packed if None.
+    :param history_len: the number of obs stacked to form each state by the envs.
+    :param batch_size: the number of experiences in each batch.
+    :param lr: the learning rate.
+    :param gamma: the discount factor.
+    :param sync_rate: the number of steps between target network updates.
+    :param replay_size: the capacity of the replay buffer, in experiences, or in obs if history_len is more than one.
+    :param warm_start_steps: the number of random steps stored before training.
+    :param eps_last_frame: the step at which epsilon stops decaying; defaults to replay_size.
+    :param eps_start: the initial epsilon.
+    :param eps_end: the final epsilon.
+    :param sample_size: the number of experiences sampled per epoch.
+    :param network: the Q-network, 'mlp' or 'cnn'.
+    :param depth: the number of fully connected hidden layers of the Q-network.
+    :param hidden_size: the number of units in each hidden layer.
+    :param prioritized: whether to use prioritised experience replay.
+    :param priority_alpha: the prioritisation exponent.
+    :param priority_beta: the importance sampling exponent.
+    :param env_steps_per_update: the number of env steps, summed over the envs, per gradient update.
+    :param mask_actions: whether to restrict the actions to those allowed by the envs' action masks.
+    :param num_actors: the number of actor processes; the learner steps the envs itself if zero.
+    :param actor_steps: the number of steps per env in each actor's rollout.
+    :param actor_sync_rate: the number of steps between publishing the weights to the actors.
+    :param metrics: the sink that each step's METRICS are logged to; nothing is logged if None.
+    """
+
+    METRICS = ["step", "mean_ep_reward", "epsilon", "loss"]
+
+    def __init__(
+        self,
+        env_fns: Sequence[Callable[[], gym.Env]],
+        vec_env: Optional[str] = "shared_memory",
+        num_cells: Optional[int] = None,
+        history_len: Optional[int] = 1,
+        batch_size: Optional[int] = 8,
+        lr: Optional[float] = 5e-4,
+        gamma: Optional[float] = 0.99,
+        sync_rate: Optional[int] = 16352,
+        replay_size: Optional[int] = 433020,
+        warm_start_steps: Optional[int] = 16352,
+        eps_last_frame: Optional[int] = None,
+        eps_start: Optional[float] = 1.0,
+        eps_end: Optional[float] = 0.01,
+        sample_size: Optional[int] = 16352,
+        network: Optional[str] = "mlp",
+        depth: Optional[int] = 2,
+        hidden_size: Optional[int] = 64,
+        prioritized: Optional[bool] = False,
+        priority_alpha: Optional[float] = 0.6,
+        priority_beta: Optional[float] = 0.4,
+        env_steps_per_update: Optional[int] = 1,
+        mask_actions: Optional[bool] = False,
+        num_actors: Optional[int] = 0,
+        actor_steps: Optional[int] = 16,
+        actor_sync_rate: Optional[int] = 400,
+        metrics: Optional[MetricsSink] = None,
+    ) -> None:
+        super().__init__()
+        self.save_hyperparameters(ignore=["env_fns", "metrics"])
+
+        self.metrics = metrics
+        self.num_envs = len(env_fns)
+
+        if eps_last_frame is None:
+            self.hparams.eps_last_frame = replay_size
+
+        if num_actors:
+            # Each actor steps its own envs, so the learner only keeps one env
+            # for the spaces.
+            self.envs = make_vec_env(env_fns[:1], "thread_pool")
+        else:
+            self.envs = make_vec_env(env_fns, vec_env)
+
+        obs_size = self.envs.observation_space.shape[0]
+        n_actions = self.envs.action_space.n
+
+        self.net = QNetwork(obs_size, n_actions, depth, hidden_size, network)
+        self.target_net = QNetwork(obs_size, n_actions, depth, hidden_size, network)
+
+        self.buffer = self._make_buffer(obs_size, n_actions)
+
+        self.epoch_reward = 0.0
+        self.ep_rewards = np.zeros(self.num_envs)
+        self.avg_ep_reward = 0.0
+        self.env_step_credit = 0
+
+        if num_actors:
+            self.actor_learner = ActorLearner(
+                self.net,
+                partial(make_epsilon_greedy_policy, num_actors=num_actors),
+                env_fns,
+                num_actors,
+                actor_steps,
+                mask_actions=mask_actions,
+            )
+            self.populate_from_actors(warm_start_steps)
+        else:
+            self.actor_learner = None
+            self.agent = VecEnvAgent(self.envs, self.buffer, mask_actions=mask_actions)
+            self.populate(warm_start_steps)
+
+    def _make_buffer(self, obs_size: int, n_actions: int, /) -> Any:
+        """
+        Return the replay buffer, which stores each obs of a stacked state
+        only once if the states stack several obs.
+
+        :param obs_size: the number of elements in each state.
+        :param n_actions: the number of actions.
+        :return: the replay buffer.
+        """
+        hparams = self.hparams
+        # The action masks of the new states restrict the bootstrapped values
+        # to the allowed actions.
+        kwargs = dict(
+            num_cells=hparams.num_cells,
+            num_actions=n_actions if hparams.mask_actions else None,
+        )
+
+        if hparams.prioritized:
+            kwargs.update(alpha=hparams.priority_alpha, beta=hparams.priority_beta)
+
+        if hparams.history_len == 1:
+            buffer_class = (
+                PrioritizedReplayBuffer if hparams.prioritized else ReplayBuffer
+            )
+
+            return buffer_class(hparams.replay_size, obs_size, **kwargs)
+
+        buffer_class = (
+            PrioritizedHistoryReplayBuffer
+            if hparams.prioritized
+            else HistoryReplayBuffer
+        )
+
+        return buffer_class(
+            hparams.replay_size,
+            obs_size // hparams.history_len,
+            hparams.history_len,
+            num_streams=max(hparams.num_actors, 1) * self.num_envs,
+            **kwargs,
+        )
+
+    def populate(self, steps: int, /) -> None:
+        """
+        Fill the replay buffer with random steps through the envs.
+
+        :param steps: the number of steps, summed over the envs.
+        """
+        for _ in range(-(-steps // self.num_envs)):
+            self.agent.play_step(self.net, 1.0)
+
+        self.agent.reset()
+        self.ep_rewards[:] = 0
+
+        if self.hparams.history_len > 1:
+            self.buffer.end_episodes()
+
+    def populate_from_actors(self, steps: int, /) -> None:
+        """
+        Wait for the actors' rollouts until the replay buffer holds enough
+        experiences to start training.
+
+        :param steps: the number of experiences.
+        """
+        # A history replay buffer holds fewer experiences than obs, since it
+        # also stores the new state of the last experience of each episode.
+        if self.hparams.history_len == 1:
+            max_size = self.hparams.replay_size
+        else:
+            max_size = self.hparams.replay_size // 2
+
+        while len(self.buffer) < min(steps, max_size):
+            self.append_rollout(self.actor_learner.get_rollout())
+
+    def append_rollout(self, rollout: Rollout, /) -> None:
+        """
+        Store every step of an actor's rollout in the replay buffer.
+
+        :param rollout: the rollout.
+        """
+        # The state after each env's last step is the state its next rollout
+        # starts from. After a done step, the next state is the reset state,
+        # but its value is zeroed in the loss.
+        next_states = np.concatenate([rollout.states[1:], rollout.last_states[None]])
+        num_steps, num_envs = rollout.actions.shape
+
+        if self.hparams.mask_actions:
+            next_masks = np.concatenate(
+                [rollout.action_masks[1:], rollout.last_action_masks[None]]
+            )
+
+        for step in range(num_steps):
+            for env_idx in range(num_envs):
+                self.buffer.append(
+                    Experience(
+                        rollout.states[step, env_idx],
+                        rollout.actions[step, env_idx],
+                        rollout.rewards[step, env_idx],
+                        rollout.dones[step, env_idx],
+                        next_states[step, env_idx],
+                        (
+                            next_masks[step, env_idx]
+                            if self.hparams.mask_actions
+                            else None
+                        ),
+                    ),
+                    stream=rollout.actor_idx * num_envs + env_idx,
+                )
+
+        self.epoch_reward += sum(rollout.ep_rewards)
+
+        if rollout.ep_rewards:
+            self.avg_ep_reward = sum(rollout.ep_rewards) / len(rollout.ep_rewards)
+
+    def forward(self, x: Tensor) -> Tensor:
+        """
+        Return the Q-values of each action.
+
+        :param x: the states.
+        :return: the Q-values.
+        """
+        return self.net(x)
+
+    @torch.no_grad()
+    def get_action(self, state: np.array, /) -> int:
+        """
+        Return the greedy action in a state.
+
+        :param state: the state.
+        :return: the action.
+        """
+        return int(self.net(torch.as_tensor(state)[None]).argmax(1).item())
+
+    def dqn_mse_loss(self, batch: Tuple[Tensor, ...], /) -> Tensor:
+        """
+        Return the mean squared TD error of a batch, weighted to correct for
+        the sampling if the replay is prioritised. If the actions are masked,
+        the next states' values maximise over their allowed actions only.
+
+        :param batch: the batch sampled from the replay buffer.
+        :return: the loss.
+        """
+        states, actions, rewards, dones, next_states = batch[:5]
+        num_fields = 6 if self.hparams.mask_actions else 5
+
+        state_action_values = (
+            self.net(states).gather(1, actions.unsqueeze(-1)).squeeze(-1)
+        )
+
+        with torch.no_grad():
+            next_q_values = self.target_net(next_states)
+
+            if self.hparams.mask_actions:
+                next_q_values = next_q_values.masked_fill(~batch[5], float("-inf"))
+
+            next_state_values = next_q_values.max(1)[0]
+            next_state_values[dones] = 0.0
+
+        expected_state_action_values = next_state_values * self.hparams.gamma + rewards
+
+        if not self.hparams.prioritized:
+
+            return nn.MSELoss()(state_action_values, expected_state_action_values)
+
+        indices, weights = batch[num_fields:]
+        td_errors = expected_state_action_values - state_action_values
+        self.buffer.update_priorities(
+            indices.cpu().numpy(), td_errors.detach().cpu().numpy()
+        )
+
+        return torch.mean(weights * td_errors**2)
+
+    def training_step(self, batch: Tuple[Tensor, ...], batch_idx: int) -> OrderedDict:
+        epsilon = max(
+            self.hparams.eps_end,
+            self.hparams.eps_start
+            - self.global_step / self.hparams.eps_last_frame * self.hparams.eps_start,
+        )
+
+        if self.actor_learner is not None:
+            # The actors step the envs, so the learner only syncs their
+            # weights and replays the rollouts that have arrived.
+            if self.global_step % self.hparams.actor_sync_rate == 0:
+                self.actor_learner.publish(self.net)
+
+            for _ in range(self.hparams.num_actors):
+                rollout = self.actor_learner.get_rollout(timeout=0)
+
+                if rollout is None:
+                    break
+
+                self.append_rollout(rollout)
+        else:
+            # Step every env as often as needed to keep env_steps_per_update
+            # env steps, summed over the envs, per gradient update.
+            self.env_step_credit += self.hparams.env_steps_per_update
+
+            while self.env_step_credit >= self.num_envs:
+                rewards, dones = self.agent.play_step(self.net, epsilon)
+                self.env_step_credit -= self.num_envs
+
+                self.ep_rewards += rewards
+                self.epoch_reward += self.ep_rewards[dones].sum()
+                self.ep_rewards[dones] = 0
+
+        loss = self.dqn_mse_loss(batch)
+
+        if self.global_step % self.hparams.sync_rate == 0:
+            self.target_net.load_state_dict(self.net.state_dict())
+
+        self.log("train_loss", loss, on_step=True, on_epoch=True, prog_bar=True)
+        self.log("epoch_reward", self.epoch_reward, on_epoch=True, prog_bar=True)
+
+        if self.metrics is not None:
+            # The learner only sees the actors' finished episodes, so their
+            # mean return stands in for that of the learner's envs.
+            if self.actor_learner is not None:
+                mean_ep_reward = self.avg_ep_reward
+            else:
+                mean_ep_reward = self.ep_rewards.mean()
+
+            self.metrics.log(
+                step=self.global_step,
+                mean_ep_reward=mean_ep_reward,
+                epsilon=epsilon,
+                loss=loss,
+            )
+
+        return OrderedDict({"loss": loss})
+
+    def training_epoch_end(self, outputs: List[Any]) -> None:
+        self.epoch_reward = 0.0
+
+    def on_train_end(self) -> None:
+        if self.actor_learner is not None:
+            self.actor_learner.close()
+
+        self.envs.close()
+
+    def configure_optimizers(self) -> List[Optimizer]:
+        return [Adam(self.net.parameters(), lr=self.hparams.lr)]
+
+    def train_dataloader(self) -> DataLoader:
+        # The dataset yields ready-made batches, so the loader does not
+        # collate them.
+        dataset = ReplayDataset(
+            self.buffer,
+            self.hparams.batch_size,
+            self.hparams.sample_size // self.hparams.batch_size,
+            pin_memory=torch.cuda.is_available(),
+        )
+
+        return DataLoader(dataset=dataset, batch_size=None)
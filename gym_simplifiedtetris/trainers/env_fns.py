@@ -0,0 +1,130 @@
+"""
+Functions that create the envs selected by a trainer config.
+"""
+
+from functools import partial
+from typing import Any, Callable, List, Optional, Sequence
+
+import gym
+
+from gym_simplifiedtetris.envs import (
+    SimplifiedTetrisBinaryEnv,
+    SimplifiedTetrisBinaryShapedEnv,
+    SimplifiedTetrisPartBinaryEnv,
+    SimplifiedTetrisPartBinaryShapedEnv,
+)
+from gym_simplifiedtetris.trainers.config import TrainerConfig
+from gym_simplifiedtetris.trainers.history_wrapper import HistoryWrapper
+from gym_simplifiedtetris.trainers.line_reward_wrapper import LineRewardWrapper
+from gym_simplifiedtetris.training import SharedMemoryVecEnv, ThreadPoolVecEnv
+
+_ENV_CLASSES = {
+    ("binary", False): SimplifiedTetrisBinaryEnv,
+    ("binary", True): SimplifiedTetrisBinaryShapedEnv,
+    ("part_binary", False): SimplifiedTetrisPartBinaryEnv,
+    ("part_binary", True): SimplifiedTetrisPartBinaryShapedEnv,
+}
+
+# The arguments of the reward wrapper for each reward function; the shaped
+# reward is computed by the env itself.
+_REWARD_KWARGS = {
+    "lines": dict(),
+    "negative": dict(line_rewards=(0, 1, 2, 3, 4), terminal_reward=-10.0),
+    "score": dict(line_rewards=(0, 40, 100, 300, 1200), terminal_reward=None),
+    "score_neg": dict(line_rewards=(0, 40, 100, 300, 1200), terminal_reward=-3000.0),
+    "shaped": dict(),
+}
+
+
+def make_env(
+    obs_type: str,
+    grid_dims: Sequence[int],
+    piece_size: int,
+    reward: str,
+    history_len: Optional[int] = 1,
+    mask_actions: Optional[bool] = False,
+    seed: Optional[int] = None,
+) -> gym.Env:
+    """
+    Create a Tetris env with the obs space and reward function given,
+    stacking the last history_len obs if history_len exceeds one.
+
+    :param obs_type: the obs space, 'binary' or 'part_binary'.
+    :param grid_dims: the grid's dimensions.
+    :param piece_size: the size of the pieces in use.
+    :param reward: the reward function.
+    :param history_len: the number of obs stacked to form each state.
+    :param mask_actions: whether to add the action mask of the next state to the info returned by step.
+    :param seed: the rng seed; the env is seeded randomly if None.
+    :return: the env.
+    """
+    env_class = _ENV_CLASSES[(obs_type, reward == "shaped")]
+    env = env_class(
+        grid_dims=tuple(grid_dims),
+        piece_size=piece_size,
+        seed=seed,
+        mask_actions=mask_actions,
+    )
+    env = LineRewardWrapper(env, **_REWARD_KWARGS[reward])
+
+    if history_len > 1:
+        env = HistoryWrapper(env, history_len)
+
+    return env
+
+
+def make_env_fns(config: TrainerConfig, /) -> List[Callable[[], gym.Env]]:
+    """
+    Return the functions that create the envs of a config, one per env. The
+    functions are picklable, so that the envs can be created in other
+    processes. Each env gets its own seed, so that the envs play different
+    games; the seeds are random if the config is not seeded.
+
+    :param config: the config.
+    :return: the functions.
+    """
+    return [
+        partial(
+            make_env,
+            config.obs_type,
+            config.grid_dims,
+            config.piece_size,
+            config.reward,
+            config.history_len,
+            config.mask_actions,
+            None if config.seed is None else config.seed + idx,
+        )
+        for idx in range(config.num_envs)
+    ]
+
+
+def make_vec_env(env_fns: Sequence[Callable[[], gym.Env]], vec_env: str, /) -> Any:
+    """
+    Create a vectorised env. A single env is always stepped in the current
+    process.
+
+    :param env_fns: the functions that create each env.
+    :param vec_env: the vectorised env, 'shared_memory' or 'thread_pool'.
+    :return: the vectorised env.
+    """
+    if vec_env == "shared_memory" and len(env_fns) > 1:
+
+        return SharedMemoryVecEnv(env_fns)
+
+    return ThreadPoolVecEnv(env_fns)
+
+
+def get_num_cells(config: TrainerConfig, /) -> int:
+    """
+    Return the number of binary grid cells at the start of each state of a
+    config's envs, which can be packed when the states are stored.
+
+    :param config: the config.
+    :return: the number of cells.
+    """
+    height, width = config.grid_dims
+
+    if config.obs_type == "part_binary":
+        height -= config.piece_size
+
+    return height * width
@@ -0,0 +1,61 @@
+"""
+A wrapper class that stacks the last few obs of an env.
+"""
+
+from collections import deque
+from typing import Any, Dict, Tuple
+
+import gym
+import numpy as np
+from gym import spaces
+
+
+class HistoryWrapper(gym.Wrapper):
+    """
+    Replaces the obs of an env with its last history_len obs, oldest first,
+    concatenated into a single flat obs. The history is padded with zeros
+    at the start of each game.
+
+    :param env: the env, whose obs should be flat.
+    :param history_len: the number of obs stacked.
+    """
+
+    def __init__(self, env: gym.Env, history_len: int) -> None:
+        super().__init__(env)
+
+        assert history_len >= 1, "history_len should be positive."
+
+        self.history_len = history_len
+        self.observation_space = spaces.Box(
+            low=np.tile(np.minimum(env.observation_space.low, 0), history_len),
+            high=np.tile(env.observation_space.high, history_len),
+            dtype=env.observation_space.dtype,
+        )
+        self._history = deque(maxlen=history_len)
+
+    def reset(self, **kwargs: Any) -> np.array:
+        """
+        Reset the env, and the history.
+
+        :return: the first obs stacked after zeros.
+        """
+        obs = self.env.reset(**kwargs)
+
+        for _ in range(self.history_len - 1):
+            self._history.append(np.zeros_like(obs))
+
+        self._history.append(obs)
+
+        return np.concatenate(self._history)
+
+    def step(self, action: int, /) -> Tuple[np.array, float, bool, Dict[str, Any]]:
+        """
+        Step the env, and add its obs to the history.
+
+        :param action: the action to be taken.
+        :return: the stacked obs, reward, game termination indicator, and env info.
+        """
+        obs, reward, done, info = self.env.step(action)
+        self._history.append(obs)
+
+        return np.concatenate(self._history), reward, done, info
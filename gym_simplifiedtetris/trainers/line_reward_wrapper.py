@@ -0,0 +1,77 @@
+"""
+A wrapper class that rewards each number of rows cleared with a set amount.
+"""
+
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import gym
+import numpy as np
+
+
+class LineRewardWrapper(gym.Wrapper):
+    """
+    Replaces the reward of a Tetris env with a set reward for each number of
+    rows cleared at once, such as the Tetris score, and a set reward when
+    the game ends. The number of times each number of rows is cleared is
+    counted, so that it can be logged once per epoch.
+
+    :param env: the env.
+    :param line_rewards: the reward for clearing each number of rows, from zero; the env's reward is kept if None.
+    :param terminal_reward: the reward when the game ends; the number of rows cleared in the game if None.
+    """
+
+    def __init__(
+        self,
+        env: gym.Env,
+        line_rewards: Optional[Sequence[float]] = None,
+        terminal_reward: Optional[float] = 0.0,
+    ) -> None:
+        super().__init__(env)
+
+        assert line_rewards is None or (
+            len(line_rewards) > env.unwrapped._piece_size_
+        ), "line_rewards should have a reward for every number of rows that can be cleared."
+
+        self.line_rewards = line_rewards
+        self.terminal_reward = terminal_reward
+        self.line_counts = np.zeros((env.unwrapped._piece_size_), dtype="int64")
+
+    def step(self, action: int, /) -> Tuple[np.array, float, bool, Dict[str, Any]]:
+        """
+        Step the env, and replace its reward.
+
+        :param action: the action to be taken.
+        :return: the next observation, reward, game termination indicator, and env info.
+        """
+        obs, reward, done, info = self.env.step(action)
+        num_rows_cleared = info["num_rows_cleared"]
+
+        if num_rows_cleared:
+            self.line_counts[num_rows_cleared - 1] += 1
+
+        if self.line_rewards is None:
+
+            return obs, reward, done, info
+
+        if done:
+            reward = (
+                self.unwrapped._engine._score
+                if self.terminal_reward is None
+                else self.terminal_reward
+            )
+        else:
+            reward = self.line_rewards[num_rows_cleared]
+
+        return obs, reward, done, info
+
+    def pop_line_counts(self) -> np.array:
+        """
+        Return the number of times each number of rows has been cleared since
+        the last call, and reset the counts.
+
+        :return: the counts, from one row to piece_size rows.
+        """
+        line_counts = self.line_counts.copy()
+        self.line_counts[:] = 0
+
+        return line_counts
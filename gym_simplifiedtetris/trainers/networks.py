@@ -0,0 +1,207 @@
+"""
+The networks trained by the trainers.
+"""
+
+from typing import Optional, Tuple
+
+import torch
+from torch import nn
+from torch.distributions import Categorical
+
+
+def _make_mlp(in_size: int, depth: int, hidden_size: int, /) -> nn.Sequential:
+    """
+    Return a stack of depth fully connected layers, each followed by a ReLU.
+
+    :param in_size: the number of inputs.
+    :param depth: the number of hidden layers.
+    :param hidden_size: the number of units in each hidden layer.
+    :return: the layers.
+    """
+    assert depth >= 1, "depth should be positive."
+
+    layers = []
+
+    for layer_idx in range(depth):
+        layers += [nn.Linear(in_size if layer_idx == 0 else hidden_size, hidden_size)]
+        layers += [nn.ReLU()]
+
+    return nn.Sequential(*layers)
+
+
+def _make_trunk(
+    in_size: int, depth: int, hidden_size: int, net: str, /
+) -> nn.Sequential:
+    """
+    Return the layers that map each obs to hidden_size features: an MLP, or
+    the 1D convolutions of PPOCNN.py followed by an MLP.
+
+    :param in_size: the number of inputs.
+    :param depth: the number of fully connected hidden layers.
+    :param hidden_size: the number of units in each hidden layer.
+    :param net: the network, 'mlp' or 'cnn'.
+    :return: the layers.
+    """
+    assert net in ["mlp", "cnn"], "net should be 'mlp' or 'cnn'."
+
+    if net == "mlp":
+
+        return _make_mlp(in_size, depth, hidden_size)
+
+    convs = nn.Sequential(
+        nn.Unflatten(1, (1, in_size)),
+        nn.Conv1d(1, 16, kernel_size=8, stride=4, padding=7),
+        nn.ReLU(),
+        nn.Conv1d(16, 32, kernel_size=4, stride=1, padding=2),
+        nn.ReLU(),
+        nn.Flatten(),
+    )
+
+    with torch.no_grad():
+        conv_size = convs(torch.zeros(1, in_size)).shape[1]
+
+    return nn.Sequential(convs, _make_mlp(conv_size, depth, hidden_size))
+
+
+def _get_dist(logits: torch.Tensor, mask: Optional[torch.Tensor], /) -> Categorical:
+    """
+    Return the distribution over the actions, giving masked actions zero
+    probability.
+
+    :param logits: the logits of the actions.
+    :param mask: the actions allowed; every action is allowed if None.
+    :return: the distribution.
+    """
+    logits = torch.nan_to_num(logits)
+
+    if mask is not None:
+        logits = logits.masked_fill(~mask, float("-inf"))
+
+    return Categorical(logits=logits)
+
+
+class QNetwork(nn.Module):
+    """
+    A network that returns the Q-value of each action.
+
+    :param obs_size: the number of elements in each obs.
+    :param n_actions: the number of actions.
+    :param depth: the number of fully connected hidden layers.
+    :param hidden_size: the number of units in each hidden layer.
+    :param net: the network, 'mlp' or 'cnn'.
+    """
+
+    def __init__(
+        self,
+        obs_size: int,
+        n_actions: int,
+        depth: Optional[int] = 2,
+        hidden_size: Optional[int] = 64,
+        net: Optional[str] = "mlp",
+    ) -> None:
+        super().__init__()
+
+        self.net = nn.Sequential(
+            _make_trunk(obs_size, depth, hidden_size, net),
+            nn.Linear(hidden_size, n_actions),
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.net(x.float())
+
+
+class ActorNet(nn.Module):
+    """
+    A network that returns a distribution over the actions, and an action
+    sampled from it.
+
+    :param obs_size: the number of elements in each obs.
+    :param n_actions: the number of actions.
+    :param depth: the number of fully connected hidden layers.
+    :param hidden_size: the number of units in each hidden layer.
+    :param net: the network, 'mlp' or 'cnn'.
+    """
+
+    def __init__(
+        self,
+        obs_size: int,
+        n_actions: int,
+        depth: Optional[int] = 2,
+        hidden_size: Optional[int] = 64,
+        net: Optional[str] = "mlp",
+    ) -> None:
+        super().__init__()
+
+        self.actor = nn.Sequential(
+            _make_trunk(obs_size, depth, hidden_size, net),
+            nn.Linear(hidden_size, n_actions),
+        )
+
+    def forward(
+        self, x: torch.Tensor, mask: Optional[torch.Tensor] = None
+    ) -> Tuple[Categorical, torch.Tensor]:
+        dist = _get_dist(self.actor(x.float()), mask)
+
+        return dist, dist.sample()
+
+
+class CriticNet(nn.Module):
+    """
+    A network with one fully connected hidden layer that returns the value
+    of a state.
+
+    :param obs_size: the number of elements in each obs.
+    :param hidden_size: the number of units in the hidden layer.
+    :param net: the network, 'mlp' or 'cnn'.
+    """
+
+    def __init__(
+        self,
+        obs_size: int,
+        hidden_size: Optional[int] = 100,
+        net: Optional[str] = "mlp",
+    ) -> None:
+        super().__init__()
+
+        self.critic = nn.Sequential(
+            _make_trunk(obs_size, 1, hidden_size, net), nn.Linear(hidden_size, 1)
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.critic(x.float())
+
+
+class SharedActorCriticNet(nn.Module):
+    """
+    A network whose actor and critic heads share one trunk, so that a single
+    forward pass returns both the distribution over the actions and the
+    value of the state.
+
+    :param obs_size: the number of elements in each obs.
+    :param n_actions: the number of actions.
+    :param depth: the number of fully connected hidden layers in the trunk.
+    :param hidden_size: the number of units in each hidden layer.
+    :param net: the network, 'mlp' or 'cnn'.
+    """
+
+    def __init__(
+        self,
+        obs_size: int,
+        n_actions: int,
+        depth: Optional[int] = 2,
+        hidden_size: Optional[int] = 64,
+        net: Optional[str] = "mlp",
+    ) -> None:
+        super().__init__()
+
+        self.trunk = _make_trunk(obs_size, depth, hidden_size, net)
+        self.policy_head = nn.Linear(hidden_size, n_actions)
+        self.critic_head = nn.Linear(hidden_size, 1)
+
+    def forward(
+        self, x: torch.Tensor, mask: Optional[torch.Tensor] = None
+    ) -> Tuple[Categorical, torch.Tensor, torch.Tensor]:
+        features = self.trunk(x.float())
+        dist = _get_dist(self.policy_head(features), mask)
+
+        return dist, dist.sample(), self.critic_head(features)
@@ -0,0 +1,131 @@
+"""
+The policies that the trainers' agents and actors act with.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import torch
+from torch import nn
+from torch.distributions import Categorical
+
+from gym_simplifiedtetris.trainers.networks import (
+    ActorNet,
+    CriticNet,
+    SharedActorCriticNet,
+)
+
+
+class ActorCritic(object):
+    """
+    An actor-critic made of separate actor and critic networks, returning
+    the tuple (dist, actions, log_probs, values) that rollout agents expect.
+
+    :param critic: the critic network.
+    :param actor: the actor network.
+    """
+
+    def __init__(self, critic: CriticNet, actor: ActorNet) -> None:
+        self.critic = critic
+        self.actor = actor
+
+    @torch.no_grad()
+    def __call__(
+        self, state: torch.Tensor, mask: Optional[torch.Tensor] = None
+    ) -> Tuple[Categorical, torch.Tensor, torch.Tensor, torch.Tensor]:
+        dist, action = self.actor(state, mask)
+
+        return dist, action, dist.log_prob(action), self.critic(state)
+
+
+class SharedActorCritic(object):
+    """
+    An actor-critic whose actor and critic share one network, returning the
+    tuple (dist, actions, log_probs, values) that rollout agents expect.
+
+    :param net: the shared network.
+    """
+
+    def __init__(self, net: SharedActorCriticNet) -> None:
+        self.net = net
+
+    @torch.no_grad()
+    def __call__(
+        self, state: torch.Tensor, mask: Optional[torch.Tensor] = None
+    ) -> Tuple[Categorical, torch.Tensor, torch.Tensor, torch.Tensor]:
+        dist, action, value = self.net(state, mask)
+
+        return dist, action, dist.log_prob(action), value
+
+
+def make_actor_critic(nets: Sequence[nn.Module], actor_idx: int, /) -> object:
+    """
+    Return the actor-critic of an actor process, acting with its copy of
+    the learner's networks.
+
+    :param nets: the shared network, or the critic and actor networks.
+    :param actor_idx: the actor's index.
+    :return: the actor-critic.
+    """
+    if len(nets) == 1:
+
+        return SharedActorCritic(nets[0])
+
+    return ActorCritic(nets[0], nets[1])
+
+
+class EpsilonGreedyPolicy(object):
+    """
+    The policy of a Q-learning actor process, returning the tuple (dist,
+    actions, log_probs, values) that rollout agents expect. The log-
+    probabilities are zero and the values are the maximum Q-values, since
+    neither is used by Q-learning.
+
+    :param net: the Q-network.
+    :param epsilon: the probability of selecting a random action.
+    """
+
+    def __init__(self, net: nn.Module, epsilon: float) -> None:
+        self.net = net
+        self.epsilon = epsilon
+
+    @torch.no_grad()
+    def __call__(
+        self, state: torch.Tensor, mask: Optional[torch.Tensor] = None
+    ) -> Tuple[None, torch.Tensor, torch.Tensor, torch.Tensor]:
+        q_values = self.net(state)
+        logits = torch.zeros_like(q_values)
+
+        if mask is not None:
+            q_values = q_values.masked_fill(~mask, float("-inf"))
+            logits = logits.masked_fill(~mask, float("-inf"))
+
+        explore = torch.rand(len(state)) < self.epsilon
+        action = torch.where(
+            explore, Categorical(logits=logits).sample(), q_values.argmax(1)
+        )
+
+        return None, action, torch.zeros(len(state)), q_values.max(1)[0]
+
+
+def make_epsilon_greedy_policy(
+    net: nn.Module,
+    actor_idx: int,
+    num_actors: int,
+    eps_base: Optional[float] = 0.4,
+    eps_alpha: Optional[float] = 7,
+) -> EpsilonGreedyPolicy:
+    """
+    Return the policy of a Q-learning actor process. As in Ape-X, each actor
+    explores with its own fixed epsilon, from eps_base for the first actor
+    down to eps_base**(1 + eps_alpha) for the last.
+
+    :param net: the actor's copy of the Q-network.
+    :param actor_idx: the actor's index.
+    :param num_actors: the number of actors.
+    :param eps_base: the epsilon of the first actor.
+    :param eps_alpha: the exponent that spreads the epsilons of the actors.
+    :return: the policy.
+    """
+    epsilon = eps_base ** (1 + eps_alpha * actor_idx / max(num_actors - 1, 1))
+
+    return EpsilonGreedyPolicy(net, epsilon)
@@ -0,0 +1,415 @@
+"""
+A Lightning module that trains a PPO agent.
+"""
+
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+import gym
+import numpy as np
+import torch
+from pytorch_lightning import LightningModule
+from torch import Tensor, nn
+from torch.distributions import Categorical
+from torch.optim import Adam, Optimizer
+from torch.utils.data import DataLoader, IterableDataset
+
+from gym_simplifiedtetris.trainers.env_fns import make_vec_env
+from gym_simplifiedtetris.trainers.networks import (
+    ActorNet,
+    CriticNet,
+    SharedActorCriticNet,
+)
+from gym_simplifiedtetris.trainers.policies import (
+    ActorCritic,
+    SharedActorCritic,
+    make_actor_critic,
+)
+from gym_simplifiedtetris.training import (
+    ActorLearner,
+    MetricsSink,
+    Rollout,
+    RolloutAgent,
+    RolloutBuffer,
+)
+
+
+class _RolloutDataset(IterableDataset):
+    """
+    A dataset that yields the minibatches made by a function, once per
+    iteration.
+
+    :param make_batches: the function that returns an iterator over the minibatches.
+    """
+
+    def __init__(self, make_batches: Callable[[], Iterator[Tuple[Tensor, ...]]]):
+        self.make_batches = make_batches
+
+    def __iter__(self) -> Iterator[Tuple[Tensor, ...]]:
+        return self.make_batches()
+
+
+class PPOLightning(LightningModule):
+    """
+    Trains an actor-critic with PPO's clipped objective. Every epoch, the
+    learner collects a rollout from its own vectorised env, or, if
+    num_actors is positive, trains on the next rollout of the actor
+    processes, corrected for their lag with V-trace. The actor and critic
+    are either separate networks with their own optimisers, or share one
+    trunk and are trained on a combined loss.
+
+    :param env_fns: the functions that create the envs, stepped by the learner or by each actor.
+    :param vec_env: the vectorised env used by the learner, 'shared_memory' or 'thread_pool'.
+    :param alr: the actor's learning rate, also used for the shared network.
+    :param clr: the critic's learning rate.
+    :param batch_size: the number of steps in each minibatch.
+    :param clip_eps: the clipping parameter.
+    :param lamb: the GAE parameter lambda.
+    :param epoch_steps: the number of steps per rollout, summed over the envs.
+    :param gamma: the discount factor.
+    :param network: the network of the actor and critic, 'mlp' or 'cnn'.
+    :param depth: the number of fully connected hidden layers of the actor, or of the shared trunk.
+    :param hidden_size: the number of units in each hidden layer.
+    :param critic_hidden_size: the number of units in the separate critic's hidden layer.
+    :param ppo_epochs: the number of passes over each rollout.
+    :param shared_trunk: whether the actor and critic share one network.
+    :param value_coef: the weight of the critic's loss when the trunk is shared.
+    :param mask_actions: whether to restrict the actions to those allowed by the envs' action masks.
+    :param num_actors: the number of actor processes; the learner steps the envs itself if zero.
+    :param max_staleness: the maximum number of versions an actor's rollout can lag behind.
+    :param rho_bar: the V-trace truncation level of the importance ratios.
+    :param c_bar: the V-trace truncation level of the trace coefficients.
+    :param metrics: the sink that each minibatch's METRICS are logged to; nothing is logged if None.
+    """
+
+    METRICS = ["step", "avg_ep_reward", "loss"]
+
+    def __init__(
+        self,
+        env_fns: Sequence[Callable[[], gym.Env]],
+        vec_env: Optional[str] = "shared_memory",
+        alr: Optional[float] = 6.99e-4,
+        clr: Optional[float] = 7.07e-4,
+        batch_size: Optional[int] = 80,
+        clip_eps: Optional[float] = 0.208,
+        lamb: Optional[float] = 0.953,
+        epoch_steps: Optional[int] = 2048,
+        gamma: Optional[float] = 0.99,
+        network: Optional[str] = "mlp",
+        depth: Optional[int] = 2,
+        hidden_size: Optional[int] = 64,
+        critic_hidden_size: Optional[int] = 100,
+        ppo_epochs: Optional[int] = 1,
+        shared_trunk: Optional[bool] = False,
+        value_coef: Optional[float] = 0.5,
+        mask_actions: Optional[bool] = False,
+        num_actors: Optional[int] = 0,
+        max_staleness: Optional[int] = 1,
+        rho_bar: Optional[float] = 1.0,
+        c_bar: Optional[float] = 1.0,
+        metrics: Optional[MetricsSink] = None,
+    ) -> None:
+        super().__init__()
+        self.save_hyperparameters(ignore=["env_fns", "metrics"])
+
+        self.metrics = metrics
+        num_envs = len(env_fns)
+
+        if num_actors:
+            # Each actor steps its own envs, so the learner only keeps one env
+            # for the spaces.
+            self.envs = make_vec_env(env_fns[:1], "thread_pool")
+        else:
+            self.envs = make_vec_env(env_fns, vec_env)
+
+        obs_size = self.envs.observation_space.shape[0]
+        n_actions = self.envs.action_space.n
+
+        # The action masks are stored so that the policy is trained under the
+        # masks it acted under.
+        env_steps = -(-epoch_steps // num_envs)
+        self.buffer = RolloutBuffer(
+            env_steps,
+            num_envs,
+            obs_size,
+            num_actions=n_actions if mask_actions else None,
+        )
+        self.avg_ep_reward = 0
+        self.num_episodes = 0
+
+        if shared_trunk:
+            self.net = SharedActorCriticNet(
+                obs_size, n_actions, depth, hidden_size, network
+            )
+            self.agent = SharedActorCritic(self.net)
+        else:
+            self.critic = CriticNet(obs_size, critic_hidden_size, network)
+            self.actor = ActorNet(obs_size, n_actions, depth, hidden_size, network)
+            self.agent = ActorCritic(self.critic, self.actor)
+
+        if num_actors:
+            self.actor_learner = ActorLearner(
+                self.actor_nets(),
+                make_actor_critic,
+                env_fns,
+                num_actors,
+                env_steps,
+                max_staleness=max_staleness,
+                mask_actions=mask_actions,
+            )
+        else:
+            self.actor_learner = None
+            self.rollout_agent = RolloutAgent(
+                self.envs, self.buffer, mask_actions=mask_actions
+            )
+
+    def actor_nets(self) -> nn.ModuleList:
+        """
+        Return the networks that the actors act with, in the order that
+        make_actor_critic expects.
+
+        :return: the networks.
+        """
+        if self.hparams.shared_trunk:
+
+            return nn.ModuleList([self.net])
+
+        return nn.ModuleList([self.critic, self.actor])
+
+    def forward(self, x: Tensor) -> Tuple[Categorical, Tensor, Tensor]:
+        """
+        Return the distribution over the actions, a sampled action and the
+        value of the states.
+
+        :param x: the states.
+        :return: the distribution, actions and values.
+        """
+        if self.hparams.shared_trunk:
+
+            return self.net(x)
+
+        dist, action = self.actor(x)
+
+        return dist, action, self.critic(x)
+
+    @torch.no_grad()
+    def get_action(self, state: np.array, /) -> int:
+        """
+        Return an action sampled from the policy in a state.
+
+        :param state: the state.
+        :return: the action.
+        """
+        _, action, _ = self(torch.as_tensor(state)[None])
+
+        return int(action.item())
+
+    def clip_loss(
+        self, dist: Categorical, action: Tensor, prob_old: Tensor, adv: Tensor, /
+    ) -> Tensor:
+        """
+        Return PPO's clipped surrogate loss.
+
+        :param dist: the distribution over the actions.
+        :param action: the actions taken.
+        :param prob_old: the log-probabilities of the actions when taken.
+        :param adv: the advantages.
+        :return: the loss.
+        """
+        ratio = torch.exp(dist.log_prob(action) - prob_old)
+        clip = torch.clamp(ratio, 1 - self.hparams.clip_eps, 1 + self.hparams.clip_eps)
+
+        return -(torch.min(ratio * adv, clip * adv)).mean()
+
+    def act_loss(
+        self,
+        state: Tensor,
+        action: Tensor,
+        prob_old: Tensor,
+        adv: Tensor,
+        mask: Optional[Tensor] = None,
+    ) -> Tensor:
+        """
+        Return the actor's loss.
+
+        :param state: the states.
+        :param action: the actions taken.
+        :param prob_old: the log-probabilities of the actions when taken.
+        :param adv: the advantages.
+        :param mask: the action masks the actions were taken under.
+        :return: the loss.
+        """
+        dist, _ = self.actor(state, mask)
+
+        return self.clip_loss(dist, action, prob_old, adv)
+
+    def crit_loss(self, state: Tensor, val: Tensor, /) -> Tensor:
+        """
+        Return the critic's mean squared error.
+
+        :param state: the states.
+        :param val: the returns.
+        :return: the loss.
+        """
+        return (val - self.critic(state).view(-1)).pow(2).mean()
+
+    def shared_loss(
+        self,
+        state: Tensor,
+        action: Tensor,
+        val: Tensor,
+        prob_old: Tensor,
+        adv: Tensor,
+        mask: Optional[Tensor] = None,
+    ) -> Tensor:
+        """
+        Return the combined loss of the shared network, running the trunk
+        once for both the actor and the critic.
+
+        :param state: the states.
+        :param action: the actions taken.
+        :param val: the returns.
+        :param prob_old: the log-probabilities of the actions when taken.
+        :param adv: the advantages.
+        :param mask: the action masks the actions were taken under.
+        :return: the loss.
+        """
+        dist, _, val_new = self.net(state, mask)
+        act_loss = self.clip_loss(dist, action, prob_old, adv)
+        crit_loss = (val - val_new.view(-1)).pow(2).mean()
+
+        return act_loss + self.hparams.value_coef * crit_loss
+
+    def load_rollout(self, rollout: Rollout, /) -> None:
+        """
+        Load an actor's rollout into the rollout buffer, with V-trace targets
+        that correct for the actor's policy lagging behind the learner's.
+
+        :param rollout: the rollout.
+        """
+        num_steps, num_envs = rollout.actions.shape
+        mask_actions = self.hparams.mask_actions
+
+        states = torch.as_tensor(rollout.states).view(num_steps * num_envs, -1)
+        masks = (
+            torch.as_tensor(rollout.action_masks).view(num_steps * num_envs, -1)
+            if mask_actions
+            else None
+        )
+        dist, _, _, values = self.agent(states, masks)
+        target_log_probs = dist.log_prob(
+            torch.as_tensor(rollout.actions).view(-1)
+        ).view(num_steps, num_envs)
+        values = values.view(num_steps, num_envs)
+
+        last_states = torch.as_tensor(rollout.last_states, dtype=torch.float32)
+        last_masks = (
+            torch.as_tensor(rollout.last_action_masks) if mask_actions else None
+        )
+        _, _, _, last_values = self.agent(last_states, last_masks)
+
+        self.buffer.reset()
+
+        for step in range(num_steps):
+            self.buffer.add(
+                rollout.states[step],
+                rollout.actions[step],
+                rollout.log_probs[step],
+                rollout.rewards[step],
+                rollout.dones[step],
+                values[step].cpu().numpy(),
+                rollout.action_masks[step] if mask_actions else None,
+            )
+
+        self.buffer.compute_vtrace_targets(
+            target_log_probs.cpu().numpy(),
+            last_values.view(-1).cpu().numpy(),
+            self.hparams.gamma,
+            self.hparams.lamb,
+            self.hparams.rho_bar,
+            self.hparams.c_bar,
+        )
+
+    def make_batches(self) -> Iterator[Tuple[Tensor, ...]]:
+        """
+        Fill the rollout buffer, then yield its minibatches. Episodes still
+        running at the end of the rollout carry on into the next one.
+
+        :return: the minibatches.
+        """
+        if self.actor_learner is not None:
+            # The actors get the latest weights, and the learner trains on the
+            # next rollout that is recent enough.
+            self.actor_learner.publish(self.actor_nets())
+            rollout = self.actor_learner.get_rollout()
+            self.load_rollout(rollout)
+            ep_rewards = rollout.ep_rewards
+        else:
+            ep_rewards, _ = self.rollout_agent.collect_rollout(
+                self.agent, self.hparams.gamma, self.hparams.lamb
+            )
+
+        self.num_episodes = len(ep_rewards)
+
+        if ep_rewards:
+            self.avg_ep_reward = sum(ep_rewards) / len(ep_rewards)
+
+        yield from self.buffer.get_minibatches(
+            self.hparams.batch_size, self.hparams.ppo_epochs
+        )
+
+    def training_step(
+        self,
+        batch: Tuple[Tensor, ...],
+        batch_idx: int,
+        optimizer_idx: Optional[int] = None,
+    ) -> Tensor:
+        state, action, prob_old, val, adv = batch[:5]
+        mask = batch[5] if self.hparams.mask_actions else None
+
+        adv = (adv - adv.mean()) / adv.std()
+
+        # The rewards of the rollout's episodes are logged as their mean, in
+        # one call, rather than one call per episode.
+        self.log_dict(
+            {"avg_ep_reward": self.avg_ep_reward, "num_episodes": self.num_episodes},
+            prog_bar=True,
+            on_epoch=True,
+        )
+
+        if self.hparams.shared_trunk:
+            loss = self.shared_loss(state, action, val, prob_old, adv, mask)
+            self.log("loss", loss, on_epoch=True, prog_bar=True)
+        elif optimizer_idx == 0:
+            loss = self.act_loss(state, action, prob_old, adv, mask)
+            self.log("act_loss", loss, on_epoch=True, prog_bar=True)
+        else:
+            loss = self.crit_loss(state, val)
+            self.log("crit_loss", loss, on_epoch=True, prog_bar=True)
+
+        if self.metrics is not None:
+            self.metrics.log(
+                step=self.global_step, avg_ep_reward=self.avg_ep_reward, loss=loss
+            )
+
+        return loss
+
+    def on_train_end(self) -> None:
+        if self.actor_learner is not None:
+            self.actor_learner.close()
+
+        self.envs.close()
+
+    def configure_optimizers(self) -> List[Optimizer]:
+        if self.hparams.shared_trunk:
+
+            return [Adam(self.net.parameters(), lr=self.hparams.alr)]
+
+        return [
+            Adam(self.actor.parameters(), lr=self.hparams.alr),
+            Adam(self.critic.parameters(), lr=self.hparams.clr),
+        ]
+
+    def train_dataloader(self) -> DataLoader:
+        # The dataset yields ready-made minibatches, so the loader does not
+        # collate them.
+        return DataLoader(dataset=_RolloutDataset(self.make_batches), batch_size=None)
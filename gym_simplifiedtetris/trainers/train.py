@@ -0,0 +1,161 @@
+"""
+The command line entry point that trains an agent from a config.
+
+Usage: python -m gym_simplifiedtetris.trainers [--config PATH] [name=value ...]
+"""
+
+import argparse
+import os
+from typing import Optional, Sequence
+
+import gym
+import numpy as np
+from pytorch_lightning import Callback, LightningModule, Trainer
+from pytorch_lightning.loggers import TensorBoardLogger
+
+from gym_simplifiedtetris.trainers.config import TrainerConfig, load_config
+from gym_simplifiedtetris.trainers.dqn_lightning import DQNLightning
+from gym_simplifiedtetris.trainers.env_fns import get_num_cells, make_env, make_env_fns
+from gym_simplifiedtetris.trainers.ppo_lightning import PPOLightning
+from gym_simplifiedtetris.training import MetricsSink, allocate_run
+
+
+class LineCountCallback(Callback):
+    """
+    Logs the number of times each number of rows was cleared by the
+    learner's envs during each epoch.
+    """
+
+    def on_train_epoch_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        if pl_module.actor_learner is not None:
+
+            return
+
+        line_counts = np.sum(pl_module.envs.env_method("pop_line_counts"), axis=0)
+
+        for num_rows, count in enumerate(line_counts, 1):
+            pl_module.log(f"lines_{num_rows}", float(count), logger=True)
+
+
+def build_model(
+    config: TrainerConfig, metrics: Optional[MetricsSink] = None
+) -> LightningModule:
+    """
+    Return the Lightning module of a config's algorithm, training on the
+    config's envs.
+
+    :param config: the config.
+    :param metrics: the sink that the training metrics are logged to.
+    :return: the Lightning module.
+    """
+    kwargs = dict(
+        vec_env=config.vec_env,
+        network=config.network,
+        mask_actions=config.mask_actions,
+        num_actors=config.num_actors,
+        metrics=metrics,
+        **config.hparams,
+    )
+
+    if config.algo == "dqn":
+
+        return DQNLightning(
+            make_env_fns(config),
+            num_cells=get_num_cells(config),
+            history_len=config.history_len,
+            **kwargs,
+        )
+
+    return PPOLightning(make_env_fns(config), **kwargs)
+
+
+def evaluate(model: LightningModule, env: gym.Env, num_games: int) -> float:
+    """
+    Return the mean return of the model over several games.
+
+    :param model: the trained Lightning module.
+    :param env: the env.
+    :param num_games: the number of games.
+    :return: the mean return.
+    """
+    ep_returns = []
+
+    for _ in range(num_games):
+        state = env.reset()
+        done = False
+        ep_return = 0
+
+        while not done:
+            state, reward, done, _ = env.step(model.get_action(state))
+            ep_return += reward
+
+        ep_returns.append(ep_return)
+
+    env.close()
+
+    return float(np.mean(ep_returns))
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments.
+
+    :param argv: the arguments; sys.argv[1:] if None.
+    :return: the parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Train an agent on simplified Tetris, as set by a config."
+    )
+    parser.add_argument("--config", help="the path of the JSON config.")
+    parser.add_argument(
+        "overrides",
+        nargs="*",
+        metavar="name=value",
+        help="config fields to override, with hyperparameters named hparams.name.",
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> float:
+    """
+    Train an agent as set by the config given on the command line, then
+    evaluate it.
+
+    :param argv: the command line arguments; sys.argv[1:] if None.
+    :return: the trained agent's mean return.
+    """
+    args = parse_args(argv)
+    config = load_config(args.config, args.overrides)
+
+    model_class = DQNLightning if config.algo == "dqn" else PPOLightning
+    run_id, metrics_path = allocate_run(
+        os.path.join(config.log_dir, f"trainingvals{config.algo.upper()}"),
+        f"{{}}.{config.metrics_format}",
+    )
+    metrics = MetricsSink(metrics_path, model_class.METRICS, config.metrics_interval)
+
+    with metrics:
+        model = build_model(config, metrics)
+        trainer = Trainer(
+            accelerator=config.accelerator,
+            max_epochs=config.num_epochs,
+            # The TensorBoard logs share the metrics' run id, rather than
+            # counting the versions already logged.
+            logger=TensorBoardLogger(config.log_dir, version=run_id),
+            callbacks=[LineCountCallback()],
+        )
+        trainer.fit(model)
+
+    eval_env = make_env(
+        config.obs_type,
+        config.grid_dims,
+        config.piece_size,
+        config.reward,
+        config.history_len,
+    )
+    mean_return = evaluate(model, eval_env, config.num_eval_games)
+
+    print(f"Mean return over {config.num_eval_games} games: {mean_return:.1f}")
+
+    return mean_return
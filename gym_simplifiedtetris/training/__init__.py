@@ -0,0 +1,51 @@
+"""Initialise the training package."""
+
+from gym_simplifiedtetris.training.actor_learner import ActorLearner, Rollout
+from gym_simplifiedtetris.training.advantages import (
+    compute_gae,
+    compute_returns,
+    compute_vtrace,
+)
+from gym_simplifiedtetris.training.asha_scheduler import ASHAScheduler
+from gym_simplifiedtetris.training.history_replay_buffer import HistoryReplayBuffer
+from gym_simplifiedtetris.training.metrics_sink import MetricsSink
+from gym_simplifiedtetris.training.prioritized_replay_buffer import (
+    PrioritizedHistoryReplayBuffer,
+    PrioritizedReplayBuffer,
+)
+from gym_simplifiedtetris.training.recurrent_rollout_buffer import (
+    RecurrentRolloutBuffer,
+)
+from gym_simplifiedtetris.training.replay_buffer import Experience, ReplayBuffer
+from gym_simplifiedtetris.training.replay_dataset import ReplayDataset
+from gym_simplifiedtetris.training.rollout_agent import RolloutAgent
+from gym_simplifiedtetris.training.rollout_buffer import RolloutBuffer
+from gym_simplifiedtetris.training.run_registry import allocate_run
+from gym_simplifiedtetris.training.shared_memory_vec_env import SharedMemoryVecEnv
+from gym_simplifiedtetris.training.sum_tree import SumTree
+from gym_simplifiedtetris.training.thread_pool_vec_env import ThreadPoolVecEnv
+from gym_simplifiedtetris.training.vec_env_agent import VecEnvAgent
+
+__all__ = [
+    "ActorLearner",
+    "allocate_run",
+    "ASHAScheduler",
+    "compute_gae",
+    "compute_returns",
+    "compute_vtrace",
+    "Experience",
+    "HistoryReplayBuffer",
+    "MetricsSink",
+    "PrioritizedHistoryReplayBuffer",
+    "PrioritizedReplayBuffer",
+    "RecurrentRolloutBuffer",
+    "ReplayBuffer",
+    "ReplayDataset",
+    "Rollout",
+    "RolloutAgent",
+    "RolloutBuffer",
+    "SharedMemoryVecEnv",
+    "SumTree",
+    "ThreadPoolVecEnv",
+    "VecEnvAgent",
+]
@@ -0,0 +1,45 @@
+"""
+Functions that gather the action masks of vectorised envs.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+def _reset_action_masks(vec_env: Any, /) -> np.ndarray:
+    """
+    Return the action masks of every env, fetched from the envs themselves.
+
+    :param vec_env: the vectorised env.
+    :return: the masks, with shape (num_envs, num_actions).
+    """
+    return np.stack(vec_env.env_method("action_masks"))
+
+
+def _get_action_masks(
+    vec_env: Any, dones: np.array, infos: List[Dict[str, Any]], /
+) -> np.ndarray:
+    """
+    Return the action masks of every env after a step. The masks are taken
+    from the info dicts, except for the envs that have been reset, whose
+    masks are fetched from the envs themselves.
+
+    :param vec_env: the vectorised env.
+    :param dones: whether each env's game ended during the step.
+    :param infos: the info dicts returned by the step.
+    :return: the masks, with shape (num_envs, num_actions).
+    """
+    reset_indices = np.flatnonzero(dones).tolist()
+    reset_masks = (
+        iter(vec_env.env_method("action_masks", indices=reset_indices))
+        if reset_indices
+        else iter(())
+    )
+
+    return np.stack(
+        [
+            next(reset_masks) if done else info["action_mask"]
+            for done, info in zip(dones, infos)
+        ]
+    )
@@ -0,0 +1,63 @@
+"""
+Functions that pack obs into bytes for storage and unpack them.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+def _get_packed_size(obs_size: int, num_cells: Optional[int], /) -> int:
+    """
+    Return the number of elements in each stored obs.
+
+    :param obs_size: the number of elements in each obs.
+    :param num_cells: the number of binary grid cells at the start of each obs; the obs are not packed if None.
+    :return: the number of elements stored.
+    """
+    if num_cells is None:
+
+        return obs_size
+
+    return -(-num_cells // 8) + obs_size - num_cells
+
+
+def _pack_obs(obs: np.array, num_cells: Optional[int], /) -> np.array:
+    """
+    Pack the binary grid cells at the start of the obs eight to a byte,
+    leaving the remaining elements, such as the piece id, unchanged.
+
+    :param obs: the observation.
+    :param num_cells: the number of binary grid cells at the start of the obs; the obs is returned unchanged if None.
+    :return: the packed obs.
+    """
+    if num_cells is None:
+
+        return obs
+
+    return np.concatenate(
+        [np.packbits(obs[:num_cells].astype("bool")), obs[num_cells:]]
+    )
+
+
+def _unpack_obs(rows: np.ndarray, num_cells: Optional[int], /) -> np.ndarray:
+    """
+    Unpack a batch of packed obs.
+
+    :param rows: the packed obs, with shape (batch_size, packed_size).
+    :param num_cells: the number of binary grid cells at the start of each obs; the rows are returned unchanged if None.
+    :return: the observations, with shape (batch_size, obs_size).
+    """
+    if num_cells is None:
+
+        return rows
+
+    num_bytes = -(-num_cells // 8)
+
+    return np.concatenate(
+        [
+            np.unpackbits(rows[:, :num_bytes], axis=1, count=num_cells),
+            rows[:, num_bytes:],
+        ],
+        axis=1,
+    )
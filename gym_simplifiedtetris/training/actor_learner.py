@@ -0,0 +1,277 @@
+"""
+A class that collects rollouts in actor processes while a learner trains.
+"""
+
+import queue
+import time
+from collections import namedtuple
+from copy import deepcopy
+from typing import Any, Callable, Optional, Sequence
+
+import gym
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from torch import nn
+
+from gym_simplifiedtetris.training.rollout_agent import RolloutAgent
+from gym_simplifiedtetris.training.rollout_buffer import RolloutBuffer
+from gym_simplifiedtetris.training.thread_pool_vec_env import ThreadPoolVecEnv
+
+# Named tuple for storing the rollouts sent by the actors, with shape
+# (num_steps, num_envs, ...). The action masks are None unless masked.
+Rollout = namedtuple(
+    "Rollout",
+    field_names=[
+        "states",
+        "actions",
+        "log_probs",
+        "rewards",
+        "dones",
+        "action_masks",
+        "last_states",
+        "last_action_masks",
+        "ep_rewards",
+        "actor_idx",
+        "version",
+    ],
+)
+
+
+class ActorLearner(object):
+    """
+    Runs actor processes that collect rollouts with copies of the learner's
+    network, in the style of IMPALA and Ape-X, so that the envs are stepped
+    while the learner trains. Each actor steps its own vectorised envs with
+    a policy built from its copy of the network, and sends each rollout to
+    a bounded queue, tagged with the version of the weights it was collected
+    with. The learner publishes new weights to shared memory, and the actors
+    load them before their next rollout. Rollouts more than max_staleness
+    versions old are discarded by the learner; otherwise their lag should
+    be corrected for, such as with V-trace.
+
+    The policy should return a tuple (dist, actions, log_probs, values) for
+    a batch of states, and the action masks of the envs as a second argument
+    if the actions are masked. The envs of each actor are reseeded from seed,
+    so that the actors play different games.
+
+    :param net: the learner's network; a copy is shared with the actors.
+    :param make_policy: the function that returns an actor's policy, given its copy of the network and its index; it must be picklable unless the actors are forked.
+    :param env_fns: the functions that create each actor's envs.
+    :param num_actors: the number of actor processes.
+    :param num_steps: the number of steps per env in each rollout.
+    :param max_staleness: the maximum number of versions a rollout can lag behind; no limit if None.
+    :param queue_size: the maximum number of rollouts waiting in the queue; defaults to twice the number of actors.
+    :param mask_actions: whether to pass the envs' action masks to the policy.
+    :param seed: the seed used to seed each actor's envs and policy.
+    :param start_method: the method used to start the actors; defaults to multiprocessing's default.
+    """
+
+    def __init__(
+        self,
+        net: nn.Module,
+        make_policy: Callable[[nn.Module, int], Callable],
+        env_fns: Sequence[Callable[[], gym.Env]],
+        num_actors: int,
+        num_steps: int,
+        max_staleness: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        mask_actions: Optional[bool] = False,
+        seed: Optional[int] = None,
+        start_method: Optional[str] = None,
+    ) -> None:
+        assert num_actors >= 1, "num_actors should be positive."
+
+        self.max_staleness = max_staleness
+        self.num_stale = 0
+
+        context = mp.get_context(start_method)
+        self._shared_net = deepcopy(net).cpu().share_memory()
+        self._version = context.Value("i", 0)
+        self._queue = context.Queue(
+            2 * num_actors if queue_size is None else queue_size
+        )
+        self._stop = context.Event()
+
+        actor_seeds = np.random.SeedSequence(seed).generate_state(num_actors)
+        self._processes = [
+            context.Process(
+                target=_run_actor,
+                args=(
+                    actor_idx,
+                    self._shared_net,
+                    self._version,
+                    self._queue,
+                    self._stop,
+                    make_policy,
+                    env_fns,
+                    num_steps,
+                    mask_actions,
+                    int(actor_seeds[actor_idx]),
+                ),
+                daemon=True,
+            )
+            for actor_idx in range(num_actors)
+        ]
+
+        for process in self._processes:
+            process.start()
+
+    @property
+    def version(self) -> int:
+        """
+        Return the version of the weights last published.
+
+        :return: the version.
+        """
+        return self._version.value
+
+    def publish(self, net: nn.Module, /) -> None:
+        """
+        Copy the network's weights to shared memory, for the actors to load
+        before their next rollout.
+
+        :param net: the learner's network.
+        """
+        with self._version.get_lock():
+            self._shared_net.load_state_dict(net.state_dict())
+            self._version.value += 1
+
+    def get_rollout(self, timeout: Optional[float] = None) -> Optional[Rollout]:
+        """
+        Return the next rollout that is recent enough, counting those that
+        are discarded. Raise an error if an actor has exited while waiting.
+
+        :param timeout: the number of seconds to wait for a rollout; no limit if None.
+        :return: the rollout, or None if none arrived in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            # Waiting in short intervals lets the actors be checked.
+            wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+
+            try:
+                rollout = self._queue.get(timeout=max(wait, 0))
+            except queue.Empty:
+                if not all(process.is_alive() for process in self._processes):
+                    raise RuntimeError("An actor process exited unexpectedly.")
+
+                if deadline is not None and time.monotonic() >= deadline:
+
+                    return None
+
+                continue
+
+            if (
+                self.max_staleness is None
+                or self.version - rollout.version <= self.max_staleness
+            ):
+
+                return rollout
+
+            self.num_stale += 1
+
+    def close(self) -> None:
+        """
+        Stop the actors.
+        """
+        self._stop.set()
+
+        for process in self._processes:
+            process.join(timeout=5)
+
+            if process.is_alive():
+                process.terminate()
+
+        self._queue.close()
+
+
+def _run_actor(
+    actor_idx: int,
+    shared_net: nn.Module,
+    version: Any,
+    rollout_queue: Any,
+    stop: Any,
+    make_policy: Callable[[nn.Module, int], Callable],
+    env_fns: Sequence[Callable[[], gym.Env]],
+    num_steps: int,
+    mask_actions: bool,
+    seed: int,
+) -> None:
+    """
+    Collect rollouts and send them to the learner until told to stop,
+    loading the latest weights before each rollout.
+
+    :param actor_idx: the actor's index.
+    :param shared_net: the network whose weights are published by the learner.
+    :param version: the version of the weights published.
+    :param rollout_queue: the queue the rollouts are sent to.
+    :param stop: the event set when the actors should stop.
+    :param make_policy: the function that returns the actor's policy.
+    :param env_fns: the functions that create the actor's envs.
+    :param num_steps: the number of steps per env in each rollout.
+    :param mask_actions: whether to pass the envs' action masks to the policy.
+    :param seed: the seed used to seed the actor's envs and policy.
+    """
+    # Each actor runs its policy on a single thread, so that the actors and
+    # the learner do not compete for the cores.
+    torch.set_num_threads(1)
+    torch.manual_seed(seed)
+
+    # The rollouts still queued when the learner stops are discarded.
+    rollout_queue.cancel_join_thread()
+
+    net = deepcopy(shared_net)
+    policy = make_policy(net, actor_idx)
+
+    vec_env = ThreadPoolVecEnv(env_fns)
+    env_seeds = np.random.SeedSequence(seed).generate_state(vec_env.num_envs)
+
+    for env, env_seed in zip(vec_env.envs, env_seeds):
+        env.unwrapped._seed(int(env_seed))
+
+    rollout_buffer = RolloutBuffer(
+        num_steps,
+        vec_env.num_envs,
+        vec_env.observation_space.shape[0],
+        num_actions=vec_env.action_space.n if mask_actions else None,
+    )
+    agent = RolloutAgent(vec_env, rollout_buffer, mask_actions)
+    net_version = None
+
+    while not stop.is_set():
+        if net_version != version.value:
+            with version.get_lock():
+                net.load_state_dict(shared_net.state_dict())
+                net_version = version.value
+
+        rollout_buffer.reset()
+        ep_rewards = []
+
+        while not rollout_buffer.is_full:
+            ep_rewards += agent.play_step(policy)
+
+        rollout = Rollout(
+            rollout_buffer.states.copy(),
+            rollout_buffer.actions.copy(),
+            rollout_buffer.log_probs.copy(),
+            rollout_buffer.rewards.copy(),
+            rollout_buffer.dones.copy(),
+            None if not mask_actions else rollout_buffer.action_masks.copy(),
+            agent.states.copy(),
+            None if not mask_actions else agent.action_masks.copy(),
+            ep_rewards,
+            actor_idx,
+            net_version,
+        )
+
+        # Waiting in short intervals lets the actor stop while the queue is full.
+        while not stop.is_set():
+            try:
+                rollout_queue.put(rollout, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+    vec_env.close()
@@ -0,0 +1,200 @@
+"""
+Functions that compute discounted returns, GAE advantages and V-trace targets
+over rollouts.
+
+The rollouts have shape (num_steps, num_envs) and can be either NumPy arrays
+or torch tensors; the results have the same type. dones[t] indicates whether
+the episode ended after step t, in which case nothing is bootstrapped from the
+following step. last_values, with shape (num_envs), holds the values of the
+states reached after the final step, which are bootstrapped from unless the
+final step ended the episode.
+
+Every function is vectorised over the envs, and computes the per-step terms
+for every step at once, but the discounted sums over the steps stay a Python
+loop running backwards through the rollouts. A reversed lfilter or cumulative
+product would need a constant discount, which the dones, and the importance
+weights in V-trace, make vary from step to step; the loop costs num_steps
+small vector operations, and works on both arrays and tensors.
+"""
+
+from typing import Any, Tuple
+
+import numpy as np
+import torch
+
+
+def compute_returns(rewards: Any, dones: Any, last_values: Any, gamma: float, /) -> Any:
+    """
+    Return the discounted returns of every step of the rollouts.
+
+    :param rewards: the rewards, with shape (num_steps, num_envs).
+    :param dones: whether the episode ended after each step, with shape (num_steps, num_envs).
+    :param last_values: the values of the states reached after the final step, with shape (num_envs).
+    :param gamma: the discount factor.
+    :return: the returns, with shape (num_steps, num_envs).
+    """
+    not_dones = _get_not_dones(dones, last_values)
+    returns = _zeros_like(not_dones)
+    next_returns = last_values
+
+    # Each iteration updates every env at once.
+    for step in reversed(range(len(not_dones))):
+        next_returns = rewards[step] + gamma * not_dones[step] * next_returns
+        returns[step] = next_returns
+
+    return returns
+
+
+def compute_gae(
+    rewards: Any,
+    values: Any,
+    dones: Any,
+    last_values: Any,
+    gamma: float,
+    lamb: float,
+    /,
+) -> Tuple[Any, Any]:
+    """
+    Return the GAE(lambda) advantages of every step of the rollouts, and the
+    lambda-returns, which are the advantages plus the values.
+
+    :param rewards: the rewards, with shape (num_steps, num_envs).
+    :param values: the values of the states at each step, with shape (num_steps, num_envs).
+    :param dones: whether the episode ended after each step, with shape (num_steps, num_envs).
+    :param last_values: the values of the states reached after the final step, with shape (num_envs).
+    :param gamma: the discount factor.
+    :param lamb: the GAE parameter lambda.
+    :return: the advantages and the lambda-returns, with shape (num_steps, num_envs).
+    """
+    not_dones = _get_not_dones(dones, values)
+
+    next_values = _zeros_like(not_dones)
+    next_values[:-1] = values[1:]
+    next_values[-1] = last_values
+
+    # The TD errors can be computed for every step at once; only the
+    # discounted sum over them has to run backwards through the steps.
+    deltas = rewards + gamma * not_dones * next_values - values
+
+    advantages = _zeros_like(not_dones)
+    next_advantages = 0
+
+    for step in reversed(range(len(values))):
+        next_advantages = (
+            deltas[step] + gamma * lamb * not_dones[step] * next_advantages
+        )
+        advantages[step] = next_advantages
+
+    return advantages, advantages + values
+
+
+def compute_vtrace(
+    behaviour_log_probs: Any,
+    target_log_probs: Any,
+    rewards: Any,
+    values: Any,
+    dones: Any,
+    last_values: Any,
+    gamma: float,
+    lamb: float,
+    rho_bar: float = 1.0,
+    c_bar: float = 1.0,
+    /,
+) -> Tuple[Any, Any]:
+    """
+    Return the V-trace value targets of every step of the rollouts, and the
+    advantages used by the policy gradient, for rollouts collected by a
+    behaviour policy that may lag behind the target policy being trained.
+    The importance weights are truncated at rho_bar in the TD errors and at
+    c_bar in the traces, which are also decayed by lambda. When the two
+    policies are equal, the value targets are the lambda-returns.
+
+    :param behaviour_log_probs: the log-probabilities of the actions under the behaviour policy, with shape (num_steps, num_envs).
+    :param target_log_probs: the log-probabilities of the actions under the target policy, with shape (num_steps, num_envs).
+    :param rewards: the rewards, with shape (num_steps, num_envs).
+    :param values: the values of the states at each step under the target policy, with shape (num_steps, num_envs).
+    :param dones: whether the episode ended after each step, with shape (num_steps, num_envs).
+    :param last_values: the values of the states reached after the final step, with shape (num_envs).
+    :param gamma: the discount factor.
+    :param lamb: the trace decay parameter lambda.
+    :param rho_bar: the truncation threshold of the importance weights in the TD errors.
+    :param c_bar: the truncation threshold of the importance weights in the traces.
+    :return: the value targets and the policy gradient advantages, with shape (num_steps, num_envs).
+    """
+    not_dones = _get_not_dones(dones, values)
+    log_ratios = target_log_probs - behaviour_log_probs
+    rhos = _get_truncated_ratios(log_ratios, rho_bar)
+    cs = lamb * _get_truncated_ratios(log_ratios, c_bar)
+
+    next_values = _zeros_like(not_dones)
+    next_values[:-1] = values[1:]
+    next_values[-1] = last_values
+
+    deltas = rhos * (rewards + gamma * not_dones * next_values - values)
+
+    # As in compute_gae, only the discounted sum of the TD errors runs
+    # backwards through the steps, with a discount that varies with cs.
+    corrections = _zeros_like(not_dones)
+    next_corrections = 0
+
+    for step in reversed(range(len(values))):
+        next_corrections = (
+            deltas[step] + gamma * cs[step] * not_dones[step] * next_corrections
+        )
+        corrections[step] = next_corrections
+
+    value_targets = corrections + values
+
+    next_value_targets = _zeros_like(not_dones)
+    next_value_targets[:-1] = value_targets[1:]
+    next_value_targets[-1] = last_values
+
+    advantages = rhos * (rewards + gamma * not_dones * next_value_targets - values)
+
+    return value_targets, advantages
+
+
+def _get_not_dones(dones: Any, like: Any, /) -> Any:
+    """
+    Return one where the episode continued after the step and zero where it
+    ended, using a float dtype that like can be cast to.
+
+    :param dones: whether the episode ended after each step.
+    :param like: the array or tensor whose type and dtype are used.
+    :return: the mask.
+    """
+    if torch.is_tensor(like):
+        dtype = torch.promote_types(like.dtype, torch.float32)
+
+        return 1 - torch.as_tensor(dones, device=like.device).to(dtype)
+
+    return 1 - np.asarray(dones, dtype=np.result_type(like, np.float32))
+
+
+def _zeros_like(like: Any, /) -> Any:
+    """
+    Return zeros with the same shape, type and dtype as like.
+
+    :param like: the array or tensor.
+    :return: the zeros.
+    """
+    if torch.is_tensor(like):
+
+        return torch.zeros_like(like)
+
+    return np.zeros_like(like)
+
+
+def _get_truncated_ratios(log_ratios: Any, threshold: float, /) -> Any:
+    """
+    Return the importance weights, truncated at the threshold.
+
+    :param log_ratios: the log-ratios of the target and behaviour probabilities.
+    :param threshold: the truncation threshold.
+    :return: the truncated importance weights.
+    """
+    if torch.is_tensor(log_ratios):
+
+        return torch.clamp(torch.exp(log_ratios), max=threshold)
+
+    return np.minimum(np.exp(log_ratios), threshold)
@@ -0,0 +1,121 @@
+"""
+A class that stops unpromising trials of a hyperparameter search early.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+
+class ASHAScheduler(object):
+    """
+    Decides which trials of a hyperparameter search to stop early, using
+    asynchronous successive halving (ASHA). The rungs are at resources
+    min_resource * reduction_factor**k, such as numbers of epochs. When a
+    trial reports a score having reached a rung, it continues only if its
+    score is among the best 1/reduction_factor of the scores reported at
+    that rung so far, or is the best if fewer trials have reached the rung.
+    Trials are never held back to wait for others, so that every worker is
+    kept busy. Higher scores are better.
+
+    :param min_resource: the resource of the lowest rung.
+    :param reduction_factor: the factor by which the resource grows, and the number of trials shrinks, from one rung to the next.
+    :param max_resource: the resource at which trials end, above the highest rung; no limit if None.
+    """
+
+    def __init__(
+        self,
+        min_resource: float,
+        reduction_factor: Optional[int] = 3,
+        max_resource: Optional[float] = None,
+    ) -> None:
+        assert min_resource > 0, "min_resource should be positive."
+        assert reduction_factor >= 2, "reduction_factor should be at least 2."
+
+        self.min_resource = min_resource
+        self.reduction_factor = reduction_factor
+        self.max_resource = max_resource
+
+        self._rung_scores: Dict[int, List[float]] = {}
+        self._trial_rungs: Dict[int, int] = {}
+        self._reports: Dict[int, List[Tuple[float, float]]] = {}
+        self._stopped = set()
+
+    def report(self, trial_id: int, resource: float, score: float, /) -> bool:
+        """
+        Record a trial's score after using the resource given, and return
+        whether the trial should continue. The score is compared at every
+        rung the trial has reached since its last report.
+
+        :param trial_id: the trial's id.
+        :param resource: the resource used by the trial so far.
+        :param score: the trial's score.
+        :return: whether the trial should continue.
+        """
+        self._reports.setdefault(trial_id, []).append((resource, score))
+
+        if trial_id in self._stopped:
+
+            return False
+
+        for rung in range(
+            self._trial_rungs.get(trial_id, -1) + 1, self._get_rung(resource) + 1
+        ):
+            self._trial_rungs[trial_id] = rung
+            rung_scores = self._rung_scores.setdefault(rung, [])
+            rung_scores.append(score)
+
+            if not self._is_promotable(score, rung_scores):
+                self._stopped.add(trial_id)
+
+                return False
+
+        return True
+
+    def get_reports(self, trial_id: int, /) -> List[Tuple[float, float]]:
+        """
+        Return the resources and scores reported by a trial.
+
+        :param trial_id: the trial's id.
+        :return: the reports, in order.
+        """
+        return list(self._reports.get(trial_id, []))
+
+    def is_stopped(self, trial_id: int, /) -> bool:
+        """
+        Return whether a trial has been told to stop early.
+
+        :param trial_id: the trial's id.
+        :return: whether the trial was stopped.
+        """
+        return trial_id in self._stopped
+
+    def _get_rung(self, resource: float, /) -> int:
+        """
+        Return the highest rung reached with the resource given, excluding
+        rungs at or above max_resource, where trials end anyway.
+
+        :param resource: the resource used.
+        :return: the rung, or -1 if the lowest rung has not been reached.
+        """
+        rung = -1
+        rung_resource = self.min_resource
+
+        while rung_resource <= resource and (
+            self.max_resource is None or rung_resource < self.max_resource
+        ):
+            rung += 1
+            rung_resource *= self.reduction_factor
+
+        return rung
+
+    def _is_promotable(self, score: float, rung_scores: List[float], /) -> bool:
+        """
+        Return whether a score is among the best 1/reduction_factor of the
+        scores at a rung, or is the best if there are too few scores.
+
+        :param score: the score.
+        :param rung_scores: the scores reported at the rung, including this one.
+        :return: whether the trial can continue.
+        """
+        num_promoted = max(len(rung_scores) // self.reduction_factor, 1)
+
+        return score >= sorted(rung_scores, reverse=True)[num_promoted - 1]
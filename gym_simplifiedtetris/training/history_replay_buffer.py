@@ -0,0 +1,266 @@
+"""
+A replay buffer class for agents that observe a history of frames.
+"""
+
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+from gym_simplifiedtetris.training._obs_packing import (
+    _get_packed_size,
+    _pack_obs,
+    _unpack_obs,
+)
+from gym_simplifiedtetris.training.replay_buffer import Experience
+
+
+class HistoryReplayBuffer(object):
+    """
+    A replay buffer for agents whose states are the last history_len obs
+    stacked together. Each obs is stored once, in a ring of frames, and the
+    stacks are rebuilt by index when sampling. Frames from before the start
+    of an episode are zero, matching agents that pad their history with zeros
+    on reset. Experiences are appended with single obs as states, or with
+    stacks, of which only the last obs is stored; the state of each
+    experience is assumed to be the new state of the previous one from the
+    same stream, unless the previous experience ended the episode. The
+    experiences of several envs can be stored as separate streams, each
+    kept in its own segment of the ring. If num_actions is provided, the
+    action mask of each new state is stored and sampled too.
+
+    :param capacity: the maximum number of frames stored, split evenly between the streams.
+    :param obs_size: the number of elements in each obs.
+    :param history_len: the number of obs stacked to form each state.
+    :param obs_dtype: the dtype used to store the obs if they are not packed.
+    :param num_cells: the number of binary grid cells at the start of each obs; the obs are not packed if None.
+    :param seed: the seed used to sample the experiences.
+    :param num_streams: the number of streams of experiences, such as one per env.
+    :param num_actions: the number of actions in each action mask; the masks are not stored if None.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        obs_size: int,
+        history_len: int,
+        obs_dtype: Optional[str] = "uint8",
+        num_cells: Optional[int] = None,
+        seed: Optional[int] = None,
+        num_streams: Optional[int] = 1,
+        num_actions: Optional[int] = None,
+    ) -> None:
+        assert num_streams >= 1, "num_streams should be positive."
+        assert (
+            capacity // num_streams > history_len
+        ), "capacity per stream should exceed history_len."
+        assert history_len >= 1, "history_len should be positive."
+        assert (
+            num_cells is None or 0 < num_cells <= obs_size
+        ), "num_cells should be in the range (0, obs_size]."
+
+        self.stream_capacity = capacity // num_streams
+        self.capacity = self.stream_capacity * num_streams
+        self.history_len = history_len
+        self._obs_size = obs_size
+        self._num_cells = num_cells
+
+        if num_cells is not None:
+            obs_dtype = "uint8"
+
+        self._frames = np.zeros(
+            (self.capacity, _get_packed_size(obs_size, num_cells)), dtype=obs_dtype
+        )
+
+        # The experience that starts at each frame, if any, and the number of
+        # frames that precede it in its episode.
+        self._actions = np.zeros((self.capacity), dtype="int64")
+        self._rewards = np.zeros((self.capacity), dtype="float32")
+        self._dones = np.zeros((self.capacity), dtype="bool")
+        self._is_valid = np.zeros((self.capacity), dtype="bool")
+        self._episode_steps = np.zeros((self.capacity), dtype="int64")
+        self._new_action_masks = (
+            None
+            if num_actions is None
+            else np.ones((self.capacity, num_actions), dtype="bool")
+        )
+
+        # The position of the next frame of each stream within its segment.
+        self._pos = np.zeros((num_streams), dtype="int64")
+        self._num_frames = np.zeros((num_streams), dtype="int64")
+        self._is_episode_start = np.ones((num_streams), dtype="bool")
+        self._last_stream = 0
+        self._size = 0
+        self._rng = np.random.default_rng(seed)
+
+        self._offsets = np.arange(history_len - 1, -1, -1)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, experience: Experience, /, stream: Optional[int] = 0) -> None:
+        """
+        Add the experience to the buffer.
+
+        :param experience: tuple (state, action, reward, done, new_state, new_action_mask), where state and new_state are single obs or stacks ending with them; every action is allowed if the mask is None.
+        :param stream: the stream the experience belongs to.
+        """
+        state, action, reward, done, new_state, new_action_mask = experience
+
+        if self._is_episode_start[stream]:
+            self._write_frame(state, 0, stream)
+
+        prev_pos = self._get_index(stream, self._pos[stream] - 1)
+        self._actions[prev_pos] = action
+        self._rewards[prev_pos] = reward
+        self._dones[prev_pos] = done
+        self._is_valid[prev_pos] = True
+        self._size += 1
+
+        if self._new_action_masks is not None:
+            self._new_action_masks[prev_pos] = (
+                True if new_action_mask is None else new_action_mask
+            )
+
+        self._write_frame(new_state, self._episode_steps[prev_pos] + 1, stream)
+
+        self._is_episode_start[stream] = done
+        self._last_stream = stream
+
+    def end_episodes(self) -> None:
+        """
+        Start a new episode in every stream with the next experience, such as
+        after the envs have been reset mid-game.
+        """
+        self._is_episode_start[:] = True
+
+    def sample(self, batch_size: int, /) -> Tuple[np.ndarray, ...]:
+        """
+        Sample a batch of distinct experiences uniformly at random, and rebuild
+        their stacked states.
+
+        :param batch_size: the number of experiences to sample.
+        :return: the states and new states, with shape (batch_size, history_len * obs_size), and the actions, rewards and dones, ordered as by ReplayBuffer, followed by the new states' action masks if stored.
+        """
+        indices = self._rng.choice(
+            np.flatnonzero(self._is_sampleable(np.arange(self.capacity))),
+            batch_size,
+            replace=False,
+        )
+
+        return self._get_batch(indices)
+
+    def _get_batch(self, indices: np.array, /) -> Tuple[np.ndarray, ...]:
+        """
+        Return the experiences that start at the frames provided.
+
+        :param indices: the indices of the frames.
+        :return: the states, actions, rewards, dones and new states, followed by the new states' action masks if stored.
+        """
+        streams = indices // self.stream_capacity
+        batch = (
+            self._get_stacks(indices),
+            self._actions[indices],
+            self._rewards[indices],
+            self._dones[indices],
+            self._get_stacks(
+                self._get_index(streams, indices % self.stream_capacity + 1)
+            ),
+        )
+
+        if self._new_action_masks is None:
+
+            return batch
+
+        return batch + (self._new_action_masks[indices],)
+
+    def _get_index(self, stream: Any, pos: Any, /) -> Any:
+        """
+        Return the index in the ring of a position in a stream's segment.
+
+        :param stream: the stream, or an array of streams.
+        :param pos: the position, which wraps around the segment.
+        :return: the index, or an array of indices.
+        """
+        return stream * self.stream_capacity + pos % self.stream_capacity
+
+    def _write_frame(self, obs: np.array, episode_step: int, stream: int, /) -> None:
+        """
+        Store the obs in the oldest frame of the stream, discarding the
+        experience that started there.
+
+        :param obs: the observation, or a stack ending with it.
+        :param episode_step: the number of frames that precede the obs in its episode.
+        :param stream: the stream.
+        """
+        pos = self._get_index(stream, self._pos[stream])
+
+        if self._is_valid[pos]:
+            self._is_valid[pos] = False
+            self._size -= 1
+
+        obs = np.asarray(obs)[-self._obs_size :]
+        self._frames[pos] = _pack_obs(obs, self._num_cells)
+        self._episode_steps[pos] = episode_step
+
+        self._pos[stream] = (self._pos[stream] + 1) % self.stream_capacity
+        self._num_frames[stream] = min(
+            self._num_frames[stream] + 1, self.stream_capacity
+        )
+
+    def _get_recent_indices(self) -> np.array:
+        """
+        Return the frames whose experiences may have changed during the last
+        call to append: the last two frames written, and the oldest frames
+        of the stream, whose histories may have been overwritten.
+
+        :return: the indices of the frames.
+        """
+        stream = self._last_stream
+        pos = self._pos[stream]
+
+        return self._get_index(
+            stream,
+            np.concatenate(
+                [
+                    [pos - 2, pos - 1],
+                    pos - self._num_frames[stream] + np.arange(self.history_len - 1),
+                ]
+            ),
+        )
+
+    def _is_sampleable(self, indices: np.array, /) -> np.array:
+        """
+        Return whether each of the frames provided starts an experience whose
+        history has not been overwritten.
+
+        :param indices: the indices of the frames.
+        :return: a boolean mask.
+        """
+        streams = indices // self.stream_capacity
+        oldest = (self._pos[streams] - self._num_frames[streams]) % self.stream_capacity
+        num_stored_before = (indices - oldest) % self.stream_capacity
+        has_history = num_stored_before >= np.minimum(
+            self._episode_steps[indices], self.history_len - 1
+        )
+
+        return self._is_valid[indices] & has_history
+
+    def _get_stacks(self, indices: np.array, /) -> np.ndarray:
+        """
+        Stack the history_len frames that end at each of the frames provided,
+        oldest first, zeroing the frames from before the start of the episode.
+
+        :param indices: the indices of the last frame of each stack.
+        :return: the stacked states, with shape (batch_size, history_len * obs_size).
+        """
+        frame_indices = self._get_index(
+            indices[:, None] // self.stream_capacity,
+            indices[:, None] - self._offsets,
+        )
+        frames = _unpack_obs(self._frames[frame_indices.flatten()], self._num_cells)
+        frames = frames.reshape(len(indices), self.history_len, -1)
+
+        in_episode = self._offsets <= self._episode_steps[indices, None]
+        frames = frames * in_episode[:, :, None].astype(frames.dtype)
+
+        return frames.reshape(len(indices), -1)
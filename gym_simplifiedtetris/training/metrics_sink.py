@@ -0,0 +1,183 @@
+"""
+A class that writes training metrics to a file from a background thread.
+"""
+
+import atexit
+import csv
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+
+class MetricsSink(object):
+    """
+    Collects rows of metrics in memory, one list per column, and writes them
+    to a CSV or Parquet file in batches from a background thread, every
+    flush_interval seconds. Logging a row only appends to the lists, so the
+    training loop never waits on the file. Tensors are detached when logged
+    and only converted to numbers when written, so that logging does not
+    synchronise with the GPU. The sink is closed at exit if still open, so
+    the rows logged since the last write are not lost. The format is chosen
+    by the path's extension; Parquet requires pyarrow.
+
+    :param path: the path of the file, ending in '.csv' or '.parquet'.
+    :param columns: the names of the metrics in each row.
+    :param flush_interval: the number of seconds between writes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        columns: Sequence[str],
+        flush_interval: Optional[float] = 10.0,
+    ) -> None:
+        assert path.endswith(
+            (".csv", ".parquet")
+        ), "path should be a CSV or Parquet file."
+        assert flush_interval > 0, "flush_interval should be positive."
+
+        self.path = path
+        self.columns = list(columns)
+        self.flush_interval = flush_interval
+        self.num_rows_written = 0
+
+        self._pending = self._get_empty_batch()
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._file = None
+        self._writer = None
+        self._schema = None
+
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self) -> "MetricsSink":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def log(self, **values: Any) -> None:
+        """
+        Add a row of metrics, to be written with the next batch.
+
+        :param values: the value of every column.
+        """
+        assert set(values) == set(self.columns), "A value should be given per column."
+
+        with self._pending_lock:
+            for name, value in values.items():
+                if isinstance(value, torch.Tensor):
+                    value = value.detach()
+
+                self._pending[name].append(value)
+
+    def flush(self) -> None:
+        """
+        Write the rows logged since the last write.
+        """
+        # Holding the write lock while taking the rows keeps the batches in
+        # order when flushes overlap.
+        with self._write_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, self._get_empty_batch()
+
+            num_rows = len(batch[self.columns[0]])
+
+            if num_rows == 0:
+
+                return
+
+            batch = {name: _to_numbers(values) for name, values in batch.items()}
+
+            if self.path.endswith(".csv"):
+                self._write_csv(batch)
+            else:
+                self._write_parquet(batch)
+
+            self.num_rows_written += num_rows
+
+    def close(self) -> None:
+        """
+        Stop the background thread, write the remaining rows and close the
+        file.
+        """
+        if self._closed.is_set():
+
+            return
+
+        self._closed.set()
+        atexit.unregister(self.close)
+        self._thread.join()
+        self.flush()
+
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+            elif self._writer is not None:
+                self._writer.close()
+
+    def _get_empty_batch(self) -> Dict[str, List[Any]]:
+        """
+        Return a batch with no rows.
+
+        :return: an empty list per column.
+        """
+        return {name: [] for name in self.columns}
+
+    def _run(self) -> None:
+        """
+        Write the rows logged every flush_interval seconds, until closed.
+        """
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def _write_csv(self, batch: Dict[str, List[Any]], /) -> None:
+        """
+        Append a batch to the CSV file, writing the header first if the file
+        is new.
+
+        :param batch: the values of each column.
+        """
+        if self._file is None:
+            self._file = open(self.path, "w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self.columns)
+
+        self._writer.writerows(zip(*(batch[name] for name in self.columns)))
+        self._file.flush()
+
+    def _write_parquet(self, batch: Dict[str, List[Any]], /) -> None:
+        """
+        Append a batch to the Parquet file as a row group, casting it to the
+        types of the first batch.
+
+        :param batch: the values of each column.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({name: batch[name] for name in self.columns})
+
+        if self._writer is None:
+            self._schema = table.schema
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+
+        self._writer.write_table(table.cast(self._schema))
+
+
+def _to_numbers(values: List[Any], /) -> List[Any]:
+    """
+    Convert a column's tensors and NumPy scalars to Python numbers.
+
+    :param values: the values.
+    :return: the converted values.
+    """
+    return [
+        value.item() if isinstance(value, (torch.Tensor, np.generic)) else value
+        for value in values
+    ]
@@ -0,0 +1,125 @@
+"""
+Prioritized replay buffer classes.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from gym_simplifiedtetris.training.history_replay_buffer import HistoryReplayBuffer
+from gym_simplifiedtetris.training.replay_buffer import Experience, ReplayBuffer
+from gym_simplifiedtetris.training.sum_tree import SumTree
+
+
+class _PrioritizedReplay(object):
+    """
+    A mixin that makes a replay buffer sample experiences in proportion to
+    their priorities, which are kept in a sum-tree. New experiences are given
+    the highest priority seen so far, and priorities are updated from the TD
+    errors of the sampled experiences.
+
+    :param alpha: how much prioritization is used; 0 is uniform sampling.
+    :param beta: how much the importance-sampling weights correct for the bias introduced by prioritization; 1 is full correction.
+    :param epsilon: a small amount added to the absolute TD errors, so that every experience can be sampled.
+    """
+
+    def __init__(
+        self,
+        *args,
+        alpha: Optional[float] = 0.6,
+        beta: Optional[float] = 0.4,
+        epsilon: Optional[float] = 1e-6,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+
+        assert alpha >= 0, "alpha should be non-negative."
+        assert 0 <= beta <= 1, "beta should be in the range [0, 1]."
+
+        self.alpha = alpha
+        self.beta = beta
+        self.epsilon = epsilon
+
+        self._tree = SumTree(self.capacity)
+        self._max_priority = 1.0
+
+    def append(self, experience: Experience, /, stream: Optional[int] = 0) -> None:
+        """
+        Add the experience to the buffer, with the highest priority seen so
+        far.
+
+        :param experience: tuple (state, action, reward, done, new_state, new_action_mask).
+        :param stream: the stream the experience belongs to.
+        """
+        super().append(experience, stream=stream)
+
+        indices = np.unique(self._get_recent_indices())
+        priorities = self._tree[indices]
+        is_sampleable = self._is_sampleable(indices)
+
+        # Priorities are only zero for experiences that could not be sampled.
+        priorities[is_sampleable & (priorities == 0)] = self._max_priority
+        priorities[~is_sampleable] = 0
+        self._tree.update(indices, priorities)
+
+    def sample(self, batch_size: int, /) -> Tuple[np.ndarray, ...]:
+        """
+        Sample a batch of experiences in proportion to their priorities, using
+        one stratum of the total priority per experience.
+
+        :param batch_size: the number of experiences to sample.
+        :return: the batch returned by the buffer, followed by the indices of the experiences, used to update their priorities, and their importance-sampling weights.
+        """
+        segment = self._tree.total / batch_size
+        values = (np.arange(batch_size) + self._rng.random(batch_size)) * segment
+        indices = self._tree.find(np.minimum(values, np.nextafter(self._tree.total, 0)))
+
+        probs = self._tree[indices] / self._tree.total
+        weights = (len(self) * probs) ** -self.beta
+        weights /= weights.max()
+
+        return self._get_batch(indices) + (indices, weights.astype("float32"))
+
+    def update_priorities(self, indices: np.array, td_errors: np.array, /) -> None:
+        """
+        Update the priorities of the sampled experiences from their TD errors.
+        If an experience is sampled more than once, the last TD error is used.
+
+        :param indices: the indices returned by sample.
+        :param td_errors: the TD errors of the experiences.
+        """
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        is_sampleable = self._is_sampleable(np.asarray(indices))
+
+        # Experiences overwritten since they were sampled keep zero priority.
+        self._tree.update(indices, np.where(is_sampleable, priorities, 0))
+        self._max_priority = max(self._max_priority, priorities.max())
+
+
+class PrioritizedReplayBuffer(_PrioritizedReplay, ReplayBuffer):
+    """
+    A replay buffer that samples experiences in proportion to their
+    priorities.
+
+    :param capacity: the maximum number of experiences stored.
+    :param obs_size: the number of elements in each obs.
+    :param alpha: how much prioritization is used; 0 is uniform sampling.
+    :param beta: how much the importance-sampling weights correct for the bias introduced by prioritization; 1 is full correction.
+    :param epsilon: a small amount added to the absolute TD errors, so that every experience can be sampled.
+    :param kwargs: the keyword arguments of ReplayBuffer.
+    """
+
+
+class PrioritizedHistoryReplayBuffer(_PrioritizedReplay, HistoryReplayBuffer):
+    """
+    A history replay buffer that samples experiences in proportion to their
+    priorities.
+
+    :param capacity: the maximum number of frames stored.
+    :param obs_size: the number of elements in each obs.
+    :param history_len: the number of obs stacked to form each state.
+    :param alpha: how much prioritization is used; 0 is uniform sampling.
+    :param beta: how much the importance-sampling weights correct for the bias introduced by prioritization; 1 is full correction.
+    :param epsilon: a small amount added to the absolute TD errors, so that every experience can be sampled.
+    :param kwargs: the keyword arguments of HistoryReplayBuffer.
+    """
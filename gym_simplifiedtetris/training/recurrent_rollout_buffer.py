@@ -0,0 +1,140 @@
+"""
+A rollout buffer class for recurrent policies.
+"""
+
+from typing import Any, Iterator, Optional, Tuple
+
+import numpy as np
+import torch
+
+from gym_simplifiedtetris.training.rollout_buffer import RolloutBuffer
+
+
+class RecurrentRolloutBuffer(RolloutBuffer):
+    """
+    A rollout buffer for policies that carry an LSTM state (h, c) from step
+    to step. Each env's rollout is split into sequences of seq_len steps,
+    and the LSTM state at the start of each sequence is stored with it, so
+    that training can unroll the policy over each sequence from there
+    (truncated backpropagation through time). Only one obs is stored per
+    step.
+
+    :param num_steps: the number of steps stored per env; a multiple of seq_len.
+    :param num_envs: the number of envs stepped together.
+    :param obs_size: the number of elements in each obs.
+    :param hidden_size: the number of elements in each of h and c.
+    :param seq_len: the number of steps in each sequence.
+    :param obs_dtype: the dtype used to store the obs.
+    :param seed: the seed used to shuffle the minibatches.
+    """
+
+    def __init__(
+        self,
+        num_steps: int,
+        num_envs: int,
+        obs_size: int,
+        hidden_size: int,
+        seq_len: int,
+        obs_dtype: Optional[str] = "float32",
+        seed: Optional[int] = None,
+    ) -> None:
+        assert num_steps % seq_len == 0, "num_steps should be a multiple of seq_len."
+
+        super().__init__(num_steps, num_envs, obs_size, obs_dtype, seed)
+
+        self.seq_len = seq_len
+
+        num_seqs = num_steps // seq_len
+        self.hidden_states = np.zeros(
+            (num_seqs, num_envs, hidden_size), dtype="float32"
+        )
+        self.cell_states = np.zeros((num_seqs, num_envs, hidden_size), dtype="float32")
+
+    def add(
+        self,
+        states: Any,
+        actions: Any,
+        log_probs: Any,
+        rewards: Any,
+        dones: Any,
+        values: Any,
+        lstm_states: Tuple[Any, Any],
+        /,
+    ) -> None:
+        """
+        Store one step of every env, and the LSTM states the step started
+        from if it is the first step of a sequence.
+
+        :param states: the states the actions were taken in, with shape (num_envs, obs_size).
+        :param actions: the actions taken.
+        :param log_probs: the log-probabilities of the actions under the policy that took them.
+        :param rewards: the rewards received.
+        :param dones: whether the episodes ended after the step.
+        :param values: the values of the states.
+        :param lstm_states: tuple (h, c) before the step, each with shape (num_envs, hidden_size).
+        """
+        if self.pos % self.seq_len == 0:
+            seq = self.pos // self.seq_len
+            self.hidden_states[seq] = np.asarray(lstm_states[0])
+            self.cell_states[seq] = np.asarray(lstm_states[1])
+
+        super().add(states, actions, log_probs, rewards, dones, values)
+
+    def get_minibatches(
+        self, batch_size: int, num_epochs: Optional[int] = 1, /
+    ) -> Iterator[Tuple[torch.Tensor, ...]]:
+        """
+        Yield shuffled minibatches of whole sequences, as tensors, passing
+        over the rollout num_epochs times. The dones are included so that the
+        LSTM state can be reset within a sequence where an episode ended.
+
+        :param batch_size: the number of steps in each minibatch, rounded down to whole sequences.
+        :param num_epochs: the number of passes over the rollout.
+        :return: the states, actions, log-probabilities, returns, advantages and dones of each minibatch, with shape (num_seqs, seq_len, ...), and the h and c each sequence starts from, with shape (num_seqs, hidden_size).
+        """
+        assert self.pos % self.seq_len == 0, "The rollout should end a sequence."
+
+        num_seqs = self.pos // self.seq_len * self.num_envs
+        seq_fields = [
+            self._get_seqs(field)
+            for field in (
+                self.states,
+                self.actions,
+                self.log_probs,
+                self.returns,
+                self.advantages,
+                self.dones,
+            )
+        ]
+        start_fields = [
+            field[: self.pos // self.seq_len].reshape(num_seqs, -1)
+            for field in (self.hidden_states, self.cell_states)
+        ]
+        seqs_per_batch = max(batch_size // self.seq_len, 1)
+
+        for _ in range(num_epochs):
+            indices = self._rng.permutation(num_seqs)
+
+            for start in range(0, num_seqs, seqs_per_batch):
+                batch_indices = indices[start : start + seqs_per_batch]
+
+                yield tuple(
+                    torch.from_numpy(field[batch_indices])
+                    for field in seq_fields + start_fields
+                )
+
+    def _get_seqs(self, field: np.ndarray, /) -> np.ndarray:
+        """
+        Split each env's steps into sequences, ordered by start step, then env.
+
+        :param field: the field, with shape (num_steps, num_envs, ...).
+        :return: the sequences, with shape (num_seqs, seq_len, ...).
+        """
+        num_starts = self.pos // self.seq_len
+        field = field[: self.pos].reshape(
+            num_starts, self.seq_len, self.num_envs, *field.shape[2:]
+        )
+
+        return field.swapaxes(1, 2).reshape(
+            num_starts * self.num_envs, self.seq_len, *field.shape[3:]
+        )
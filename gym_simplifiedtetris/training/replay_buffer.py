@@ -0,0 +1,156 @@
+"""
+A replay buffer class.
+"""
+
+from collections import namedtuple
+from typing import Optional, Tuple
+
+import numpy as np
+
+from gym_simplifiedtetris.training._obs_packing import (
+    _get_packed_size,
+    _pack_obs,
+    _unpack_obs,
+)
+
+# Named tuple for storing experience steps gathered in training. The new
+# state's action mask is None unless the actions are masked.
+Experience = namedtuple(
+    "Experience",
+    field_names=["state", "action", "reward", "done", "new_state", "new_action_mask"],
+    defaults=[None],
+)
+
+
+class ReplayBuffer(object):
+    """
+    A replay buffer that stores past experiences in preallocated arrays, so
+    that appending is O(1) and sampling returns contiguous batches without
+    looping over the experiences. Once full, the oldest experience is
+    overwritten. If num_cells is provided, the binary grid cells at the start
+    of each obs are packed eight to a byte, and the remaining elements, such
+    as the piece id, are stored as bytes. If num_actions is provided, the
+    action mask of each new state is stored and sampled too, so that the
+    bootstrapped values can be restricted to the allowed actions.
+
+    :param capacity: the maximum number of experiences stored.
+    :param obs_size: the number of elements in each obs.
+    :param obs_dtype: the dtype used to store the obs if they are not packed.
+    :param num_cells: the number of binary grid cells at the start of each obs; the obs are not packed if None.
+    :param seed: the seed used to sample the experiences.
+    :param num_actions: the number of actions in each action mask; the masks are not stored if None.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        obs_size: int,
+        obs_dtype: Optional[str] = "uint8",
+        num_cells: Optional[int] = None,
+        seed: Optional[int] = None,
+        num_actions: Optional[int] = None,
+    ) -> None:
+        assert capacity >= 1, "capacity should be positive."
+        assert (
+            num_cells is None or 0 < num_cells <= obs_size
+        ), "num_cells should be in the range (0, obs_size]."
+
+        self.capacity = capacity
+        self._num_cells = num_cells
+
+        stored_size = _get_packed_size(obs_size, num_cells)
+
+        if num_cells is not None:
+            obs_dtype = "uint8"
+
+        self._states = np.zeros((capacity, stored_size), dtype=obs_dtype)
+        self._new_states = np.zeros((capacity, stored_size), dtype=obs_dtype)
+        self._actions = np.zeros((capacity), dtype="int64")
+        self._rewards = np.zeros((capacity), dtype="float32")
+        self._dones = np.zeros((capacity), dtype="bool")
+        self._new_action_masks = (
+            None
+            if num_actions is None
+            else np.ones((capacity, num_actions), dtype="bool")
+        )
+
+        self._pos = 0
+        self._size = 0
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, experience: Experience, /, stream: Optional[int] = 0) -> None:
+        """
+        Add the experience to the buffer.
+
+        :param experience: tuple (state, action, reward, done, new_state, new_action_mask); every action is allowed if the mask is None.
+        :param stream: the env the experience came from; unused, since every experience is stored whole.
+        """
+        state, action, reward, done, new_state, new_action_mask = experience
+
+        self._states[self._pos] = _pack_obs(np.asarray(state), self._num_cells)
+        self._actions[self._pos] = action
+        self._rewards[self._pos] = reward
+        self._dones[self._pos] = done
+        self._new_states[self._pos] = _pack_obs(np.asarray(new_state), self._num_cells)
+
+        if self._new_action_masks is not None:
+            self._new_action_masks[self._pos] = (
+                True if new_action_mask is None else new_action_mask
+            )
+
+        self._pos = (self._pos + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def sample(self, batch_size: int, /) -> Tuple[np.ndarray, ...]:
+        """
+        Sample a batch of distinct experiences uniformly at random.
+
+        :param batch_size: the number of experiences to sample.
+        :return: the states, actions, rewards, dones and new states, followed by the new states' action masks if stored.
+        """
+        indices = self._rng.choice(self._size, batch_size, replace=False)
+
+        return self._get_batch(indices)
+
+    def _get_batch(self, indices: np.array, /) -> Tuple[np.ndarray, ...]:
+        """
+        Return the experiences stored at the indices provided.
+
+        :param indices: the indices of the experiences.
+        :return: the states, actions, rewards, dones and new states, followed by the new states' action masks if stored.
+        """
+        batch = (
+            _unpack_obs(self._states[indices], self._num_cells),
+            self._actions[indices],
+            self._rewards[indices],
+            self._dones[indices],
+            _unpack_obs(self._new_states[indices], self._num_cells),
+        )
+
+        if self._new_action_masks is None:
+
+            return batch
+
+        return batch + (self._new_action_masks[indices],)
+
+    def _get_recent_indices(self) -> np.array:
+        """
+        Return the indices whose experiences may have changed during the last
+        call to append.
+
+        :return: the indices.
+        """
+        return np.array([(self._pos - 1) % self.capacity])
+
+    def _is_sampleable(self, indices: np.array, /) -> np.array:
+        """
+        Return whether an experience that can be sampled is stored at each of
+        the indices provided.
+
+        :param indices: the indices.
+        :return: a boolean mask.
+        """
+        return indices < self._size
@@ -0,0 +1,48 @@
+"""
+A dataset class that feeds batches sampled from a replay buffer to a
+DataLoader.
+"""
+
+from typing import Any, Iterator, Optional, Tuple
+
+import torch
+from torch.utils.data.dataset import IterableDataset
+
+
+class ReplayDataset(IterableDataset):
+    """
+    An iterable dataset that yields whole batches sampled from a replay
+    buffer, already converted to contiguous tensors. It should be used with a
+    DataLoader whose batch_size is None, so that the batches are not collated
+    one experience at a time.
+
+    :param buffer: the replay buffer, which is sampled afresh for every batch.
+    :param batch_size: the number of experiences in each batch.
+    :param num_batches: the number of batches yielded per iteration.
+    :param pin_memory: whether to place the batches in pinned memory, to speed up copying them to a GPU.
+    """
+
+    def __init__(
+        self,
+        buffer: Any,
+        batch_size: int,
+        num_batches: int,
+        pin_memory: Optional[bool] = False,
+    ) -> None:
+        assert num_batches >= 1, "num_batches should be positive."
+
+        self.buffer = buffer
+        self.batch_size = batch_size
+        self.num_batches = num_batches
+        self.pin_memory = pin_memory
+
+    def __iter__(self) -> Iterator[Tuple[torch.Tensor, ...]]:
+        for _ in range(self.num_batches):
+            batch = tuple(
+                torch.from_numpy(field) for field in self.buffer.sample(self.batch_size)
+            )
+
+            if self.pin_memory:
+                batch = tuple(field.pin_memory() for field in batch)
+
+            yield batch
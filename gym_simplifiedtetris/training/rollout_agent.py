@@ -0,0 +1,142 @@
+"""
+An agent class that collects on-policy rollouts from several envs at once.
+"""
+
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from gym_simplifiedtetris.training._action_masks import (
+    _get_action_masks,
+    _reset_action_masks,
+)
+from gym_simplifiedtetris.training.rollout_buffer import RolloutBuffer
+
+
+class RolloutAgent(object):
+    """
+    An agent that plays a vectorised env with an actor-critic, running a
+    single batched forward pass over the stacked states of every env at each
+    step, and stores the steps in a rollout buffer. The actor-critic should
+    return a tuple (dist, actions, log_probs, values) for a batch of states.
+    The vectorised env should follow Stable Baselines3's VecEnv interface,
+    resetting each env automatically when its game ends. If the actions are
+    masked, the envs should add their action masks to the info dicts and
+    provide an action_masks method; the actor-critic is then called with the
+    masks of the envs as a second argument, and the masks are stored in the
+    rollout buffer.
+
+    :param vec_env: the vectorised env.
+    :param rollout_buffer: the rollout buffer storing the steps, with one column per env.
+    :param mask_actions: whether to pass the envs' action masks to the actor-critic.
+    """
+
+    def __init__(
+        self,
+        vec_env: Any,
+        rollout_buffer: RolloutBuffer,
+        mask_actions: Optional[bool] = False,
+    ) -> None:
+        assert (
+            rollout_buffer.num_envs == vec_env.num_envs
+        ), "The rollout buffer should have one column per env."
+        assert not mask_actions or (
+            rollout_buffer.action_masks is not None
+        ), "The rollout buffer should store the action masks."
+
+        self.vec_env = vec_env
+        self.rollout_buffer = rollout_buffer
+        self.mask_actions = mask_actions
+
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Reset every env, and the rewards of the episodes in progress.
+        """
+        self.states = self.vec_env.reset()
+        self.ep_rewards = np.zeros((self.vec_env.num_envs), dtype="float64")
+
+        if self.mask_actions:
+            self.action_masks = _reset_action_masks(self.vec_env)
+
+    @torch.no_grad()
+    def play_step(self, actor_critic: Callable, /) -> List[float]:
+        """
+        Step every env once, with the actions sampled from a single forward
+        pass, and store the step in the rollout buffer.
+
+        :param actor_critic: the actor-critic.
+        :return: the rewards of the episodes that ended.
+        """
+        _, actions, log_probs, values = actor_critic(*self._get_inputs())
+        actions = actions.cpu().numpy()
+
+        # The envs step while the log-probabilities and values are copied.
+        self.vec_env.step_async(actions)
+        log_probs, values = log_probs.cpu().numpy(), values.cpu().numpy()
+
+        new_states, rewards, dones, infos = self.vec_env.step_wait()
+        self.rollout_buffer.add(
+            self.states,
+            actions,
+            log_probs,
+            rewards,
+            dones,
+            values,
+            self.action_masks if self.mask_actions else None,
+        )
+
+        self.ep_rewards += rewards
+        finished_ep_rewards = self.ep_rewards[dones].tolist()
+        self.ep_rewards[dones] = 0
+
+        self.states = new_states
+
+        if self.mask_actions:
+            self.action_masks = _get_action_masks(self.vec_env, dones, infos)
+
+        return finished_ep_rewards
+
+    @torch.no_grad()
+    def collect_rollout(
+        self, actor_critic: Callable, gamma: float, lamb: float, /
+    ) -> Tuple[List[float], np.array]:
+        """
+        Fill the rollout buffer, then compute the advantages and returns,
+        bootstrapping from the values of the states reached. Episodes in
+        progress carry on into the next rollout.
+
+        :param actor_critic: the actor-critic.
+        :param gamma: the discount factor.
+        :param lamb: the GAE parameter lambda.
+        :return: the rewards of the episodes that ended, and the values of the states reached.
+        """
+        self.rollout_buffer.reset()
+        finished_ep_rewards = []
+
+        while not self.rollout_buffer.is_full:
+            finished_ep_rewards += self.play_step(actor_critic)
+
+        _, _, _, last_values = actor_critic(*self._get_inputs())
+        last_values = last_values.cpu().numpy().reshape(self.vec_env.num_envs)
+
+        self.rollout_buffer.compute_returns_and_advantages(last_values, gamma, lamb)
+
+        return finished_ep_rewards, last_values
+
+    def _get_inputs(self) -> Tuple[torch.Tensor, ...]:
+        """
+        Return the states of every env, stacked into a single tensor, and
+        their action masks if the actions are masked.
+
+        :return: the states, with shape (num_envs, obs_size), and the masks, with shape (num_envs, num_actions).
+        """
+        states = torch.as_tensor(self.states, dtype=torch.float32)
+
+        if self.mask_actions:
+
+            return states, torch.as_tensor(self.action_masks)
+
+        return (states,)
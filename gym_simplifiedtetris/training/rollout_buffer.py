@@ -0,0 +1,212 @@
+"""
+A rollout buffer class.
+"""
+
+from typing import Any, Iterator, Optional, Tuple
+
+import numpy as np
+import torch
+
+from gym_simplifiedtetris.training.advantages import (
+    compute_gae,
+    compute_returns,
+    compute_vtrace,
+)
+
+
+class RolloutBuffer(object):
+    """
+    A buffer that stores the steps of an on-policy rollout in preallocated
+    arrays with shape (num_steps, num_envs, ...), filled in place. Once full,
+    the advantages and returns are computed over the whole rollout, and
+    shuffled minibatches are produced by index slicing, for as many epochs as
+    required. Rollouts collected by an older policy can instead be given
+    V-trace targets. The action masks the actions were chosen under can also be
+    stored, so that the policy can be re-evaluated under the same masks.
+
+    :param num_steps: the number of steps stored per env.
+    :param num_envs: the number of envs stepped together.
+    :param obs_size: the number of elements in each obs.
+    :param obs_dtype: the dtype used to store the obs.
+    :param seed: the seed used to shuffle the minibatches.
+    :param num_actions: the number of actions in each action mask; the masks are not stored if None.
+    """
+
+    def __init__(
+        self,
+        num_steps: int,
+        num_envs: int,
+        obs_size: int,
+        obs_dtype: Optional[str] = "float32",
+        seed: Optional[int] = None,
+        num_actions: Optional[int] = None,
+    ) -> None:
+        self.num_steps = num_steps
+        self.num_envs = num_envs
+
+        self.states = np.zeros((num_steps, num_envs, obs_size), dtype=obs_dtype)
+        self.actions = np.zeros((num_steps, num_envs), dtype="int64")
+        self.log_probs = np.zeros((num_steps, num_envs), dtype="float32")
+        self.rewards = np.zeros((num_steps, num_envs), dtype="float32")
+        self.dones = np.zeros((num_steps, num_envs), dtype="bool")
+        self.values = np.zeros((num_steps, num_envs), dtype="float32")
+        self.advantages = np.zeros((num_steps, num_envs), dtype="float32")
+        self.returns = np.zeros((num_steps, num_envs), dtype="float32")
+        self.action_masks = (
+            np.zeros((num_steps, num_envs, num_actions), dtype="bool")
+            if num_actions is not None
+            else None
+        )
+
+        self.pos = 0
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def is_full(self) -> bool:
+        """
+        Return whether every step of the rollout has been stored.
+
+        :return: whether the buffer is full.
+        """
+        return self.pos == self.num_steps
+
+    def reset(self) -> None:
+        """
+        Start a new rollout, overwriting the previous one.
+        """
+        self.pos = 0
+
+    def add(
+        self,
+        states: Any,
+        actions: Any,
+        log_probs: Any,
+        rewards: Any,
+        dones: Any,
+        values: Any,
+        action_masks: Optional[Any] = None,
+        /,
+    ) -> None:
+        """
+        Store one step of every env.
+
+        :param states: the states the actions were taken in, with shape (num_envs, obs_size).
+        :param actions: the actions taken.
+        :param log_probs: the log-probabilities of the actions under the policy that took them.
+        :param rewards: the rewards received.
+        :param dones: whether the episodes ended after the step.
+        :param values: the values of the states.
+        :param action_masks: the action masks the actions were chosen under, if they are stored.
+        """
+        assert not self.is_full, "The rollout buffer is full."
+        assert (action_masks is None) == (
+            self.action_masks is None
+        ), "action_masks should be provided if and only if num_actions was."
+
+        self.states[self.pos] = np.asarray(states)
+        self.actions[self.pos] = np.asarray(actions)
+        self.log_probs[self.pos] = np.asarray(log_probs)
+        self.rewards[self.pos] = np.asarray(rewards)
+        self.dones[self.pos] = np.asarray(dones)
+        self.values[self.pos] = np.asarray(values).reshape(self.num_envs)
+
+        if action_masks is not None:
+            self.action_masks[self.pos] = np.asarray(action_masks)
+
+        self.pos += 1
+
+    def compute_returns_and_advantages(
+        self, last_values: Any, gamma: float, lamb: float, /
+    ) -> None:
+        """
+        Compute the GAE(lambda) advantages and the discounted returns of every
+        step stored, bootstrapping from the values of the states reached after
+        the final step. The discounted returns are the critic's targets.
+
+        :param last_values: the values of the states reached after the final step, with shape (num_envs).
+        :param gamma: the discount factor.
+        :param lamb: the GAE parameter lambda.
+        """
+        last_values = np.asarray(last_values, dtype="float32").reshape(self.num_envs)
+
+        rewards, dones = self.rewards[: self.pos], self.dones[: self.pos]
+
+        self.advantages[: self.pos], _ = compute_gae(
+            rewards, self.values[: self.pos], dones, last_values, gamma, lamb
+        )
+        self.returns[: self.pos] = compute_returns(rewards, dones, last_values, gamma)
+
+    def compute_vtrace_targets(
+        self,
+        target_log_probs: Any,
+        last_values: Any,
+        gamma: float,
+        lamb: float,
+        rho_bar: float = 1.0,
+        c_bar: float = 1.0,
+        /,
+    ) -> None:
+        """
+        Compute the V-trace value targets and policy gradient advantages of
+        every step stored, for a rollout collected by an older policy. The
+        stored log-probabilities are those of the behaviour policy, and the
+        stored values should be those of the policy being trained. The value
+        targets take the place of the returns.
+
+        :param target_log_probs: the log-probabilities of the actions under the policy being trained, with shape (num_steps, num_envs).
+        :param last_values: the values of the states reached after the final step, with shape (num_envs).
+        :param gamma: the discount factor.
+        :param lamb: the trace decay parameter lambda.
+        :param rho_bar: the truncation threshold of the importance weights in the TD errors.
+        :param c_bar: the truncation threshold of the importance weights in the traces.
+        """
+        last_values = np.asarray(last_values, dtype="float32").reshape(self.num_envs)
+        target_log_probs = np.asarray(target_log_probs, dtype="float32").reshape(
+            self.pos, self.num_envs
+        )
+
+        self.returns[: self.pos], self.advantages[: self.pos] = compute_vtrace(
+            self.log_probs[: self.pos],
+            target_log_probs,
+            self.rewards[: self.pos],
+            self.values[: self.pos],
+            self.dones[: self.pos],
+            last_values,
+            gamma,
+            lamb,
+            rho_bar,
+            c_bar,
+        )
+
+    def get_minibatches(
+        self, batch_size: int, num_epochs: Optional[int] = 1, /
+    ) -> Iterator[Tuple[torch.Tensor, ...]]:
+        """
+        Yield shuffled minibatches of the stored steps, as tensors, passing
+        over the rollout num_epochs times.
+
+        :param batch_size: the number of steps in each minibatch.
+        :param num_epochs: the number of passes over the rollout.
+        :return: the states, actions, log-probabilities, returns and advantages of each minibatch, followed by the action masks if they are stored.
+        """
+        num_samples = self.pos * self.num_envs
+        fields = [
+            field[: self.pos].reshape(num_samples, *field.shape[2:])
+            for field in (
+                self.states,
+                self.actions,
+                self.log_probs,
+                self.returns,
+                self.advantages,
+                self.action_masks,
+            )
+            if field is not None
+        ]
+
+        for _ in range(num_epochs):
+            indices = self._rng.permutation(num_samples)
+
+            for start in range(0, num_samples, batch_size):
+                batch_indices = indices[start : start + batch_size]
+
+                yield tuple(torch.from_numpy(field[batch_indices]) for field in fields)
@@ -0,0 +1,95 @@
+"""
+A function that allocates unique run ids in a log directory.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# The file in each log directory holding the next run id to try.
+_COUNTER_NAME = ".next_run_id"
+
+
+def allocate_run(
+    directory: str, name_format: Optional[str] = "{}", /
+) -> Tuple[int, str]:
+    """
+    Allocate the next run id in a directory, and create the run's empty
+    file, named by formatting name_format with the id. The file is created
+    with O_EXCL, so no two runs, even in parallel processes, are given the
+    same file. The next id is kept in a counter file updated under a lock,
+    so that allocating does not list the directory; ids whose files already
+    exist, such as those of runs named by counting the files, are skipped.
+
+    :param directory: the log directory, created if missing.
+    :param name_format: the format of the run's file name, such as '{}.csv'.
+    :return: the run id and the path of the run's file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    counter_path = os.path.join(directory, _COUNTER_NAME)
+
+    with _lock(counter_path + ".lock"):
+        run_id = _read_counter(counter_path)
+
+        while True:
+            path = os.path.join(directory, name_format.format(run_id))
+
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+                break
+            except FileExistsError:
+                run_id += 1
+
+        _write_counter(counter_path, run_id + 1)
+
+    return run_id, path
+
+
+@contextmanager
+def _lock(lock_path: str, /) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a file, released when the file is closed.
+    Without fcntl, no lock is taken; the ids are still unique, since the
+    run files are created with O_EXCL, but parallel runs may retry more.
+
+    :param lock_path: the path of the lock file.
+    """
+    with open(lock_path, "a") as file:
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_EX)
+
+        yield
+
+
+def _read_counter(counter_path: str, /) -> int:
+    """
+    Return the next run id to try.
+
+    :param counter_path: the path of the counter file.
+    :return: the id; one if the counter is missing or unreadable.
+    """
+    try:
+        with open(counter_path) as file:
+            return max(int(file.read()), 1)
+    except (FileNotFoundError, ValueError):
+        return 1
+
+
+def _write_counter(counter_path: str, next_id: int, /) -> None:
+    """
+    Replace the counter atomically, so that it is never seen half written.
+
+    :param counter_path: the path of the counter file.
+    :param next_id: the next run id to try.
+    """
+    temp_path = f"{counter_path}.{os.getpid()}.tmp"
+
+    with open(temp_path, "w") as file:
+        file.write(str(next_id))
+
+    os.replace(temp_path, counter_path)
@@ -0,0 +1,405 @@
+"""
+A vectorised env class that steps its envs in worker processes, exchanging
+the actions, obs, rewards and dones through shared memory.
+"""
+
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import gym
+import numpy as np
+
+# The fields stored in the shared memory block, in order, with their dtypes;
+# the obs dtype is taken from the envs' obs space.
+_FIELDS = (
+    ("actions", "int64"),
+    ("obs", None),
+    ("rewards", "float32"),
+    ("dones", "bool"),
+)
+
+
+class SharedMemoryVecEnv(object):
+    """
+    A vectorised env that follows Stable Baselines3's VecEnv interface. The
+    envs are split into contiguous slices, each stepped by its own worker
+    process, and the actions, obs, rewards and dones of every env are
+    written in place to a single shared memory block, so that only the
+    commands and the info dicts are sent through the pipes. Each env is
+    reset automatically when its game ends, the final obs being added to
+    its info dict as 'terminal_observation'. Stepping is split into
+    step_async, which returns as soon as the workers have been sent the
+    actions, and step_wait, so that other work can run while the envs step.
+
+    :param env_fns: the functions that create each env; they must be picklable unless the workers are forked.
+    :param num_workers: the number of worker processes; defaults to the number of CPUs, and is at most the number of envs.
+    :param start_method: the method used to start the workers; defaults to multiprocessing's default.
+    """
+
+    def __init__(
+        self,
+        env_fns: Sequence[Callable[[], gym.Env]],
+        num_workers: Optional[int] = None,
+        start_method: Optional[str] = None,
+    ) -> None:
+        self.num_envs = len(env_fns)
+
+        env = env_fns[0]()
+        self.observation_space = env.observation_space
+        self.action_space = env.action_space
+        del env
+
+        if num_workers is None:
+            num_workers = os.cpu_count()
+
+        num_workers = min(num_workers, self.num_envs)
+
+        obs_shape = self.observation_space.shape
+        obs_dtype = self.observation_space.dtype.str
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=_get_shared_size(self.num_envs, obs_shape, obs_dtype)
+        )
+        self._buffers = _get_shared_arrays(
+            self._shm.buf, self.num_envs, obs_shape, obs_dtype
+        )
+
+        context = multiprocessing.get_context(start_method)
+        self._worker_indices = [
+            indices.tolist()
+            for indices in np.array_split(np.arange(self.num_envs), num_workers)
+        ]
+        self._remotes, self._processes = [], []
+
+        for indices in self._worker_indices:
+            remote, worker_remote = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(
+                    worker_remote,
+                    remote,
+                    self._shm.name,
+                    [env_fns[idx] for idx in indices],
+                    indices,
+                    self.num_envs,
+                    obs_shape,
+                    obs_dtype,
+                ),
+                daemon=True,
+            )
+            process.start()
+            worker_remote.close()
+
+            self._remotes.append(remote)
+            self._processes.append(process)
+
+        self.waiting = False
+        self.closed = False
+
+    def reset(self) -> np.ndarray:
+        """
+        Reset every env.
+
+        :return: the obs of every env, with shape (num_envs, ...).
+        """
+        for remote in self._remotes:
+            remote.send(("reset", None))
+
+        for remote in self._remotes:
+            remote.recv()
+
+        return self._buffers["obs"].copy()
+
+    def step_async(self, actions: Any, /) -> None:
+        """
+        Write the actions to shared memory and tell the workers to step
+        their envs, without waiting for them to finish.
+
+        :param actions: the action of every env.
+        """
+        assert not self.waiting, "step_wait should be called before stepping again."
+
+        self._buffers["actions"][:] = np.asarray(actions)
+
+        for remote in self._remotes:
+            remote.send(("step", None))
+
+        self.waiting = True
+
+    def step_wait(self) -> Tuple[np.ndarray, np.array, np.array, List[Dict[str, Any]]]:
+        """
+        Wait for the workers to finish stepping their envs, and return the
+        results. The arrays returned are copies, so they remain valid after
+        the next step.
+
+        :return: the obs, rewards, game termination indicators and info dicts of every env.
+        """
+        assert self.waiting, "step_async should be called before step_wait."
+
+        infos = []
+
+        for remote in self._remotes:
+            infos += remote.recv()
+
+        self.waiting = False
+
+        return (
+            self._buffers["obs"].copy(),
+            self._buffers["rewards"].copy(),
+            self._buffers["dones"].copy(),
+            infos,
+        )
+
+    def step(
+        self, actions: Any, /
+    ) -> Tuple[np.ndarray, np.array, np.array, List[Dict[str, Any]]]:
+        """
+        Step every env, and wait for the results.
+
+        :param actions: the action of every env.
+        :return: the obs, rewards, game termination indicators and info dicts of every env.
+        """
+        self.step_async(actions)
+
+        return self.step_wait()
+
+    def env_method(
+        self,
+        method_name: str,
+        *method_args: Any,
+        indices: Optional[Sequence[int]] = None,
+        **method_kwargs: Any,
+    ) -> List[Any]:
+        """
+        Call a method of the envs, in their worker processes.
+
+        :param method_name: the name of the method.
+        :param method_args: the positional arguments of the method.
+        :param indices: the indices of the envs; every env if None.
+        :param method_kwargs: the keyword arguments of the method.
+        :return: the value returned by each env, in the order of indices.
+        """
+        return self._call_workers(
+            "env_method", (method_name, method_args, method_kwargs), indices
+        )
+
+    def get_attr(
+        self, attr_name: str, indices: Optional[Sequence[int]] = None
+    ) -> List[Any]:
+        """
+        Return an attribute of the envs.
+
+        :param attr_name: the name of the attribute.
+        :param indices: the indices of the envs; every env if None.
+        :return: the attribute of each env, in the order of indices.
+        """
+        return self._call_workers("get_attr", (attr_name,), indices)
+
+    def close(self) -> None:
+        """
+        Close the envs, stop the workers and free the shared memory block.
+        """
+        if self.closed:
+
+            return
+
+        if self.waiting:
+            for remote in self._remotes:
+                remote.recv()
+
+        for remote in self._remotes:
+            remote.send(("close", None))
+
+        for process in self._processes:
+            process.join()
+
+        # The views of the block must be released before it can be closed.
+        self._buffers = None
+        self._shm.close()
+        self._shm.unlink()
+
+        self.waiting = False
+        self.closed = True
+
+    def _call_workers(
+        self, command: str, data: Tuple[Any, ...], indices: Optional[Sequence[int]], /
+    ) -> List[Any]:
+        """
+        Send a command to the workers holding the envs selected, and return
+        the results in the order of indices.
+
+        :param command: the command.
+        :param data: the command's arguments, to which each worker's env positions are appended.
+        :param indices: the indices of the envs; every env if None.
+        :return: the result for each env.
+        """
+        assert not self.waiting, "step_wait should be called first."
+
+        indices = range(self.num_envs) if indices is None else indices
+        selected_indices = set(indices)
+        results = {}
+        remotes_used = []
+
+        for remote, worker_indices in zip(self._remotes, self._worker_indices):
+            selected = [idx for idx in worker_indices if idx in selected_indices]
+
+            if selected:
+                positions = [idx - worker_indices[0] for idx in selected]
+                remote.send((command, (*data, positions)))
+                remotes_used.append((remote, selected))
+
+        for remote, selected in remotes_used:
+            results.update(zip(selected, remote.recv()))
+
+        return [results[idx] for idx in indices]
+
+
+def _get_shared_size(
+    num_envs: int, obs_shape: Tuple[int, ...], obs_dtype: str, /
+) -> int:
+    """
+    Return the number of bytes needed by the shared memory block.
+
+    :param num_envs: the number of envs.
+    :param obs_shape: the shape of each obs.
+    :param obs_dtype: the dtype of the obs.
+    :return: the size of the block.
+    """
+    return sum(nbytes for _, _, nbytes in _get_layout(num_envs, obs_shape, obs_dtype))
+
+
+def _get_shared_arrays(
+    buffer: memoryview,
+    num_envs: int,
+    obs_shape: Tuple[int, ...],
+    obs_dtype: str,
+    /,
+) -> Dict[str, np.ndarray]:
+    """
+    Return NumPy views of each field stored in the shared memory block.
+
+    :param buffer: the block's buffer.
+    :param num_envs: the number of envs.
+    :param obs_shape: the shape of each obs.
+    :param obs_dtype: the dtype of the obs.
+    :return: the views, keyed by field name.
+    """
+    arrays = {}
+    offset = 0
+
+    for name, (shape, dtype), nbytes in _get_layout(num_envs, obs_shape, obs_dtype):
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        offset += nbytes
+
+    return arrays
+
+
+def _get_layout(
+    num_envs: int, obs_shape: Tuple[int, ...], obs_dtype: str, /
+) -> List[Tuple[str, Tuple[Tuple[int, ...], str], int]]:
+    """
+    Return the name, shape, dtype and number of bytes of each field stored
+    in the shared memory block, each padded to a multiple of eight bytes so
+    that every field is aligned.
+
+    :param num_envs: the number of envs.
+    :param obs_shape: the shape of each obs.
+    :param obs_dtype: the dtype of the obs.
+    :return: the layout.
+    """
+    layout = []
+
+    for name, dtype in _FIELDS:
+        shape = (num_envs, *obs_shape) if name == "obs" else (num_envs,)
+        dtype = obs_dtype if dtype is None else dtype
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        layout.append((name, (shape, dtype), -(-nbytes // 8) * 8))
+
+    return layout
+
+
+def _worker(
+    remote: Connection,
+    parent_remote: Connection,
+    shm_name: str,
+    env_fns: List[Callable[[], gym.Env]],
+    indices: List[int],
+    num_envs: int,
+    obs_shape: Tuple[int, ...],
+    obs_dtype: str,
+) -> None:
+    """
+    Create the worker's envs and run commands received from the parent
+    until told to close. Steps read the actions of the worker's envs from
+    shared memory and write back their obs, rewards and dones.
+
+    :param remote: the worker's end of the pipe.
+    :param parent_remote: the parent's end of the pipe, closed by the worker.
+    :param shm_name: the name of the shared memory block.
+    :param env_fns: the functions that create the worker's envs.
+    :param indices: the indices of the worker's envs.
+    :param num_envs: the total number of envs.
+    :param obs_shape: the shape of each obs.
+    :param obs_dtype: the dtype of the obs.
+    """
+    parent_remote.close()
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buffers = _get_shared_arrays(shm.buf, num_envs, obs_shape, obs_dtype)
+    envs = [env_fn() for env_fn in env_fns]
+
+    try:
+        while True:
+            command, data = remote.recv()
+
+            if command == "step":
+                infos = []
+
+                for idx, env in zip(indices, envs):
+                    obs, reward, done, info = env.step(int(buffers["actions"][idx]))
+
+                    if done:
+                        info["terminal_observation"] = obs
+                        obs = env.reset()
+
+                    buffers["obs"][idx] = obs
+                    buffers["rewards"][idx] = reward
+                    buffers["dones"][idx] = done
+                    infos.append(info)
+
+                remote.send(infos)
+
+            elif command == "reset":
+                for idx, env in zip(indices, envs):
+                    buffers["obs"][idx] = env.reset()
+
+                remote.send(None)
+
+            elif command == "env_method":
+                method_name, args, kwargs, positions = data
+                remote.send(
+                    [
+                        getattr(envs[pos], method_name)(*args, **kwargs)
+                        for pos in positions
+                    ]
+                )
+
+            elif command == "get_attr":
+                attr_name, positions = data
+                remote.send([getattr(envs[pos], attr_name) for pos in positions])
+
+            elif command == "close":
+                for env in envs:
+                    env.close()
+
+                remote.close()
+                break
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        buffers = None
+        shm.close()
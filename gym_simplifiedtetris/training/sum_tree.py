@@ -0,0 +1,76 @@
+"""
+A sum-tree class.
+"""
+
+import numpy as np
+
+
+class SumTree(object):
+    """
+    A binary tree, stored in an array, whose leaves hold non-negative
+    priorities and whose internal nodes hold the sum of their children. Both
+    updating priorities and finding the leaves that cumulative sums fall in
+    take O(log N) time, and are vectorised over batches.
+
+    :param capacity: the number of leaves.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        assert capacity >= 1, "capacity should be positive."
+
+        self.capacity = capacity
+
+        self._depth = max(int(np.ceil(np.log2(capacity))), 0)
+        self._first_leaf = 2**self._depth
+
+        # The root is stored at index 1, and the children of node i are stored
+        # at indices 2i and 2i + 1.
+        self._tree = np.zeros((2 * self._first_leaf), dtype="double")
+
+    def __getitem__(self, indices: np.array) -> np.array:
+        return self._tree[self._first_leaf + np.asarray(indices)]
+
+    @property
+    def total(self) -> float:
+        """
+        Return the sum of the priorities.
+
+        :return: the sum of the priorities.
+        """
+        return self._tree[1]
+
+    def update(self, indices: np.array, priorities: np.array, /) -> None:
+        """
+        Set the priorities of the leaves provided, and update their ancestors.
+
+        :param indices: the indices of the leaves.
+        :param priorities: the new priorities.
+        """
+        nodes = self._first_leaf + np.asarray(indices)
+        self._tree[nodes] = priorities
+
+        for _ in range(self._depth):
+            nodes = np.unique(nodes // 2)
+            self._tree[nodes] = self._tree[2 * nodes] + self._tree[2 * nodes + 1]
+
+    def find(self, values: np.array, /) -> np.array:
+        """
+        Return the leaves whose cumulative sum ranges contain the values
+        provided. Leaves with zero priority are never returned, provided the
+        total is positive.
+
+        :param values: the values, in the range [0, total).
+        :return: the indices of the leaves.
+        """
+        values = np.array(values, dtype="double")
+        nodes = np.ones(values.shape, dtype="int")
+
+        for _ in range(self._depth):
+            left_sums = self._tree[2 * nodes]
+            go_right = (left_sums == 0) | (
+                (values >= left_sums) & (self._tree[2 * nodes + 1] > 0)
+            )
+            values -= np.where(go_right, left_sums, 0)
+            nodes = 2 * nodes + go_right
+
+        return nodes - self._first_leaf
@@ -0,0 +1,217 @@
+"""
+A vectorised env class that steps its envs from a pool of threads.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import gym
+import numpy as np
+
+
+class ThreadPoolVecEnv(object):
+    """
+    A vectorised env that follows Stable Baselines3's VecEnv interface and
+    steps every env within the current process. The envs are split into
+    contiguous slices, each stepped by its own thread, which only runs in
+    parallel when the envs' engines step in a compiled kernel that releases
+    the GIL. Otherwise, the envs are stepped serially by default, avoiding
+    the threads' overhead. Each env is reset automatically when its game
+    ends, the final obs being added to its info dict as
+    'terminal_observation'. Stepping is split into step_async and step_wait;
+    when threads are used, the envs step in the background between the two.
+
+    :param env_fns: the functions that create each env.
+    :param num_threads: the number of threads; defaults to the number of CPUs if the engines release the GIL, and to serial stepping otherwise.
+    """
+
+    def __init__(
+        self,
+        env_fns: Sequence[Callable[[], gym.Env]],
+        num_threads: Optional[int] = None,
+    ) -> None:
+        self.envs = [env_fn() for env_fn in env_fns]
+        self.num_envs = len(self.envs)
+        self.observation_space = self.envs[0].observation_space
+        self.action_space = self.envs[0].action_space
+
+        if num_threads is None:
+            num_threads = os.cpu_count() if self.releases_gil else 1
+
+        num_threads = min(num_threads, self.num_envs)
+
+        self._slices = [
+            indices.tolist()
+            for indices in np.array_split(np.arange(self.num_envs), num_threads)
+        ]
+        self._executor = ThreadPoolExecutor(num_threads) if num_threads > 1 else None
+
+        self._obs = np.zeros(
+            (self.num_envs, *self.observation_space.shape),
+            dtype=self.observation_space.dtype,
+        )
+        self._rewards = np.zeros((self.num_envs), dtype="float32")
+        self._dones = np.zeros((self.num_envs), dtype="bool")
+        self._infos = [{} for _ in range(self.num_envs)]
+
+        self._actions = None
+        self._futures = []
+        self.waiting = False
+
+    @property
+    def releases_gil(self) -> bool:
+        """
+        Return whether every env's engine steps in a kernel that releases
+        the GIL.
+
+        :return: whether the envs can be stepped in parallel from threads.
+        """
+        return all(env.unwrapped._engine.RELEASES_GIL for env in self.envs)
+
+    @property
+    def num_threads(self) -> int:
+        """
+        Return the number of threads stepping the envs.
+
+        :return: the number of threads; one if the envs are stepped serially.
+        """
+        return len(self._slices)
+
+    def reset(self) -> np.ndarray:
+        """
+        Reset every env.
+
+        :return: the obs of every env, with shape (num_envs, ...).
+        """
+        for idx, env in enumerate(self.envs):
+            self._obs[idx] = env.reset()
+
+        return self._obs.copy()
+
+    def step_async(self, actions: Any, /) -> None:
+        """
+        Start stepping the envs. When threads are used, this returns without
+        waiting for them to finish.
+
+        :param actions: the action of every env.
+        """
+        assert not self.waiting, "step_wait should be called before stepping again."
+
+        self._actions = np.asarray(actions)
+
+        if self._executor is not None:
+            self._futures = [
+                self._executor.submit(self._step_slice, indices)
+                for indices in self._slices
+            ]
+
+        self.waiting = True
+
+    def step_wait(self) -> Tuple[np.ndarray, np.array, np.array, List[Dict[str, Any]]]:
+        """
+        Finish stepping the envs, and return the results. The arrays returned
+        are copies, so they remain valid after the next step.
+
+        :return: the obs, rewards, game termination indicators and info dicts of every env.
+        """
+        assert self.waiting, "step_async should be called before step_wait."
+
+        if self._executor is None:
+            self._step_slice(range(self.num_envs))
+
+        # Waiting on each future also raises any error from its thread.
+        for future in self._futures:
+            future.result()
+
+        self._futures = []
+        self.waiting = False
+
+        return (
+            self._obs.copy(),
+            self._rewards.copy(),
+            self._dones.copy(),
+            list(self._infos),
+        )
+
+    def step(
+        self, actions: Any, /
+    ) -> Tuple[np.ndarray, np.array, np.array, List[Dict[str, Any]]]:
+        """
+        Step every env, and wait for the results.
+
+        :param actions: the action of every env.
+        :return: the obs, rewards, game termination indicators and info dicts of every env.
+        """
+        self.step_async(actions)
+
+        return self.step_wait()
+
+    def env_method(
+        self,
+        method_name: str,
+        *method_args: Any,
+        indices: Optional[Sequence[int]] = None,
+        **method_kwargs: Any,
+    ) -> List[Any]:
+        """
+        Call a method of the envs.
+
+        :param method_name: the name of the method.
+        :param method_args: the positional arguments of the method.
+        :param indices: the indices of the envs; every env if None.
+        :param method_kwargs: the keyword arguments of the method.
+        :return: the value returned by each env, in the order of indices.
+        """
+        indices = range(self.num_envs) if indices is None else indices
+
+        return [
+            getattr(self.envs[idx], method_name)(*method_args, **method_kwargs)
+            for idx in indices
+        ]
+
+    def get_attr(
+        self, attr_name: str, indices: Optional[Sequence[int]] = None
+    ) -> List[Any]:
+        """
+        Return an attribute of the envs.
+
+        :param attr_name: the name of the attribute.
+        :param indices: the indices of the envs; every env if None.
+        :return: the attribute of each env, in the order of indices.
+        """
+        indices = range(self.num_envs) if indices is None else indices
+
+        return [getattr(self.envs[idx], attr_name) for idx in indices]
+
+    def close(self) -> None:
+        """
+        Close the envs and shut down the threads.
+        """
+        if self.waiting:
+            self.step_wait()
+
+        if self._executor is not None:
+            self._executor.shutdown()
+
+        for env in self.envs:
+            env.close()
+
+    def _step_slice(self, indices: Sequence[int], /) -> None:
+        """
+        Step the envs selected, writing their results in place.
+
+        :param indices: the indices of the envs.
+        """
+        for idx in indices:
+            env = self.envs[idx]
+            obs, reward, done, info = env.step(int(self._actions[idx]))
+
+            if done:
+                info["terminal_observation"] = obs
+                obs = env.reset()
+
+            self._obs[idx] = obs
+            self._rewards[idx] = reward
+            self._dones[idx] = done
+            self._infos[idx] = info
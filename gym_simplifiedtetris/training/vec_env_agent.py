@@ -0,0 +1,135 @@
+"""
+An agent class that collects experiences from several envs at once.
+"""
+
+from typing import Any, Optional, Tuple
+
+import numpy as np
+import torch
+from torch import nn
+
+from gym_simplifiedtetris.training._action_masks import (
+    _get_action_masks,
+    _reset_action_masks,
+)
+from gym_simplifiedtetris.training.replay_buffer import Experience
+
+
+class VecEnvAgent(object):
+    """
+    An agent that plays a vectorised env, selecting epsilon-greedy actions for
+    every env from a single batched forward pass, and stores the experiences
+    in a replay buffer. The vectorised env should follow Stable Baselines3's
+    VecEnv interface, resetting each env automatically when its game ends and
+    returning the final obs in the info dict. If the actions are masked, the
+    envs should add their action masks to the info dicts and provide an
+    action_masks method, only the actions allowed are selected, and each
+    experience stores the action mask of its new state. The experiences of
+    each env are appended as a separate stream.
+
+    :param vec_env: the vectorised env.
+    :param replay_buffer: the replay buffer storing the experiences.
+    :param seed: the seed used to explore.
+    :param mask_actions: whether to restrict the actions to those allowed by the envs' action masks.
+    """
+
+    def __init__(
+        self,
+        vec_env: Any,
+        replay_buffer: Any,
+        seed: Optional[int] = None,
+        mask_actions: Optional[bool] = False,
+    ) -> None:
+        self.vec_env = vec_env
+        self.replay_buffer = replay_buffer
+        self.mask_actions = mask_actions
+
+        self._rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Reset every env and update the states.
+        """
+        self.states = self.vec_env.reset()
+
+        if self.mask_actions:
+            self.action_masks = _reset_action_masks(self.vec_env)
+
+    def get_actions(self, net: nn.Module, epsilon: float, /) -> np.array:
+        """
+        Return an epsilon-greedy action for every env. The network is only run
+        on the states of the envs that do not explore. If the actions are
+        masked, random actions are drawn uniformly from the allowed actions,
+        and greedy actions maximise over them.
+
+        :param net: the Q-network.
+        :param epsilon: the probability of selecting a random action.
+        :return: the actions.
+        """
+        num_envs = self.vec_env.num_envs
+
+        if self.mask_actions:
+            # The allowed action with the largest uniform draw is uniformly
+            # distributed over the allowed actions.
+            draws = self._rng.random(self.action_masks.shape)
+            actions = np.where(self.action_masks, draws, -1).argmax(axis=1)
+        else:
+            actions = self._rng.integers(self.vec_env.action_space.n, size=num_envs)
+
+        is_greedy = self._rng.random(num_envs) >= epsilon
+
+        if np.any(is_greedy):
+            device = next(net.parameters()).device
+            q_values = net(torch.as_tensor(self.states[is_greedy], device=device))
+
+            if self.mask_actions:
+                masks = torch.as_tensor(self.action_masks[is_greedy], device=device)
+                q_values = q_values.masked_fill(~masks, float("-inf"))
+
+            actions[is_greedy] = q_values.argmax(dim=1).cpu().numpy()
+
+        return actions
+
+    @torch.no_grad()
+    def play_step(
+        self, net: nn.Module, epsilon: Optional[float] = 0.0, /
+    ) -> Tuple[np.array, np.array]:
+        """
+        Step every env once and store the experiences.
+
+        :param net: the Q-network.
+        :param epsilon: the probability of selecting a random action.
+        :return: the rewards and dones of the envs.
+        """
+        actions = self.get_actions(net, epsilon)
+        new_states, rewards, dones, infos = self.vec_env.step(actions)
+
+        if self.mask_actions:
+            new_action_masks = _get_action_masks(self.vec_env, dones, infos)
+
+        for idx, done in enumerate(dones):
+            # The env has already been reset, so use the final obs. Its value
+            # is not bootstrapped, so its mask allows every action.
+            new_state = infos[idx]["terminal_observation"] if done else new_states[idx]
+            new_action_mask = (
+                new_action_masks[idx] if self.mask_actions and not done else None
+            )
+            self.replay_buffer.append(
+                Experience(
+                    self.states[idx],
+                    actions[idx],
+                    rewards[idx],
+                    done,
+                    new_state,
+                    new_action_mask,
+                ),
+                stream=idx,
+            )
+
+        self.states = new_states
+
+        if self.mask_actions:
+            self.action_masks = new_action_masks
+
+        return rewards, dones
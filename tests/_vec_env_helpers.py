@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+class SyncVecEnv(object):
+    """Steps several envs in turn, following the VecEnv interface."""
+
+    def __init__(self, envs: list) -> None:
+        self.envs = envs
+        self.num_envs = len(envs)
+        self.action_space = envs[0].action_space
+
+    def reset(self) -> np.ndarray:
+        return np.stack([env.reset() for env in self.envs])
+
+    def step_async(self, actions: np.array) -> None:
+        self.actions = actions
+
+    def step_wait(self) -> tuple:
+        return self.step(self.actions)
+
+    def step(self, actions: np.array) -> tuple:
+        all_obs, rewards, dones, infos = [], [], [], []
+
+        for env, action in zip(self.envs, actions):
+            obs, reward, done, info = env.step(action)
+
+            if done:
+                info = dict(info, terminal_observation=obs)
+                obs = env.reset()
+
+            all_obs.append(obs)
+            rewards.append(reward)
+            dones.append(done)
+            infos.append(info)
+
+        return np.stack(all_obs), np.array(rewards), np.array(dones), infos
+
+    def env_method(self, method_name: str, *args, indices=None, **kwargs) -> list:
+        indices = range(self.num_envs) if indices is None else indices
+
+        return [getattr(self.envs[i], method_name)(*args, **kwargs) for i in indices]
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+from functools import partial
+
+import numpy as np
+import torch
+from torch import nn
+from torch.distributions import Categorical
+
+from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
+from gym_simplifiedtetris.training import ActorLearner
+
+
+class _LogitsPolicy(nn.Module):
+    """Samples actions from learnt state-independent logits."""
+
+    def __init__(self, num_actions: int) -> None:
+        super().__init__()
+        self.logits = nn.Parameter(torch.zeros(num_actions))
+
+    def forward(self, states: torch.Tensor, masks: torch.Tensor = None) -> tuple:
+        logits = self.logits.expand(len(states), -1)
+
+        if masks is not None:
+            logits = logits.masked_fill(~masks, float("-inf"))
+
+        dist = Categorical(logits=logits)
+        actions = dist.sample()
+
+        return dist, actions, dist.log_prob(actions), torch.zeros(len(states))
+
+
+def _make_policy(net: nn.Module, actor_idx: int) -> nn.Module:
+    return net
+
+
+def _make_failing_policy(net: nn.Module, actor_idx: int) -> None:
+    raise ValueError("The policy could not be made.")
+
+
+class ActorLearnerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.env_fns = [partial(Tetris, grid_dims=(8, 6), piece_size=4)] * 2
+        self.num_actions = Tetris(grid_dims=(8, 6), piece_size=4).action_space.n
+        self.net = _LogitsPolicy(self.num_actions)
+
+    def _get_actor_learner(self, **kwargs) -> ActorLearner:
+        actor_learner = ActorLearner(
+            self.net, _make_policy, self.env_fns, 2, 5, seed=0, **kwargs
+        )
+        self.addCleanup(actor_learner.close)
+
+        return actor_learner
+
+    def test_get_rollout(self) -> None:
+        actor_learner = self._get_actor_learner()
+        actor_indices = set()
+
+        for _ in range(6):
+            rollout = actor_learner.get_rollout(timeout=30)
+            actor_indices.add(rollout.actor_idx)
+
+            self.assertEqual(rollout.states.shape, (5, 2, 49))
+            self.assertEqual(rollout.actions.shape, (5, 2))
+            self.assertEqual(rollout.last_states.shape, (2, 49))
+            self.assertIsNone(rollout.action_masks)
+            self.assertEqual(rollout.version, 0)
+
+        self.assertEqual(actor_indices, {0, 1})
+
+    def test_publish(self) -> None:
+        actor_learner = self._get_actor_learner()
+
+        with torch.no_grad():
+            self.net.logits[1:] = -1e9
+
+        actor_learner.publish(self.net)
+        self.assertEqual(actor_learner.version, 1)
+
+        rollout = actor_learner.get_rollout(timeout=30)
+
+        while rollout.version < 1:
+            rollout = actor_learner.get_rollout(timeout=30)
+
+        np.testing.assert_array_equal(rollout.actions, 0)
+
+    def test_max_staleness(self) -> None:
+        actor_learner = self._get_actor_learner(max_staleness=0)
+        actor_learner.get_rollout(timeout=30)
+
+        actor_learner.publish(self.net)
+        actor_learner.publish(self.net)
+
+        for _ in range(4):
+            rollout = actor_learner.get_rollout(timeout=30)
+            self.assertEqual(rollout.version, 2)
+
+    def test_mask_actions(self) -> None:
+        env_fns = [partial(Tetris, grid_dims=(8, 6), piece_size=4, mask_actions=True)]
+        actor_learner = ActorLearner(
+            self.net, _make_policy, env_fns, 1, 5, mask_actions=True, seed=0
+        )
+        self.addCleanup(actor_learner.close)
+        rollout = actor_learner.get_rollout(timeout=30)
+
+        self.assertEqual(rollout.action_masks.shape, (5, 1, self.num_actions))
+        self.assertEqual(rollout.last_action_masks.shape, (1, self.num_actions))
+        self.assertTrue(
+            np.all(
+                np.take_along_axis(rollout.action_masks, rollout.actions[..., None], 2)
+            )
+        )
+
+    def test_actor_exit(self) -> None:
+        actor_learner = ActorLearner(
+            self.net, _make_failing_policy, self.env_fns, 1, 5, seed=0
+        )
+        self.addCleanup(actor_learner.close)
+
+        with self.assertRaises(RuntimeError):
+            actor_learner.get_rollout(timeout=30)
+
+    def test_close(self) -> None:
+        actor_learner = self._get_actor_learner()
+        actor_learner.get_rollout(timeout=30)
+        actor_learner.close()
+
+        self.assertTrue(
+            all(not process.is_alive() for process in actor_learner._processes)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
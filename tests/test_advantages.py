@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+import torch
+
+from gym_simplifiedtetris.training.advantages import (
+    compute_gae,
+    compute_returns,
+    compute_vtrace,
+)
+
+
+class AdvantagesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rewards = np.array([[1, 0], [0, 2], [3, 1]])
+        self.values = np.array([[0.5, 0.2], [0.1, 0.3], [0.4, 0.9]])
+        self.dones = np.array([[False, True], [False, False], [True, False]])
+        self.last_values = np.array([9.0, 0.7])
+        self.gamma, self.lamb = 0.9, 0.8
+
+    def _get_expected_advantages(self) -> np.ndarray:
+        """Compute the advantages one env and one step at a time."""
+        advantages = np.zeros(self.values.shape)
+
+        for env in range(2):
+            advantage = 0
+
+            for step in reversed(range(3)):
+                if step == 2:
+                    next_value = self.last_values[env]
+                else:
+                    next_value = self.values[step + 1, env]
+
+                not_done = 1 - self.dones[step, env]
+                delta = (
+                    self.rewards[step, env]
+                    + self.gamma * not_done * next_value
+                    - self.values[step, env]
+                )
+                advantage = delta + self.gamma * self.lamb * not_done * advantage
+                advantages[step, env] = advantage
+
+        return advantages
+
+    def test_compute_returns(self) -> None:
+        np.testing.assert_allclose(
+            compute_returns(self.rewards, self.dones, self.last_values, self.gamma),
+            [[3.43, 0], [2.7, 3.467], [3, 1.63]],
+        )
+
+    def test_compute_gae(self) -> None:
+        advantages, returns = compute_gae(
+            self.rewards,
+            self.values,
+            self.dones,
+            self.last_values,
+            self.gamma,
+            self.lamb,
+        )
+        expected = self._get_expected_advantages()
+        np.testing.assert_allclose(advantages, expected)
+        np.testing.assert_allclose(returns, expected + self.values)
+
+    def test_compute_gae_torch(self) -> None:
+        advantages, _ = compute_gae(
+            torch.tensor(self.rewards),
+            torch.tensor(self.values, dtype=torch.float32),
+            torch.tensor(self.dones),
+            torch.tensor(self.last_values, dtype=torch.float32),
+            self.gamma,
+            self.lamb,
+        )
+        self.assertTrue(torch.is_tensor(advantages))
+        self.assertEqual(advantages.dtype, torch.float32)
+        np.testing.assert_allclose(
+            advantages.numpy(), self._get_expected_advantages(), rtol=1e-5
+        )
+
+    def test_compute_vtrace_on_policy(self) -> None:
+        log_probs = np.log(np.full(self.values.shape, 0.25))
+        value_targets, advantages = compute_vtrace(
+            log_probs,
+            log_probs,
+            self.rewards,
+            self.values,
+            self.dones,
+            self.last_values,
+            self.gamma,
+            self.lamb,
+        )
+        _, returns = compute_gae(
+            self.rewards,
+            self.values,
+            self.dones,
+            self.last_values,
+            self.gamma,
+            self.lamb,
+        )
+        np.testing.assert_allclose(value_targets, returns)
+
+        next_value_targets = np.append(value_targets[1:], [self.last_values], axis=0)
+        np.testing.assert_allclose(
+            advantages,
+            self.rewards
+            + self.gamma * (1 - self.dones) * next_value_targets
+            - self.values,
+        )
+
+    def test_compute_vtrace_off_policy(self) -> None:
+        behaviour_log_probs = np.log([[0.5, 0.2], [0.1, 0.4], [0.3, 0.3]])
+        target_log_probs = np.log([[0.25, 0.4], [0.3, 0.2], [0.6, 0.3]])
+        value_targets, advantages = compute_vtrace(
+            behaviour_log_probs,
+            target_log_probs,
+            self.rewards,
+            self.values,
+            self.dones,
+            self.last_values,
+            self.gamma,
+            self.lamb,
+            1.5,
+            1.0,
+        )
+        ratios = np.exp(target_log_probs - behaviour_log_probs)
+        expected_targets = np.zeros(self.values.shape)
+        expected_advantages = np.zeros(self.values.shape)
+
+        for env in range(2):
+            next_value, next_target, correction = self.last_values[env], None, 0
+
+            for step in reversed(range(3)):
+                not_done = 1 - self.dones[step, env]
+                rho = min(1.5, ratios[step, env])
+                c = self.lamb * min(1.0, ratios[step, env])
+                reward, value = self.rewards[step, env], self.values[step, env]
+                delta = rho * (reward + self.gamma * not_done * next_value - value)
+                correction = delta + self.gamma * c * not_done * correction
+                expected_targets[step, env] = value + correction
+
+                if next_target is None:
+                    next_target = self.last_values[env]
+
+                expected_advantages[step, env] = rho * (
+                    reward + self.gamma * not_done * next_target - value
+                )
+                next_value, next_target = value, expected_targets[step, env]
+
+        np.testing.assert_allclose(value_targets, expected_targets)
+        np.testing.assert_allclose(advantages, expected_advantages)
+
+        torch_targets, _ = compute_vtrace(
+            torch.tensor(behaviour_log_probs, dtype=torch.float32),
+            torch.tensor(target_log_probs, dtype=torch.float32),
+            torch.tensor(self.rewards),
+            torch.tensor(self.values, dtype=torch.float32),
+            torch.tensor(self.dones),
+            torch.tensor(self.last_values, dtype=torch.float32),
+            self.gamma,
+            self.lamb,
+            1.5,
+            1.0,
+        )
+        self.assertTrue(torch.is_tensor(torch_targets))
+        np.testing.assert_allclose(torch_targets.numpy(), expected_targets, rtol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
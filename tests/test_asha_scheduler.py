@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from gym_simplifiedtetris.training import ASHAScheduler
+
+
+class ASHASchedulerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.scheduler = ASHAScheduler(1, 2, max_resource=8)
+
+    def test__get_rung(self) -> None:
+        self.assertEqual(
+            [self.scheduler._get_rung(resource) for resource in [0.5, 1, 3, 4, 8, 20]],
+            [-1, 0, 1, 2, 2, 2],
+        )
+
+    def test_report_first_trial_continues(self) -> None:
+        self.assertTrue(self.scheduler.report(0, 1, -5.0))
+        self.assertTrue(self.scheduler.report(0, 2, -4.0))
+
+    def test_report_stops_worse_trials(self) -> None:
+        self.assertTrue(self.scheduler.report(0, 1, 3.0))
+        self.assertFalse(self.scheduler.report(1, 1, 1.0))
+        self.assertTrue(self.scheduler.report(2, 1, 5.0))
+
+        # With four scores at the rung, the best two continue.
+        self.assertTrue(self.scheduler.report(3, 1, 4.0))
+        self.assertTrue(self.scheduler.is_stopped(1))
+        self.assertFalse(self.scheduler.is_stopped(3))
+
+        # A stopped trial stays stopped.
+        self.assertFalse(self.scheduler.report(1, 2, 10.0))
+
+    def test_report_skipped_rungs(self) -> None:
+        self.assertTrue(self.scheduler.report(0, 1, 3.0))
+        self.assertTrue(self.scheduler.report(0, 2, 3.0))
+
+        # Reaching rung 1 without reporting at rung 0 compares at both.
+        self.assertFalse(self.scheduler.report(1, 2, 1.0))
+        self.assertEqual(self.scheduler._rung_scores[0], [3.0, 1.0])
+        self.assertEqual(self.scheduler._rung_scores[1], [3.0])
+
+    def test_report_no_rung_at_max_resource(self) -> None:
+        self.assertTrue(self.scheduler.report(0, 8, 3.0))
+        self.assertFalse(self.scheduler.report(1, 8, 1.0))
+        self.assertNotIn(3, self.scheduler._rung_scores)
+
+    def test_get_reports(self) -> None:
+        self.scheduler.report(0, 1, 3.0)
+        self.scheduler.report(0, 2, 4.0)
+
+        self.assertEqual(self.scheduler.get_reports(0), [(1, 3.0), (2, 4.0)])
+        self.assertEqual(self.scheduler.get_reports(1), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import unittest
+
+import numpy as np
+
+from gym_simplifiedtetris.agents import BeamSearchAgent, HeuristicAgent
+from gym_simplifiedtetris.envs import _SimplifiedTetrisEngine as Engine
+
+
+class BeamSearchAgentTest(unittest.TestCase):
+    def setUp(self) -> None:
+        height = 20
+        width = 10
+        self.piece_size = 4
+        self.num_actions = 4 * width - 6
+
+        self.engine = Engine(
+            grid_dims=(height, width),
+            piece_size=self.piece_size,
+            num_pieces=7,
+            num_actions=self.num_actions,
+        )
+
+        self.engine._reset()
+
+        # Populated grids whose placements never end the game.
+        rng = np.random.default_rng(0)
+        self.grids = []
+
+        for _ in range(4):
+            grid = np.zeros((width, height), dtype="bool")
+            grid[:, -5:] = rng.random((width, 5)) < 0.6
+            self.grids.append(grid)
+
+    def tearDown(self) -> None:
+        self.engine._close()
+        del self.engine
+
+    def _set_state(self, grid: np.ndarray, piece_id: int, /) -> None:
+        self.engine._grid = grid.copy()
+        self.engine._piece = self.engine._pieces[piece_id]
+
+    def _count_rated(self, agent: BeamSearchAgent, /) -> list:
+        # Record the number of placements rated by each call to _rate.
+        num_rated = []
+        rate = agent._rate
+
+        def counting_rate(engine, grids, piece_id, /):
+            afterstates, ratings = rate(engine, grids, piece_id)
+            num_rated.append(ratings.size)
+
+            return afterstates, ratings
+
+        agent._rate = counting_rate
+
+        return num_rated
+
+    def test_predict_depth_one_matches_heuristic(self) -> None:
+        agent = BeamSearchAgent(depth=1)
+
+        for grid in self.grids:
+            for piece_id in self.engine._pieces.keys():
+                self._set_state(grid, piece_id)
+                expected = HeuristicAgent.predict(self.engine._get_dellacherie_scores())
+                self._set_state(grid, piece_id)
+                self.assertEqual(agent.predict(self.engine, []), expected)
+
+    def test_predict_node_budget(self) -> None:
+        greedy_agent = BeamSearchAgent(depth=1)
+        next_piece_ids = [3, 5]
+
+        for node_budget in [self.num_actions, 200]:
+            agent = BeamSearchAgent(depth=3, beam_width=8, node_budget=node_budget)
+            num_rated = self._count_rated(agent)
+
+            for grid in self.grids:
+                num_rated.clear()
+                self._set_state(grid, 1)
+                action = agent.predict(self.engine, next_piece_ids)
+
+                self.assertLessEqual(sum(num_rated), node_budget)
+                self.assertTrue(0 <= action < self.num_actions)
+
+                if node_budget == self.num_actions:
+                    # Only the current piece's placements fit in the budget.
+                    self.assertEqual(len(num_rated), 1)
+                    self.assertEqual(
+                        action, greedy_agent.predict(self.engine, next_piece_ids)
+                    )
+
+    def test_predict_time_budget(self) -> None:
+        greedy_agent = BeamSearchAgent(depth=1)
+        agent = BeamSearchAgent(depth=3, time_budget=0.0)
+        num_rated = self._count_rated(agent)
+
+        for grid in self.grids:
+            num_rated.clear()
+            self._set_state(grid, 1)
+            action = agent.predict(self.engine, [3, 5])
+
+            # The search is cut off once the current piece is rated.
+            self.assertEqual(len(num_rated), 1)
+            self.assertEqual(action, greedy_agent.predict(self.engine, [3, 5]))
+
+        agent = BeamSearchAgent(depth=3, time_budget=0.05)
+        self._set_state(self.grids[0], 1)
+        start_time = time.perf_counter()
+        action = agent.predict(self.engine)
+
+        self.assertLess(time.perf_counter() - start_time, 1.0)
+        self.assertTrue(0 <= action < self.num_actions)
+
+    def test_predict_canonical_actions(self) -> None:
+        # The beam is wide enough that no sequence is dropped, so both agents
+        # find the same placements.
+        for depth in [1, 2]:
+            agent = BeamSearchAgent(depth=depth, beam_width=1000)
+            canonical_agent = BeamSearchAgent(
+                depth=depth, beam_width=1000, canonical_actions=True
+            )
+
+            for grid in self.grids:
+                for piece_id in self.engine._pieces.keys():
+                    self._set_state(grid, piece_id)
+                    action = canonical_agent.predict(self.engine, [2])
+                    canonical_idx = self.engine._get_action_table(piece_id)[
+                        "canonical_indices"
+                    ][action]
+                    afterstates, _, is_terminal = self.engine._get_afterstates(
+                        grid[None], piece_id
+                    )
+                    canonical_afterstates, _, _ = self.engine._get_afterstates(
+                        grid[None], piece_id, True
+                    )
+
+                    # Ties are separated over the raw actions, so the choice
+                    # is the same as without canonical actions.
+                    self.assertEqual(action, agent.predict(self.engine, [2]))
+                    self.assertFalse(is_terminal[0, action])
+                    np.testing.assert_array_equal(
+                        afterstates[0, action], canonical_afterstates[0, canonical_idx]
+                    )
+
+    def test_predict_all_terminal(self) -> None:
+        self.engine._grid[:, self.piece_size :] = True
+        self.engine._piece = self.engine._pieces[2]
+        expected = np.argmax(self.engine._get_priorities(np.arange(self.num_actions)))
+
+        for canonical_actions in [False, True]:
+            agent = BeamSearchAgent(depth=2, canonical_actions=canonical_actions)
+            self.assertEqual(agent.predict(self.engine, [0]), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+
+from gym_simplifiedtetris.agents import UniformAgent
+from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
+from gym_simplifiedtetris.helpers import eval_agent_parallel
+
+
+class EvalAgentParallelTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.env_kwargs = dict(grid_dims=(7, 4), piece_size=2)
+        self.agent = UniformAgent(Tetris(**self.env_kwargs).action_space.n)
+
+    def _eval(self, num_workers: int, num_episodes: int = 12):
+        with mock.patch("builtins.print"):
+            return eval_agent_parallel(
+                self.agent,
+                Tetris,
+                self.env_kwargs,
+                num_episodes=num_episodes,
+                num_workers=num_workers,
+                max_steps=50,
+            )
+
+    def test_scores_do_not_depend_on_num_workers(self) -> None:
+        self.assertEqual(self._eval(1), self._eval(3))
+
+    def test_confidence_interval(self) -> None:
+        mean_score, std_score, confidence_interval = self._eval(2)
+
+        self.assertEqual(len(confidence_interval), 2)
+        self.assertGreater(mean_score, 0)
+        self.assertGreaterEqual(std_score, 0)
+        self.assertAlmostEqual(sum(confidence_interval) / 2, mean_score)
+        self.assertLessEqual(confidence_interval[0], confidence_interval[1])
+
+    def test_confidence_interval_single_episode(self) -> None:
+        mean_score, std_score, confidence_interval = self._eval(1, num_episodes=1)
+
+        self.assertEqual(std_score, 0)
+        self.assertEqual(confidence_interval, (-float("inf"), float("inf")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+from collections import deque
+
+import numpy as np
+from torch import nn
+
+from _vec_env_helpers import SyncVecEnv
+from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
+from gym_simplifiedtetris.trainers import HistoryWrapper
+from gym_simplifiedtetris.training import (
+    Experience,
+    HistoryReplayBuffer,
+    ReplayBuffer,
+    VecEnvAgent,
+)
+
+
+class _BothBuffers(object):
+    """Appends every experience to two replay buffers."""
+
+    def __init__(self, *buffers) -> None:
+        self.buffers = buffers
+
+    def append(self, experience: Experience, stream: int = 0) -> None:
+        for buffer in self.buffers:
+            buffer.append(experience, stream=stream)
+
+
+class HistoryReplayBufferTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.obs_size = 3
+        self.history_len = 3
+
+    def _fill(self, buffer: HistoryReplayBuffer, episode_lens: list) -> dict:
+        """Append episodes to the buffer, returning the expected stacked
+        experiences keyed by action."""
+        expected = {}
+        action = 0
+
+        for episode_len in episode_lens:
+            history = deque(
+                [np.zeros(self.obs_size, dtype=int)] * self.history_len,
+                maxlen=self.history_len,
+            )
+            obs = np.full(self.obs_size, action + 1)
+            obs[-1] = 0
+            history.append(obs)
+
+            for step in range(episode_len):
+                state = np.concatenate(history)
+                new_obs = np.full(self.obs_size, action + 2)
+                new_obs[0] = step % 2
+                done = step == episode_len - 1
+                buffer.append(
+                    Experience(history[-1], action, float(action), done, new_obs)
+                )
+                history.append(new_obs)
+                expected[action] = (state, done, np.concatenate(history))
+                action += 1
+
+        return expected
+
+    def _assert_sample(
+        self, buffer: HistoryReplayBuffer, expected: dict, batch_size: int
+    ) -> np.array:
+        states, actions, rewards, dones, new_states = buffer.sample(batch_size)
+        self.assertEqual(len(set(actions)), batch_size)
+        np.testing.assert_array_equal(rewards, actions)
+
+        for idx, action in enumerate(actions):
+            state, done, new_state = expected[action]
+            np.testing.assert_array_equal(states[idx], state)
+            self.assertEqual(dones[idx], done)
+            np.testing.assert_array_equal(new_states[idx], new_state)
+
+        return actions
+
+    def test_sample_episode_boundaries(self) -> None:
+        buffer = HistoryReplayBuffer(50, self.obs_size, self.history_len, seed=0)
+        expected = self._fill(buffer, [2, 1, 5])
+        self.assertEqual(len(buffer), 8)
+        self._assert_sample(buffer, expected, 8)
+
+    def test_sample_overwritten(self) -> None:
+        buffer = HistoryReplayBuffer(5, self.obs_size, self.history_len, seed=0)
+        expected = self._fill(buffer, [2, 5])
+
+        # The frames of the first episode have been overwritten, and the
+        # histories of the two oldest remaining experiences are incomplete.
+        self.assertEqual(len(buffer), 4)
+        actions = self._assert_sample(buffer, expected, 2)
+        self.assertEqual(sorted(actions), [5, 6])
+
+    def test_sample_packed(self) -> None:
+        buffer = HistoryReplayBuffer(
+            50, self.obs_size, self.history_len, num_cells=1, seed=0
+        )
+        expected = self._fill(buffer, [4])
+        self._assert_sample(buffer, expected, 4)
+
+    def test_streams_of_stacked_states(self) -> None:
+        envs = [
+            HistoryWrapper(
+                Tetris(grid_dims=(8, 6), piece_size=4, seed=seed, mask_actions=True),
+                self.history_len,
+            )
+            for seed in range(3)
+        ]
+        stacked_size = envs[0].observation_space.shape[0]
+        num_actions = envs[0].action_space.n
+        history_buffer = HistoryReplayBuffer(
+            600,
+            stacked_size // self.history_len,
+            self.history_len,
+            num_cells=8 * 6,
+            num_streams=3,
+            num_actions=num_actions,
+        )
+        stacked_buffer = ReplayBuffer(600, stacked_size, num_actions=num_actions)
+        agent = VecEnvAgent(
+            SyncVecEnv(envs),
+            _BothBuffers(history_buffer, stacked_buffer),
+            seed=0,
+            mask_actions=True,
+        )
+        net = nn.Linear(stacked_size, num_actions)
+
+        for _ in range(40):
+            agent.play_step(net, 1.0)
+
+        # The experiences of the envs are interleaved, but each stream still
+        # rebuilds the stacked states of its own env.
+        self.assertEqual(len(history_buffer), 120)
+        history_batch = history_buffer.sample(120)
+        stacked_batch = stacked_buffer._get_batch(np.arange(120))
+        self.assertEqual(len(history_batch), 6)
+
+        def to_rows(batch: tuple) -> list:
+            return sorted(
+                tuple(field[idx].astype("float32").tobytes() for field in batch)
+                for idx in range(len(batch[0]))
+            )
+
+        self.assertEqual(to_rows(history_batch), to_rows(stacked_batch))
+        self.assertLess(history_buffer._frames.nbytes, stacked_buffer._states.nbytes)
+
+    def test_end_episodes(self) -> None:
+        buffer = HistoryReplayBuffer(50, self.obs_size, self.history_len, seed=0)
+        obs = [np.full(self.obs_size, idx) for idx in range(1, 5)]
+        buffer.append(Experience(obs[0], 0, 0.0, False, obs[1]))
+        buffer.end_episodes()
+        buffer.append(Experience(obs[2], 1, 0.0, False, obs[3]))
+
+        states, actions, _, _, _ = buffer.sample(2)
+        zeros = np.zeros(self.obs_size * (self.history_len - 1))
+        np.testing.assert_array_equal(
+            states[np.argsort(actions)],
+            [np.concatenate([zeros, obs[0]]), np.concatenate([zeros, obs[2]])],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv
+from gym_simplifiedtetris.trainers import HistoryWrapper
+
+
+class HistoryWrapperTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.env = HistoryWrapper(
+            SimplifiedTetrisBinaryEnv(grid_dims=(7, 4), piece_size=1, seed=0), 3
+        )
+        self.obs_size = self.env.env.observation_space.shape[0]
+
+    def test_observation_space(self) -> None:
+        self.assertEqual(self.env.observation_space.shape, (3 * self.obs_size,))
+
+    def test_reset_pads_with_zeros(self) -> None:
+        obs = self.env.reset()
+
+        np.testing.assert_array_equal(obs[: 2 * self.obs_size], 0)
+        np.testing.assert_array_equal(obs[2 * self.obs_size :], self.env.env._get_obs())
+
+    def test_step_stacks_oldest_first(self) -> None:
+        first_obs = self.env.reset()[2 * self.obs_size :]
+        second_obs = self.env.step(0)[0][2 * self.obs_size :]
+        obs, _, _, _ = self.env.step(1)
+
+        np.testing.assert_array_equal(obs[: self.obs_size], first_obs)
+        np.testing.assert_array_equal(
+            obs[self.obs_size : 2 * self.obs_size], second_obs
+        )
+        np.testing.assert_array_equal(obs[2 * self.obs_size :], self.env.env._get_obs())
+
+
+if __name__ == "__main__":
+    unittest.main()
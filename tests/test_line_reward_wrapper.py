@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv
+from gym_simplifiedtetris.trainers import LineRewardWrapper
+
+
+class LineRewardWrapperTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.env = LineRewardWrapper(
+            SimplifiedTetrisBinaryEnv(grid_dims=(7, 4), piece_size=1, seed=0),
+            line_rewards=(0, 40),
+            terminal_reward=-10.0,
+        )
+        self.env.reset()
+
+    def test_step_line_rewards(self) -> None:
+        # Dropping a monomino in each column clears the bottom row.
+        rewards = [self.env.step(action)[1] for action in range(4)]
+
+        self.assertEqual(rewards, [0, 0, 0, 40])
+        np.testing.assert_array_equal(self.env.pop_line_counts(), [1])
+        np.testing.assert_array_equal(self.env.line_counts, [0])
+
+    def test_step_terminal_reward(self) -> None:
+        done = False
+
+        while not done:
+            _, reward, done, _ = self.env.step(0)
+
+        self.assertEqual(reward, -10.0)
+
+    def test_step_env_reward(self) -> None:
+        env = LineRewardWrapper(
+            SimplifiedTetrisBinaryEnv(grid_dims=(7, 4), piece_size=1, seed=0)
+        )
+        env.reset()
+        rewards = [env.step(action)[1] for action in range(4)]
+
+        self.assertEqual(rewards, [0, 0, 0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import torch
+
+from gym_simplifiedtetris.training import MetricsSink
+
+
+class MetricsSinkTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "metrics.csv")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def _read_rows(self):
+        with open(self.path, newline="") as file:
+            return list(csv.reader(file))
+
+    def test_close_writes_rows(self) -> None:
+        with MetricsSink(self.path, ["step", "loss"], flush_interval=60) as sink:
+            sink.log(step=0, loss=torch.tensor(0.5, requires_grad=True) * 2)
+            sink.log(step=1, loss=np.float32(0.25))
+
+            # Nothing is written before the interval has passed.
+            self.assertFalse(os.path.exists(self.path))
+
+        self.assertEqual(
+            self._read_rows(), [["step", "loss"], ["0", "1.0"], ["1", "0.25"]]
+        )
+        self.assertEqual(sink.num_rows_written, 2)
+
+    def test_background_flush(self) -> None:
+        sink = MetricsSink(self.path, ["step"], flush_interval=0.05)
+        sink.log(step=0)
+        deadline = time.monotonic() + 5
+
+        while sink.num_rows_written < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self._read_rows(), [["step"], ["0"]])
+
+        sink.log(step=1)
+        sink.close()
+        sink.close()
+
+        self.assertEqual(self._read_rows(), [["step"], ["0"], ["1"]])
+
+    def test_flush_appends_batches(self) -> None:
+        sink = MetricsSink(self.path, ["step"], flush_interval=60)
+
+        for step in range(3):
+            sink.log(step=step)
+            sink.flush()
+
+        sink.flush()
+        sink.close()
+
+        self.assertEqual(self._read_rows(), [["step"], ["0"], ["1"], ["2"]])
+
+    def test_log_missing_column(self) -> None:
+        with MetricsSink(self.path, ["step", "loss"], flush_interval=60) as sink:
+            with self.assertRaises(AssertionError):
+                sink.log(step=0)
+
+    def test_log_unknown_column(self) -> None:
+        with MetricsSink(self.path, ["step", "loss"], flush_interval=60) as sink:
+            with self.assertRaises(AssertionError):
+                sink.log(step=0, lr=1.0)
+
+            sink.log(step=1, loss=0.5)
+
+        self.assertEqual(self._read_rows(), [["step", "loss"], ["1", "0.5"]])
+
+    def test_exit_writes_rows(self) -> None:
+        code = (
+            "from gym_simplifiedtetris.training import MetricsSink\n"
+            f"MetricsSink({self.path!r}, ['step'], flush_interval=60).log(step=0)\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+        self.assertEqual(self._read_rows(), [["step"], ["0"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import torch
+
+from gym_simplifiedtetris.trainers import (
+    ActorNet,
+    CriticNet,
+    QNetwork,
+    SharedActorCriticNet,
+)
+
+
+class NetworksTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.obs_size = 101
+        self.n_actions = 20
+        self.states = torch.randint(0, 2, (5, self.obs_size))
+        self.mask = torch.ones(5, self.n_actions, dtype=torch.bool)
+        self.mask[:, 1:] = False
+
+    def test_q_network(self) -> None:
+        for net in ["mlp", "cnn"]:
+            q_net = QNetwork(self.obs_size, self.n_actions, 2, 32, net)
+
+            self.assertEqual(q_net(self.states).shape, (5, self.n_actions))
+
+    def test_actor_critic_nets(self) -> None:
+        for net in ["mlp", "cnn"]:
+            actor = ActorNet(self.obs_size, self.n_actions, 2, 32, net)
+            critic = CriticNet(self.obs_size, 32, net)
+            dist, action = actor(self.states, self.mask)
+
+            self.assertEqual(dist.probs.shape, (5, self.n_actions))
+            self.assertTrue(torch.all(action == 0))
+            self.assertEqual(critic(self.states).shape, (5, 1))
+
+    def test_shared_actor_critic_net(self) -> None:
+        for net in ["mlp", "cnn"]:
+            shared = SharedActorCriticNet(self.obs_size, self.n_actions, 1, 32, net)
+            dist, action, value = shared(self.states, self.mask)
+
+            self.assertEqual(dist.probs.shape, (5, self.n_actions))
+            self.assertTrue(torch.all(action == 0))
+            self.assertEqual(value.shape, (5, 1))
+
+    def test_invalid_net(self) -> None:
+        with self.assertRaises(AssertionError):
+            QNetwork(self.obs_size, self.n_actions, net="lstm")
+
+
+if __name__ == "__main__":
+    unittest.main()
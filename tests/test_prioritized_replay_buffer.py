@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_simplifiedtetris.training import (
+    Experience,
+    PrioritizedHistoryReplayBuffer,
+    PrioritizedReplayBuffer,
+    SumTree,
+)
+
+
+class SumTreeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tree = SumTree(5)
+        self.tree.update([0, 1, 2, 3, 4], [1, 0, 2, 3, 0])
+
+    def test_total(self) -> None:
+        self.assertEqual(self.tree.total, 6)
+
+    def test_find(self) -> None:
+        np.testing.assert_array_equal(
+            self.tree.find([0, 0.5, 1, 2.9, 3, 5.99]), [0, 0, 2, 2, 3, 3]
+        )
+
+    def test_update_duplicates(self) -> None:
+        self.tree.update([4, 4, 0], [1, 1, 0])
+        self.assertEqual(self.tree.total, 6)
+        np.testing.assert_array_equal(self.tree[[0, 4]], [0, 1])
+
+
+class PrioritizedReplayBufferTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.buffer = PrioritizedReplayBuffer(4, 2, alpha=1, beta=1, epsilon=0, seed=0)
+
+        for idx in range(6):
+            self.buffer.append(Experience([idx, idx], idx, 0.0, False, [idx, idx]))
+
+    def test_sample(self) -> None:
+        states, actions, _, _, _, indices, weights = self.buffer.sample(4)
+        self.assertEqual(sorted(actions), [2, 3, 4, 5])
+        np.testing.assert_array_equal(states[:, 0], actions)
+        np.testing.assert_array_equal(self.buffer._actions[indices], actions)
+        np.testing.assert_array_equal(weights, np.ones(4))
+
+    def test_update_priorities(self) -> None:
+        _, _, _, _, _, indices, _ = self.buffer.sample(4)
+        self.buffer.update_priorities(indices, np.where(indices == 0, 3, 1))
+
+        _, actions, _, _, _, _, weights = self.buffer.sample(6)
+        np.testing.assert_array_equal(actions, [4, 4, 4, 5, 2, 3])
+        np.testing.assert_allclose(weights, [1 / 3] * 3 + [1] * 3)
+
+
+class PrioritizedHistoryReplayBufferTest(unittest.TestCase):
+    def test_sample_skips_unsampleable(self) -> None:
+        buffer = PrioritizedHistoryReplayBuffer(5, 1, 3, seed=0)
+
+        for episode_len in [2, 5]:
+            for step in range(episode_len):
+                done = step == episode_len - 1
+                buffer.append(Experience([0], step, 0.0, done, [0]))
+
+        # Only the last two experiences have their full history stored.
+        _, actions, _, _, _, _, _ = buffer.sample(20)
+        self.assertEqual(set(actions), {3, 4})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+from functools import partial
+
+import numpy as np
+
+from gym_simplifiedtetris.agents import QLearningAgent
+from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
+from gym_simplifiedtetris.helpers import train_q_learning_batch
+from gym_simplifiedtetris.training import ThreadPoolVecEnv
+
+
+class QLearningAgentTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.grid_dims = (4, 3)
+        self.num_cells = self.grid_dims[0] * self.grid_dims[1]
+        self.num_actions = 6
+
+    def _get_agent(self, sparse: bool) -> QLearningAgent:
+        return QLearningAgent(
+            grid_dims=self.grid_dims,
+            num_pieces=2,
+            num_actions=self.num_actions,
+            alpha=0.5,
+            gamma=0.9,
+            epsilon=0.0,
+            sparse=sparse,
+        )
+
+    def _get_obs(self, cell: int, piece_id: int) -> np.array:
+        obs = np.zeros(self.num_cells + 1, dtype=int)
+        obs[cell] = 1
+        obs[-1] = piece_id
+
+        return obs
+
+    def test_learn_batch_matches_learn(self) -> None:
+        obs = np.stack([self._get_obs(0, 0), self._get_obs(1, 1), self._get_obs(2, 0)])
+        next_obs = np.stack(
+            [self._get_obs(1, 1), self._get_obs(2, 0), self._get_obs(3, 1)]
+        )
+        actions = np.array([1, 2, 3])
+        rewards = np.array([1.0, 0.0, 2.0])
+        dones = np.zeros(3, dtype=bool)
+
+        for sparse in [False, True]:
+            with self.subTest(sparse=sparse):
+                agent = self._get_agent(sparse)
+                batch_agent = self._get_agent(sparse)
+
+                # The Q-values start at zero, so the updates of distinct
+                # states do not depend on each other.
+                for idx in range(3):
+                    agent.learn(rewards[idx], obs[idx], next_obs[idx], actions[idx])
+
+                batch_agent.learn_batch(rewards, obs, next_obs, actions, dones)
+
+                np.testing.assert_allclose(
+                    batch_agent._get_batch_q_values(obs),
+                    agent._get_batch_q_values(obs),
+                )
+
+    def test_learn_batch_sums_repeated_pairs_and_ignores_terminal_values(
+        self,
+    ) -> None:
+        for sparse in [False, True]:
+            with self.subTest(sparse=sparse):
+                agent = self._get_agent(sparse)
+                agent.learn_batch(
+                    np.array([0.0]),
+                    self._get_obs(1, 0)[None],
+                    self._get_obs(2, 0)[None],
+                    np.array([0]),
+                    np.array([False]),
+                )
+                obs = np.stack([self._get_obs(0, 0), self._get_obs(0, 0)])
+                next_obs = np.stack([self._get_obs(1, 0), self._get_obs(1, 0)])
+                agent.learn_batch(
+                    np.array([1.0, 1.0]), obs, next_obs, np.array([4, 4]), np.ones(2)
+                )
+
+                # Both terminal updates add alpha * reward to the same pair.
+                self.assertAlmostEqual(agent._get_q_values(self._get_obs(0, 0))[4], 1.0)
+
+    def test_predict_batch(self) -> None:
+        agent = self._get_agent(sparse=True)
+        obs = np.stack([self._get_obs(0, 0), self._get_obs(1, 1)])
+        agent.learn_batch(
+            np.array([1.0, 1.0]), obs, obs, np.array([2, 5]), np.ones(2, dtype=bool)
+        )
+        np.testing.assert_array_equal(agent.predict_batch(obs), [2, 5])
+
+        agent.epsilon = 1.0
+        actions = agent.predict_batch(np.repeat(obs, 50, axis=0))
+        self.assertEqual(actions.shape, (100,))
+        self.assertTrue(np.all((actions >= 0) & (actions < self.num_actions)))
+        self.assertGreater(len(np.unique(actions)), 1)
+
+    def test_train_q_learning_batch(self) -> None:
+        vec_env = ThreadPoolVecEnv(
+            [
+                partial(Tetris, grid_dims=(8, 6), piece_size=2, seed=seed)
+                for seed in range(2)
+            ]
+        )
+        agent = QLearningAgent(
+            grid_dims=(8, 6),
+            num_pieces=vec_env.get_attr("_num_pieces_")[0],
+            num_actions=vec_env.action_space.n,
+            sparse=True,
+        )
+
+        trained_agent = train_q_learning_batch(vec_env, agent, num_eval_timesteps=40)
+        vec_env.close()
+
+        self.assertIs(trained_agent, agent)
+        self.assertEqual(agent.epsilon, 0)
+        self.assertGreater(len(agent._q_table), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
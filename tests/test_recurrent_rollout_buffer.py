@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+import torch
+
+from gym_simplifiedtetris.training import RecurrentRolloutBuffer
+
+
+class RecurrentRolloutBufferTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.buffer = RecurrentRolloutBuffer(6, 2, 3, 4, 3, seed=0)
+
+        for step in range(6):
+            self.buffer.add(
+                np.full((2, 3), step),
+                [step, step + 10],
+                [-0.5, -1.5],
+                [1, 0],
+                [step == 1, False],
+                torch.tensor([[0.5], [0.25]]),
+                (np.full((2, 4), step), np.full((2, 4), -step)),
+            )
+
+        self.buffer.compute_returns_and_advantages([2, 4], 0.5, 0.9)
+
+    def test_add(self) -> None:
+        self.assertTrue(self.buffer.is_full)
+        np.testing.assert_array_equal(self.buffer.hidden_states[:, 0, 0], [0, 3])
+        np.testing.assert_array_equal(self.buffer.cell_states[:, 1, 0], [0, -3])
+
+    def test_get_minibatches(self) -> None:
+        minibatches = list(self.buffer.get_minibatches(7, 2))
+        self.assertEqual([len(batch[1]) for batch in minibatches], [2, 2] * 2)
+
+        for epoch in range(2):
+            epoch_batches = minibatches[2 * epoch : 2 * (epoch + 1)]
+            actions = torch.cat([batch[1] for batch in epoch_batches])
+            self.assertEqual(
+                sorted(actions.tolist()),
+                [[0, 1, 2], [3, 4, 5], [10, 11, 12], [13, 14, 15]],
+            )
+
+        for batch in minibatches:
+            states, actions, _, returns, _, dones, hidden_states, cell_states = batch
+            self.assertEqual(states.shape[1:], (3, 3))
+            self.assertEqual(hidden_states.shape[1:], (4,))
+            np.testing.assert_array_equal(states[:, :, 0], actions % 10)
+
+            # Each sequence starts from the LSTM state stored at its first step.
+            np.testing.assert_array_equal(hidden_states[:, 0], actions[:, 0] % 10)
+            np.testing.assert_array_equal(cell_states[:, 0], -(actions[:, 0] % 10))
+
+            np.testing.assert_array_equal(dones, actions == 1)
+            np.testing.assert_allclose(
+                returns,
+                self.buffer.returns[actions % 10, (actions >= 10).long()],
+            )
+
+    def test_seq_len_divides_num_steps(self) -> None:
+        with self.assertRaises(AssertionError):
+            RecurrentRolloutBuffer(5, 2, 3, 4, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
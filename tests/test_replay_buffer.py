@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_simplifiedtetris.training import Experience, ReplayBuffer
+
+
+class ReplayBufferTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.obs_size = 5
+        self.buffer = ReplayBuffer(3, self.obs_size, seed=0)
+
+    def _get_experience(self, idx: int) -> Experience:
+        return Experience(
+            np.full(self.obs_size, idx),
+            idx,
+            float(idx),
+            idx % 2 == 0,
+            np.full(self.obs_size, idx + 1),
+        )
+
+    def test_append(self) -> None:
+        self.buffer.append(self._get_experience(0))
+        self.buffer.append(self._get_experience(1))
+        self.assertEqual(len(self.buffer), 2)
+
+    def test_append_overwrites_oldest(self) -> None:
+        for idx in range(5):
+            self.buffer.append(self._get_experience(idx))
+
+        self.assertEqual(len(self.buffer), 3)
+        states, actions, _, _, _ = self.buffer.sample(3)
+        self.assertEqual(sorted(actions), [2, 3, 4])
+        np.testing.assert_array_equal(states[:, 0], actions)
+
+    def test_sample(self) -> None:
+        for idx in range(3):
+            self.buffer.append(self._get_experience(idx))
+
+        states, actions, rewards, dones, new_states = self.buffer.sample(2)
+        self.assertEqual(states.shape, (2, self.obs_size))
+        self.assertEqual(len(set(actions)), 2)
+        np.testing.assert_array_equal(rewards, actions)
+        np.testing.assert_array_equal(dones, actions % 2 == 0)
+        np.testing.assert_array_equal(new_states, states + 1)
+        self.assertEqual(rewards.dtype, np.float32)
+
+    def test_sample_packed(self) -> None:
+        buffer = ReplayBuffer(2, 11, num_cells=10, seed=0)
+        state = np.array([1, 0, 1, 1, 0, 0, 0, 1, 0, 1, 6])
+        new_state = np.array([0, 1, 0, 0, 1, 1, 1, 0, 1, 0, 3])
+        buffer.append(Experience(state, 0, 1.0, False, new_state))
+
+        states, _, _, _, new_states = buffer.sample(1)
+        np.testing.assert_array_equal(states, [state])
+        np.testing.assert_array_equal(new_states, [new_state])
+        self.assertEqual(buffer._states.shape, (2, 3))
+
+    def test_sample_action_masks(self) -> None:
+        buffer = ReplayBuffer(2, self.obs_size, seed=0, num_actions=3)
+        state = np.zeros(self.obs_size)
+        buffer.append(Experience(state, 0, 0.0, False, state, [True, False, True]))
+        buffer.append(Experience(state, 1, 0.0, True, state))
+
+        batch = buffer.sample(2)
+        self.assertEqual(len(batch), 6)
+        np.testing.assert_array_equal(
+            batch[5][np.argsort(batch[1])], [[True, False, True], [True, True, True]]
+        )
+        self.assertEqual(len(self.buffer.sample(0)), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+
+from gym_simplifiedtetris.training import Experience, ReplayBuffer, ReplayDataset
+
+
+class ReplayDatasetTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.buffer = ReplayBuffer(10, 3, seed=0)
+
+        for idx in range(10):
+            self.buffer.append(
+                Experience(np.full(3, idx), idx, float(idx), False, np.full(3, idx))
+            )
+
+    def test_iter(self) -> None:
+        dataloader = DataLoader(ReplayDataset(self.buffer, 4, 3), batch_size=None)
+        batches = list(dataloader)
+        self.assertEqual(len(batches), 3)
+
+        for states, actions, rewards, dones, new_states in batches:
+            self.assertEqual(states.shape, (4, 3))
+            self.assertEqual(actions.dtype, torch.int64)
+            self.assertEqual(rewards.dtype, torch.float32)
+            self.assertEqual(dones.dtype, torch.bool)
+            self.assertTrue(torch.equal(states[:, 0].long(), actions))
+            self.assertTrue(torch.equal(new_states, states))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+import torch
+from torch.distributions import Categorical
+
+from _vec_env_helpers import SyncVecEnv
+from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
+from gym_simplifiedtetris.training import RolloutAgent, RolloutBuffer
+
+
+class _UniformActorCritic(object):
+    """Samples uniform actions and values each state at one, counting calls."""
+
+    def __init__(self, num_actions: int) -> None:
+        self.num_actions = num_actions
+        self.batch_sizes = []
+
+    def __call__(self, states: torch.Tensor, masks: torch.Tensor = None) -> tuple:
+        self.batch_sizes.append(len(states))
+        logits = torch.zeros(len(states), self.num_actions)
+
+        if masks is not None:
+            logits = logits.masked_fill(~masks, float("-inf"))
+
+        dist = Categorical(logits=logits)
+        actions = dist.sample()
+
+        return dist, actions, dist.log_prob(actions), torch.ones(len(states), 1)
+
+
+class RolloutAgentTest(unittest.TestCase):
+    def setUp(self) -> None:
+        torch.manual_seed(0)
+        envs = [
+            Tetris(grid_dims=(8, 6), piece_size=4, mask_actions=True) for _ in range(3)
+        ]
+
+        for seed, env in enumerate(envs):
+            env._seed(seed)
+
+        self.vec_env = SyncVecEnv(envs)
+        self.obs_size = obs_size = envs[0].observation_space.shape[0]
+        self.buffer = RolloutBuffer(40, 3, obs_size, seed=0)
+        self.agent = RolloutAgent(self.vec_env, self.buffer)
+
+        self.actor_critic = _UniformActorCritic(envs[0].action_space.n)
+
+    def test_play_step(self) -> None:
+        states = self.agent.states.copy()
+        self.agent.play_step(self.actor_critic)
+
+        self.assertEqual(self.buffer.pos, 1)
+        self.assertEqual(self.actor_critic.batch_sizes, [3])
+        np.testing.assert_array_equal(self.buffer.states[0], states)
+        np.testing.assert_allclose(
+            self.buffer.log_probs[0], -np.log(self.actor_critic.num_actions), rtol=1e-6
+        )
+
+    def test_collect_rollout(self) -> None:
+        ep_rewards, last_values = self.agent.collect_rollout(
+            self.actor_critic, 0.9, 0.95
+        )
+
+        # One forward pass per step, plus one to bootstrap.
+        self.assertEqual(self.actor_critic.batch_sizes, [3] * 41)
+        self.assertTrue(self.buffer.is_full)
+        self.assertEqual(len(ep_rewards), self.buffer.dones.sum())
+        np.testing.assert_array_equal(last_values, np.ones(3))
+
+        # The values are exact, so every advantage is the TD error.
+        not_dones = 1 - self.buffer.dones
+        np.testing.assert_allclose(
+            self.buffer.advantages[-1],
+            self.buffer.rewards[-1] + 0.9 * not_dones[-1] - 1,
+            rtol=1e-6,
+        )
+
+    def test_collect_rollout_masked(self) -> None:
+        num_actions = self.actor_critic.num_actions
+        buffer = RolloutBuffer(40, 3, self.obs_size, seed=0, num_actions=num_actions)
+        agent = RolloutAgent(self.vec_env, buffer, mask_actions=True)
+        agent.collect_rollout(self.actor_critic, 0.9, 0.95)
+
+        # Every action sampled is allowed by the mask it was sampled under.
+        self.assertTrue(
+            np.all(
+                np.take_along_axis(
+                    buffer.action_masks, buffer.actions[..., None], axis=2
+                )
+            )
+        )
+        self.assertFalse(np.all(buffer.action_masks))
+
+        minibatch = next(buffer.get_minibatches(8))
+        self.assertEqual(minibatch[5].shape, (8, num_actions))
+
+
+if __name__ == "__main__":
+    unittest.main()
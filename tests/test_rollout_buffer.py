@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+import torch
+
+from gym_simplifiedtetris.training import RolloutBuffer, compute_gae, compute_vtrace
+
+
+class RolloutBufferTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.buffer = RolloutBuffer(4, 2, 3, seed=0)
+
+        for step in range(4):
+            self.buffer.add(
+                np.full((2, 3), step),
+                [step, step + 10],
+                [-0.5, -1.5],
+                [1, 0],
+                [step == 1, False],
+                torch.tensor([[0.5], [0.25]]),
+            )
+
+    def test_add(self) -> None:
+        self.assertTrue(self.buffer.is_full)
+        np.testing.assert_array_equal(self.buffer.actions[:, 1], [10, 11, 12, 13])
+        np.testing.assert_array_equal(self.buffer.values[2], [0.5, 0.25])
+
+    def test_compute_returns_and_advantages(self) -> None:
+        self.buffer.compute_returns_and_advantages([2, 4], 0.5, 0.9)
+        np.testing.assert_allclose(self.buffer.returns[:, 0], [1.5, 1, 2, 2])
+        np.testing.assert_allclose(self.buffer.returns[:, 1], [0.25, 0.5, 1, 2])
+
+        advantages, _ = compute_gae(
+            self.buffer.rewards,
+            self.buffer.values,
+            self.buffer.dones,
+            np.array([2, 4], dtype="float32"),
+            0.5,
+            0.9,
+        )
+        np.testing.assert_allclose(self.buffer.advantages, advantages)
+
+    def test_compute_vtrace_targets(self) -> None:
+        target_log_probs = np.log(np.full((4, 2), 0.5))
+        self.buffer.compute_vtrace_targets(target_log_probs, [2, 4], 0.5, 0.9)
+
+        value_targets, advantages = compute_vtrace(
+            self.buffer.log_probs,
+            target_log_probs.astype("float32"),
+            self.buffer.rewards,
+            self.buffer.values,
+            self.buffer.dones,
+            np.array([2, 4], dtype="float32"),
+            0.5,
+            0.9,
+        )
+        np.testing.assert_allclose(self.buffer.returns, value_targets)
+        np.testing.assert_allclose(self.buffer.advantages, advantages)
+
+    def test_get_minibatches(self) -> None:
+        self.buffer.compute_returns_and_advantages([2, 4], 0.5, 0.9)
+        minibatches = list(self.buffer.get_minibatches(3, 2))
+        self.assertEqual([len(batch[1]) for batch in minibatches], [3, 3, 2] * 2)
+
+        for epoch in range(2):
+            epoch_batches = minibatches[3 * epoch : 3 * (epoch + 1)]
+            actions = torch.cat([batch[1] for batch in epoch_batches])
+            self.assertEqual(sorted(actions.tolist()), [0, 1, 2, 3, 10, 11, 12, 13])
+
+        for states, actions, log_probs, _, _ in minibatches:
+            self.assertEqual(states.shape[1:], (3,))
+            np.testing.assert_array_equal(states[:, 0], actions % 10)
+            np.testing.assert_array_equal(log_probs, np.where(actions < 10, -0.5, -1.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from gym_simplifiedtetris.training import allocate_run
+
+
+def _allocate_runs(directory: str, num_runs: int) -> list:
+    return [allocate_run(directory, "{}.csv")[0] for _ in range(num_runs)]
+
+
+class AllocateRunTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.log_dir = os.path.join(self.dir.name, "log", "runs")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_allocate_run_sequential(self) -> None:
+        runs = [allocate_run(self.log_dir, "{}.csv") for _ in range(3)]
+
+        self.assertEqual([run_id for run_id, _ in runs], [1, 2, 3])
+
+        for run_id, path in runs:
+            self.assertEqual(path, os.path.join(self.log_dir, f"{run_id}.csv"))
+            self.assertTrue(os.path.isfile(path))
+
+    def test_allocate_run_skips_existing(self) -> None:
+        os.makedirs(self.log_dir)
+
+        for name in ["1.csv", "2.csv", "4.csv"]:
+            open(os.path.join(self.log_dir, name), "w").close()
+
+        self.assertEqual(
+            [allocate_run(self.log_dir, "{}.csv")[0] for _ in range(2)], [3, 5]
+        )
+
+    def test_allocate_run_formats(self) -> None:
+        self.assertEqual(allocate_run(self.log_dir, "score_count{}.csv")[0], 1)
+        self.assertEqual(allocate_run(self.log_dir, "{}.csv")[0], 2)
+
+    def test_allocate_run_parallel(self) -> None:
+        with multiprocessing.Pool(4) as pool:
+            run_ids = sum(pool.starmap(_allocate_runs, [(self.log_dir, 10)] * 8), [])
+
+        self.assertEqual(sorted(run_ids), list(range(1, 81)))
+
+
+if __name__ == "__main__":
+    unittest.main()
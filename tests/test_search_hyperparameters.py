@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+import unittest
+from typing import Callable
+
+from bayes_opt import BayesianOptimization
+
+from gym_simplifiedtetris.helpers import search_hyperparameters
+from gym_simplifiedtetris.helpers.search_hyperparameters import _register
+
+_NUM_EPOCHS = 4
+
+
+def _objective(report: Callable[[float, float], bool], x: float) -> float:
+    score = -((x - 0.3) ** 2)
+
+    for epoch in range(1, _NUM_EPOCHS + 1):
+        if not report(epoch, score + epoch):
+            break
+
+    return score + epoch
+
+
+class SearchHyperparametersTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.dir.name, "trials.jsonl")
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_search(self) -> None:
+        best = search_hyperparameters(
+            _objective,
+            {"x": (0.0, 1.0)},
+            num_trials=8,
+            num_workers=2,
+            init_points=4,
+            min_resource=1,
+            reduction_factor=2,
+            max_resource=_NUM_EPOCHS,
+            log_path=self.log_path,
+        )
+
+        with open(self.log_path) as file:
+            trials = [json.loads(line) for line in file]
+
+        self.assertEqual(len(trials), 8)
+        self.assertEqual(sorted(trial["trial_id"] for trial in trials), list(range(8)))
+
+        # A trial stops at the first report that returns False, so only the
+        # trials stopped early have fewer reports than epochs.
+        for trial in trials:
+            self.assertEqual(
+                trial["stopped_early"], len(trial["reports"]) < _NUM_EPOCHS
+            )
+            self.assertEqual(trial["target"], trial["reports"][-1][1])
+
+        self.assertTrue(any(trial["stopped_early"] for trial in trials))
+
+        best_trial = max(trials, key=lambda trial: trial["target"])
+        self.assertEqual(best["target"], best_trial["target"])
+        self.assertEqual(best["params"], best_trial["params"])
+
+    def test_register_duplicate(self) -> None:
+        optimizer = BayesianOptimization(f=None, pbounds={"x": (0.0, 1.0)})
+
+        _register(optimizer, {"x": 0.5}, 1.0)
+        _register(optimizer, {"x": 0.5}, 2.0)
+        _register(optimizer, {"x": 0.25}, 3.0)
+
+        # The first score of the duplicated hyperparameters is kept.
+        self.assertEqual(len(optimizer.space), 2)
+        self.assertEqual(optimizer.space.target.tolist(), [1.0, 3.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
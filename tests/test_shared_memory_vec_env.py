@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+from functools import partial
+
+import numpy as np
+
+from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
+from gym_simplifiedtetris.training import SharedMemoryVecEnv
+
+
+class SharedMemoryVecEnvTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.env_fns = [
+            partial(Tetris, grid_dims=(8, 6), piece_size=4, seed=seed)
+            for seed in range(5)
+        ]
+        self.vec_env = SharedMemoryVecEnv(self.env_fns, num_workers=2)
+        self.envs = [env_fn() for env_fn in self.env_fns]
+
+    def tearDown(self) -> None:
+        self.vec_env.close()
+
+        for env in self.envs:
+            env.close()
+
+    def test_spaces(self) -> None:
+        self.assertEqual(self.vec_env.num_envs, 5)
+        self.assertEqual(
+            self.vec_env.observation_space.shape, self.envs[0].observation_space.shape
+        )
+        self.assertEqual(self.vec_env.action_space.n, self.envs[0].action_space.n)
+
+    def test_step_matches_envs(self) -> None:
+        obs = self.vec_env.reset()
+        expected_obs = np.stack([env.reset() for env in self.envs])
+        np.testing.assert_array_equal(obs, expected_obs)
+
+        rng = np.random.default_rng(0)
+        num_actions = self.envs[0].action_space.n
+        num_dones = 0
+
+        for _ in range(60):
+            actions = rng.integers(num_actions, size=5)
+            self.vec_env.step_async(actions)
+            obs, rewards, dones, infos = self.vec_env.step_wait()
+
+            for idx, env in enumerate(self.envs):
+                env_obs, env_reward, env_done, env_info = env.step(actions[idx])
+
+                if env_done:
+                    np.testing.assert_array_equal(
+                        infos[idx]["terminal_observation"], env_obs
+                    )
+                    env_obs = env.reset()
+
+                np.testing.assert_array_equal(obs[idx], env_obs)
+                self.assertAlmostEqual(rewards[idx], env_reward, places=5)
+                self.assertEqual(dones[idx], env_done)
+                self.assertEqual(
+                    infos[idx]["num_rows_cleared"], env_info["num_rows_cleared"]
+                )
+
+            num_dones += dones.sum()
+
+        self.assertGreater(num_dones, 0)
+
+    def test_step_returns_copies(self) -> None:
+        obs = self.vec_env.reset()
+        first_obs = obs.copy()
+        self.vec_env.step(np.zeros(5, dtype=int))
+
+        np.testing.assert_array_equal(obs, first_obs)
+
+    def test_env_method(self) -> None:
+        self.vec_env.reset()
+        masks = self.vec_env.env_method("action_masks", indices=[4, 0, 2])
+
+        self.assertEqual(len(masks), 3)
+
+        for mask, idx in zip(masks, [4, 0, 2]):
+            self.envs[idx].reset()
+            np.testing.assert_array_equal(mask, self.envs[idx].action_masks())
+
+    def test_get_attr(self) -> None:
+        heights = self.vec_env.get_attr("_height_")
+
+        self.assertEqual(heights, [8] * 5)
+
+    def test_close(self) -> None:
+        self.vec_env.close()
+
+        self.assertTrue(self.vec_env.closed)
+        self.assertTrue(
+            all(not process.is_alive() for process in self.vec_env._processes)
+        )
+
+        self.vec_env.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
+
+
+class SimplifiedTetrisBinaryEnvTest(unittest.TestCase):
+    def _get_piece_ids(self, env: Tetris) -> list:
+        return [env._engine._generate_id_randomly() for _ in range(50)]
+
+    def test_unseeded_envs_differ(self) -> None:
+        envs = [Tetris(grid_dims=(10, 10), piece_size=4) for _ in range(2)]
+
+        self.assertNotEqual(*[self._get_piece_ids(env) for env in envs])
+
+    def test_seeded_envs_match(self) -> None:
+        envs = [Tetris(grid_dims=(10, 10), piece_size=4, seed=3) for _ in range(2)]
+
+        self.assertEqual(*[self._get_piece_ids(env) for env in envs])
+
+
+if __name__ == "__main__":
+    unittest.main()
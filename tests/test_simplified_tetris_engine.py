@@ -290,6 +290,134 @@ class _SimplifiedTetrisEngineStandardTetrisTest(unittest.TestCase):
         self.engine._grid[4, self.engine._height - 1] = False
         np.testing.assert_array_equal(self.engine._get_cumulative_wells(), 6)
 
+    def test__get_afterstates_populated_grid(self) -> None:
+        self.engine._grid[:, -5:] = True
+        self.engine._grid[1, self.engine._height - 5 : self.engine._height - 1] = False
+        self.engine._grid[self.engine._width - 1, self.engine._height - 2] = False
+        self.engine._grid[self.engine._width - 3, self.engine._height - 3] = False
+        grid = self.engine._grid.copy()
+
+        for idx in self.engine._pieces.keys():
+            afterstates, feature_values, is_terminal = self.engine._get_afterstates(
+                grid[None], idx
+            )
+
+            for action, (translation, rotation) in self.engine._all_available_actions[
+                idx
+            ].items():
+                self.engine._grid = grid.copy()
+                self.engine._piece = self.engine._pieces[idx]
+                self.engine._rotate_piece(rotation)
+                self.engine._anchor = [translation, self.piece_size - 1]
+                self.engine._hard_drop()
+                self.engine._update_grid(True)
+                self.assertFalse(is_terminal[0, action])
+                self.engine._clear_rows()
+                np.testing.assert_array_equal(afterstates[0, action], self.engine._grid)
+                np.testing.assert_array_equal(
+                    feature_values[0, action],
+                    [func() for func in self.engine._get_dellacherie_funcs()],
+                )
+
+    def test__get_afterstates_terminal(self) -> None:
+        self.engine._grid[:, self.piece_size :] = True
+        self.engine._grid[0, :] = False
+        _, _, is_terminal = self.engine._get_afterstates(self.engine._grid[None], 0)
+        # Only the vertical I piece dropped into the empty column fits.
+        np.testing.assert_array_equal(np.flatnonzero(~is_terminal[0]), [0, 17])
+
+    def test__compute_action_table_is_distinct(self) -> None:
+        num_distinct = [
+            self.engine._action_tables[idx]["is_distinct"].sum()
+            for idx in self.engine._pieces.keys()
+        ]
+        # The I, S and Z pieces have two distinct rotations and the O piece one.
+        np.testing.assert_array_equal(num_distinct, [17, 34, 9, 34, 34, 17, 17])
+
+    def test__get_canonical_action_table(self) -> None:
+        for idx in self.engine._pieces.keys():
+            table = self.engine._action_tables[idx]
+            canonical_table = self.engine._canonical_action_tables[idx]
+            raw_actions = canonical_table["raw_actions"]
+
+            np.testing.assert_array_equal(
+                raw_actions, np.flatnonzero(table["is_distinct"])
+            )
+            np.testing.assert_array_equal(
+                canonical_table["x_coords"], table["x_coords"][raw_actions]
+            )
+            np.testing.assert_array_equal(
+                table["canonical_indices"][raw_actions], np.arange(raw_actions.size)
+            )
+
+    def test__get_afterstates_canonical(self) -> None:
+        self.engine._grid[:, -3:] = True
+        self.engine._grid[4, -3:] = False
+        grid = self.engine._grid.copy()
+
+        for idx in self.engine._pieces.keys():
+            raw_actions = self.engine._canonical_action_tables[idx]["raw_actions"]
+            afterstates, feature_values, is_terminal = self.engine._get_afterstates(
+                grid[None], idx
+            )
+            canonical_results = self.engine._get_afterstates(grid[None], idx, True)
+
+            for result, canonical_result in zip(
+                (afterstates, feature_values, is_terminal), canonical_results
+            ):
+                np.testing.assert_array_equal(canonical_result, result[:, raw_actions])
+
+            # Every raw action's afterstate is one of the canonical afterstates.
+            for afterstate in afterstates[0]:
+                self.assertTrue(
+                    np.any(np.all(canonical_results[0][0] == afterstate, axis=(1, 2)))
+                )
+
+    def test__get_action_mask_terminal(self) -> None:
+        self.engine._grid[:, self.piece_size :] = True
+        self.engine._grid[0, :] = False
+        self.engine._piece = self.engine._pieces[0]
+        # Action 17 drops the I piece into the same column as action 0.
+        np.testing.assert_array_equal(
+            np.flatnonzero(self.engine._get_action_mask()), [0]
+        )
+
+    def test__get_action_mask_all_terminal(self) -> None:
+        self.engine._grid[:, self.piece_size :] = True
+        self.engine._piece = self.engine._pieces[2]
+        np.testing.assert_array_equal(
+            self.engine._get_action_mask(),
+            self.engine._action_tables[2]["is_distinct"],
+        )
+
+    def test__get_batch_dellacherie_features_populated_grid(self) -> None:
+        self.engine._grid[:, -2:] = True
+        self.engine._grid[0, self.engine._height - 2 :] = False
+        self.engine._grid[2, self.engine._height - 2 :] = False
+        self.engine._grid[4, self.engine._height - 1] = False
+        np.testing.assert_array_equal(
+            self.engine._get_batch_dellacherie_features(self.engine._grid[None]),
+            [[46, 12, 1, 6]],
+        )
+
+    def test__update_coords_and_anchor_preview(self) -> None:
+        self.engine._num_preview = 3
+        self.engine._reset()
+        next_piece_ids = list(self.engine._next_piece_ids)
+        self.assertEqual(len(next_piece_ids), 3)
+        self.engine._update_coords_and_anchor()
+        self.assertEqual(self.engine._piece._idx, next_piece_ids[0])
+        self.assertEqual(list(self.engine._next_piece_ids)[:2], next_piece_ids[1:])
+        self.assertEqual(len(self.engine._next_piece_ids), 3)
+
+    def test__generate_id_randomly_chunks(self) -> None:
+        ids = [
+            self.engine._generate_id_randomly()
+            for _ in range(2 * self.engine.PIECE_ID_CHUNK_SIZE + 1)
+        ]
+        self.assertTrue(all(0 <= idx < self.engine._num_pieces for idx in ids))
+        self.assertEqual(len(set(ids)), self.engine._num_pieces)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+
+from gym_simplifiedtetris.agents._sparse_q_table import _SparseQTable
+
+
+class _SparseQTableTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.num_cells = 7 * 4
+        self.num_actions = 4
+        self.q_table = _SparseQTable(
+            num_cells=self.num_cells,
+            num_actions=self.num_actions,
+            max_states=2,
+            initial_capacity=1,
+        )
+
+    def _get_obs(self, cell: int, piece_id: int) -> np.array:
+        obs = np.zeros(self.num_cells + 1, dtype=int)
+        obs[cell] = 1
+        obs[-1] = piece_id
+
+        return obs
+
+    def test_get_unvisited(self) -> None:
+        np.testing.assert_array_equal(
+            self.q_table.get(self._get_obs(0, 0)), np.zeros(self.num_actions)
+        )
+        self.assertEqual(len(self.q_table), 0)
+
+    def test_update(self) -> None:
+        self.q_table.update(self._get_obs(0, 0), 2, 0.5)
+        self.q_table.update(self._get_obs(0, 0), 2, 0.25)
+        np.testing.assert_array_equal(
+            self.q_table.get(self._get_obs(0, 0)), [0, 0, 0.75, 0]
+        )
+        np.testing.assert_array_equal(
+            self.q_table.get(self._get_obs(0, 1)), np.zeros(self.num_actions)
+        )
+
+    def test_update_evicts_least_recently_used(self) -> None:
+        self.q_table.update(self._get_obs(0, 0), 0, 1.0)
+        self.q_table.update(self._get_obs(1, 0), 1, 1.0)
+        self.q_table.get(self._get_obs(0, 0))
+        self.q_table.update(self._get_obs(2, 0), 2, 1.0)
+        self.assertEqual(len(self.q_table), 2)
+        self.assertIn(self._get_obs(0, 0), self.q_table)
+        self.assertNotIn(self._get_obs(1, 0), self.q_table)
+        np.testing.assert_array_equal(
+            self.q_table.get(self._get_obs(2, 0)), [0, 0, 1.0, 0]
+        )
+
+    def test_update_batch(self) -> None:
+        obs = np.stack([self._get_obs(0, 0), self._get_obs(0, 0), self._get_obs(1, 0)])
+        self.q_table.update_batch(obs, np.array([1, 1, 3]), np.array([0.5, 0.25, 2]))
+        np.testing.assert_array_equal(
+            self.q_table.get_batch(np.stack([obs[0], obs[2], self._get_obs(2, 0)])),
+            [[0, 0.75, 0, 0], [0, 0, 0, 2], [0, 0, 0, 0]],
+        )
+
+    def test_update_batch_with_more_states_than_max_states(self) -> None:
+        obs = np.stack([self._get_obs(cell, 0) for cell in range(3)])
+        self.q_table.update_batch(obs, np.zeros(3, dtype=int), np.array([1, 2, 4]))
+        self.assertEqual(len(self.q_table), 2)
+        self.assertNotIn(obs[0], self.q_table)
+        np.testing.assert_array_equal(self.q_table.get_batch(obs)[:, 0], [0, 2, 4])
+
+    def test_update_batch_evicts_states_outside_batch(self) -> None:
+        self.q_table.update(self._get_obs(0, 0), 0, 1.0)
+        self.q_table.update(self._get_obs(1, 0), 0, 1.0)
+        obs = np.stack([self._get_obs(2, 0), self._get_obs(0, 0)])
+        self.q_table.update_batch(obs, np.array([0, 0]), np.array([1.0, 1.0]))
+        self.assertNotIn(self._get_obs(1, 0), self.q_table)
+        np.testing.assert_array_equal(self.q_table.get_batch(obs)[:, 0], [1, 2])
+
+    def test_get_batch_marks_states_used(self) -> None:
+        self.q_table.update(self._get_obs(0, 0), 0, 1.0)
+        self.q_table.update(self._get_obs(1, 0), 1, 1.0)
+        self.q_table.get_batch(self._get_obs(0, 0)[None])
+        self.q_table.update(self._get_obs(2, 0), 2, 1.0)
+        self.assertIn(self._get_obs(0, 0), self.q_table)
+        self.assertNotIn(self._get_obs(1, 0), self.q_table)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+from functools import partial
+from unittest import mock
+
+import numpy as np
+
+from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
+from gym_simplifiedtetris.envs._simplified_tetris_engine import (
+    _SimplifiedTetrisEngine,
+)
+from gym_simplifiedtetris.training import ThreadPoolVecEnv
+
+
+class ThreadPoolVecEnvTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.env_fns = [
+            partial(Tetris, grid_dims=(8, 6), piece_size=4, seed=seed)
+            for seed in range(5)
+        ]
+        self.envs = [env_fn() for env_fn in self.env_fns]
+
+    def tearDown(self) -> None:
+        for env in self.envs:
+            env.close()
+
+    def test_serial_without_gil_free_kernel(self) -> None:
+        vec_env = ThreadPoolVecEnv(self.env_fns)
+
+        self.assertFalse(vec_env.releases_gil)
+        self.assertEqual(vec_env.num_threads, 1)
+
+        vec_env.close()
+
+    def test_threads_with_gil_free_kernel(self) -> None:
+        with mock.patch.object(_SimplifiedTetrisEngine, "RELEASES_GIL", True):
+            vec_env = ThreadPoolVecEnv(self.env_fns)
+
+            self.assertTrue(vec_env.releases_gil)
+            self.assertEqual(vec_env.num_threads, min(os.cpu_count(), 5))
+
+            vec_env.close()
+
+    def test_step_matches_envs(self) -> None:
+        for num_threads in [1, 2]:
+            vec_env = ThreadPoolVecEnv(self.env_fns, num_threads=num_threads)
+            envs = [env_fn() for env_fn in self.env_fns]
+
+            obs = vec_env.reset()
+            np.testing.assert_array_equal(obs, np.stack([env.reset() for env in envs]))
+
+            rng = np.random.default_rng(0)
+            num_dones = 0
+
+            for _ in range(60):
+                actions = rng.integers(vec_env.action_space.n, size=5)
+                vec_env.step_async(actions)
+                obs, rewards, dones, infos = vec_env.step_wait()
+
+                for idx, env in enumerate(envs):
+                    env_obs, env_reward, env_done, env_info = env.step(actions[idx])
+
+                    if env_done:
+                        np.testing.assert_array_equal(
+                            infos[idx]["terminal_observation"], env_obs
+                        )
+                        env_obs = env.reset()
+
+                    np.testing.assert_array_equal(obs[idx], env_obs)
+                    self.assertAlmostEqual(rewards[idx], env_reward, places=5)
+                    self.assertEqual(dones[idx], env_done)
+                    self.assertEqual(
+                        infos[idx]["num_rows_cleared"], env_info["num_rows_cleared"]
+                    )
+
+                num_dones += dones.sum()
+
+            self.assertGreater(num_dones, 0)
+            vec_env.close()
+
+    def test_env_method(self) -> None:
+        vec_env = ThreadPoolVecEnv(self.env_fns, num_threads=2)
+        vec_env.reset()
+        masks = vec_env.env_method("action_masks", indices=[4, 0])
+
+        for mask, idx in zip(masks, [4, 0]):
+            self.envs[idx].reset()
+            np.testing.assert_array_equal(mask, self.envs[idx].action_masks())
+
+        self.assertEqual(vec_env.get_attr("_height_", indices=[1]), [8])
+        vec_env.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+import unittest
+
+from gym_simplifiedtetris.trainers import (
+    TrainerConfig,
+    get_num_cells,
+    load_config,
+    make_env_fns,
+)
+
+
+class TrainerConfigTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "config.json")
+
+        with open(self.path, "w") as file:
+            json.dump(
+                {"algo": "ppo", "grid_dims": [8, 6], "hparams": {"alr": 0.001}}, file
+            )
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_load_config_defaults(self) -> None:
+        self.assertEqual(load_config(), TrainerConfig())
+
+    def test_load_config_file(self) -> None:
+        config = load_config(self.path)
+
+        self.assertEqual(config.algo, "ppo")
+        self.assertEqual(config.grid_dims, (8, 6))
+        self.assertEqual(config.hparams, {"alr": 0.001})
+
+    def test_load_config_overrides(self) -> None:
+        config = load_config(
+            self.path,
+            ["num_envs=4", "reward=score", "hparams.depth=3", "hparams.alr=0.01"],
+        )
+
+        self.assertEqual(config.num_envs, 4)
+        self.assertEqual(config.reward, "score")
+        self.assertEqual(config.hparams, {"alr": 0.01, "depth": 3})
+
+    def test_load_config_invalid(self) -> None:
+        with self.assertRaises(AssertionError):
+            load_config(overrides=["algo=a2c"])
+
+        with self.assertRaises(AssertionError):
+            load_config(overrides=["num_env=4"])
+
+        with self.assertRaises(AssertionError):
+            load_config(overrides=["network=lstm"])
+
+    def test_make_env_fns(self) -> None:
+        config = TrainerConfig(
+            obs_type="part_binary", history_len=2, num_envs=3, seed=0
+        )
+        envs = [env_fn() for env_fn in make_env_fns(config)]
+        obs = [env.reset() for env in envs]
+
+        self.assertEqual(len(envs), 3)
+        self.assertEqual(obs[0].shape, envs[0].observation_space.shape)
+        self.assertEqual(obs[0].shape, (2 * (get_num_cells(config) + 1),))
+
+    def test_get_num_cells(self) -> None:
+        self.assertEqual(get_num_cells(TrainerConfig()), 100)
+        self.assertEqual(get_num_cells(TrainerConfig(obs_type="part_binary")), 80)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+import torch
+from torch import nn
+
+from _vec_env_helpers import SyncVecEnv
+from gym_simplifiedtetris.envs import SimplifiedTetrisBinaryEnv as Tetris
+from gym_simplifiedtetris.training import ReplayBuffer, VecEnvAgent
+
+
+class _QNet(nn.Module):
+    """Returns the same Q-values for every state, preferring action 5."""
+
+    def __init__(self, obs_size: int, num_actions: int) -> None:
+        super().__init__()
+        self.linear = nn.Linear(obs_size, num_actions)
+        nn.init.zeros_(self.linear.weight)
+        nn.init.zeros_(self.linear.bias)
+        self.linear.bias.data[5] = 1
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.linear(x.float())
+
+
+class VecEnvAgentTest(unittest.TestCase):
+    def setUp(self) -> None:
+        envs = [
+            Tetris(grid_dims=(8, 6), piece_size=4, mask_actions=True) for _ in range(3)
+        ]
+
+        for seed, env in enumerate(envs):
+            env._seed(seed)
+
+        self.vec_env = SyncVecEnv(envs)
+        self.obs_size = envs[0].observation_space.shape[0]
+        self.buffer = ReplayBuffer(1000, self.obs_size)
+        self.agent = VecEnvAgent(self.vec_env, self.buffer, seed=0)
+
+        self.num_actions = envs[0].action_space.n
+        self.net = _QNet(self.obs_size, self.num_actions)
+
+    def test_get_actions_greedy(self) -> None:
+        np.testing.assert_array_equal(self.agent.get_actions(self.net, 0.0), [5] * 3)
+
+    def test_get_actions_masked(self) -> None:
+        agent = VecEnvAgent(self.vec_env, self.buffer, seed=0, mask_actions=True)
+
+        for _ in range(30):
+            masks = agent.action_masks.copy()
+            actions = agent.get_actions(self.net, 0.5)
+            self.assertTrue(np.all(masks[np.arange(3), actions]))
+            agent.play_step(self.net, 1.0)
+
+        # Greedy actions maximise over the allowed actions only.
+        agent.action_masks[:, 5] = False
+        self.assertFalse(np.any(agent.get_actions(self.net, 0.0) == 5))
+
+    def test_play_step_stores_action_masks(self) -> None:
+        buffer = ReplayBuffer(1000, self.obs_size, num_actions=self.num_actions)
+        agent = VecEnvAgent(self.vec_env, buffer, seed=0, mask_actions=True)
+
+        for _ in range(30):
+            agent.play_step(self.net, 1.0)
+            _, _, _, dones, _, new_action_masks = buffer._get_batch(
+                np.arange(len(buffer) - 3, len(buffer))
+            )
+
+            # Terminal experiences are not bootstrapped, so allow every action.
+            np.testing.assert_array_equal(
+                new_action_masks[~dones], agent.action_masks[~dones]
+            )
+            self.assertTrue(np.all(new_action_masks[dones]))
+
+        self.assertTrue(np.any(buffer._dones[:90]))
+        self.assertFalse(np.all(buffer._new_action_masks[:90]))
+
+    def test_play_step(self) -> None:
+        for _ in range(30):
+            self.agent.play_step(self.net, 1.0)
+
+        self.assertEqual(len(self.buffer), 90)
+        _, _, _, dones, new_states = self.buffer.sample(90)
+
+        # Terminal experiences store the final obs rather than the reset obs.
+        self.assertTrue(np.any(dones))
+        self.assertTrue(np.all(new_states[dones, : 8 * 6].sum(axis=1) > 0))
+
+
+if __name__ == "__main__":
+    unittest.main()